@@ -0,0 +1,57 @@
+# admin.py
+import argparse
+import json
+import os
+import sys
+
+from services.admin_service import AdminService, TASKS
+from services.record_storage import COMPRESSIONS
+from services.storage_backends import BACKENDS
+from utils.console_utils import ConsoleManager, Color
+
+def main(argv=None) -> int:
+    """Run batch maintenance tasks across every user's collection"""
+    parser = argparse.ArgumentParser(description="Recipe Management System - admin tasks")
+    parser.add_argument("task", choices=sorted(TASKS), help="task to run for every user")
+    parser.add_argument("--data-dir", default=os.environ.get("RECIPE_DATA_DIR", "data"),
+                        help="directory holding the users' collections")
+    parser.add_argument("--backend", choices=sorted(BACKENDS),
+                        default=os.environ.get("RECIPE_STORAGE_BACKEND", "file"),
+                        help="storage backend the collections use")
+    parser.add_argument("--compression", choices=COMPRESSIONS,
+                        default=os.environ.get("RECIPE_COMPRESSION") or None,
+                        help="codec for files the task rewrites (default: plain)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=8, help="users handed to a worker at a time")
+    parser.add_argument("--users", nargs="*", help="limit the run to these usernames")
+    parser.add_argument("--report", help="write the full JSON report to this file")
+    args = parser.parse_args(argv)
+
+    admin = AdminService(args.data_dir, args.workers, args.chunk_size, args.backend, args.compression)
+    report = admin.run(args.task, args.users)
+
+    ConsoleManager.print_header(f"🛠️ Admin: {args.task}")
+    print(f"{Color.BLUE}Users:{Color.RESET} {report.users} | "
+          f"{Color.GREEN}Succeeded:{Color.RESET} {report.succeeded} | "
+          f"{Color.RED}Failed:{Color.RESET} {len(report.failures)} | "
+          f"{Color.BLUE}Workers:{Color.RESET} {report.workers} | "
+          f"{Color.BLUE}Time:{Color.RESET} {report.elapsed:.2f}s")
+
+    summary = report.summary()
+    if summary:
+        print(f"\n{Color.PURPLE}Summary:{Color.RESET}")
+        for key, value in summary.items():
+            print(f"  • {key}: {value}")
+
+    for username, error in sorted(report.failures.items()):
+        ConsoleManager.print_error(f"{username}: {error}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2)
+        ConsoleManager.print_success(f"Report written to {args.report}")
+
+    return 1 if report.failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
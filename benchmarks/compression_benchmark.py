@@ -0,0 +1,91 @@
+# benchmarks/compression_benchmark.py
+"""Size/CPU trade-off of storing user files compressed, per codec and level.
+
+Run from the repository root, either on a synthetic collection or on a real
+user's file:
+
+    python benchmarks/compression_benchmark.py --recipes 5000
+    python benchmarks/compression_benchmark.py --user alice --data-dir data
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.recipe import Recipe, RecipeCategory, Ingredient
+from services.migrations import decode, encode
+from services.record_storage import read_document, write_document
+from services.storage_backends import FileBackend
+
+CONFIGURATIONS = [(None, None)] + [("zlib", level) for level in (1, 6, 9)] + \
+                 [("gzip", level) for level in (1, 6, 9)] + [("lzma", level) for level in (0, 3, 6)]
+
+WORDS = ("chop slice dice simmer boil whisk fold bake roast stir season serve until golden "
+         "minutes heat pan oven bowl mixture add remaining cover rest gently medium high low").split()
+INGREDIENTS = ("flour sugar butter egg milk salt pepper onion garlic tomato basil rice chicken "
+               "beef carrot celery lemon olive oil yeast cheese cream parsley thyme potato").split()
+
+def synthetic_recipes(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    recipes = []
+    for i in range(count):
+        recipes.append(Recipe(
+            name=f"{rng.choice(INGREDIENTS).title()} {rng.choice(['Stew', 'Bake', 'Salad', 'Soup', 'Pie'])} {i}",
+            ingredients=[Ingredient(name, str(rng.randint(1, 4)), rng.choice(["cup", "tbsp", "g", ""]))
+                         for name in rng.sample(INGREDIENTS, rng.randint(4, 10))],
+            instructions=[" ".join(rng.choices(WORDS, k=rng.randint(8, 20))).capitalize() + "."
+                          for _ in range(rng.randint(3, 8))],
+            category=rng.choice(list(RecipeCategory)),
+            prep_time=rng.randint(5, 60), cook_time=rng.randint(0, 120), servings=rng.randint(1, 8),
+            tags=rng.sample(["quick", "vegetarian", "family", "spicy", "holiday"], 2),
+        ))
+    return recipes
+
+def measure(recipes: list, compression, level, runs: int, directory: str) -> dict:
+    path = os.path.join(directory, f"recipes_{compression}_{level}.json")
+    document = encode(recipes)
+    writes, reads = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        write_document(path, document, compression, level)
+        writes.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        loaded = decode(read_document(path).document)
+        reads.append(time.perf_counter() - started)
+    assert len(loaded) == len(recipes)
+    return {"size": os.path.getsize(path), "write_ms": statistics.median(writes) * 1000,
+            "read_ms": statistics.median(reads) * 1000}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recipes", type=int, default=5000, help="size of the synthetic collection")
+    parser.add_argument("--user", help="benchmark this user's collection instead")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.user:
+        # Same read and schema upgrade as the app, without rewriting the file
+        recipes = FileBackend(args.data_dir).load(args.user, repair=False).recipes
+    else:
+        recipes = synthetic_recipes(args.recipes)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = [(compression, level, measure(recipes, compression, level, args.runs, directory))
+                   for compression, level in CONFIGURATIONS]
+
+    baseline = results[0][2]["size"]
+    print(f"{len(recipes)} recipes, median of {args.runs} run(s)\n")
+    print(f"{'codec':<8}{'level':>6}{'size KB':>11}{'ratio':>8}{'write ms':>11}{'read ms':>10}")
+    for compression, level, result in results:
+        print(f"{compression or 'none':<8}{'' if level is None else level:>6}{result['size'] / 1024:>11.1f}"
+              f"{baseline / result['size']:>7.1f}x{result['write_ms']:>11.1f}{result['read_ms']:>10.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# benchmarks/startup_benchmark.py
+"""Startup budget check: time-to-first-menu, import time and lazily imported modules.
+
+Run from the repository root:
+
+    python benchmarks/startup_benchmark.py --runs 5
+
+Exits with status 1 when a budget is exceeded or a module that should load
+lazily is imported at startup, so it can guard against regressions.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only needed by specific features (export, backups, nutrition, admin)
+LAZY_MODULES = ["csv", "lzma", "zlib", "sqlite3", "hashlib", "concurrent.futures",
+                "fractions", "argparse", "glob"]
+
+FIRST_MENU_SCRIPT = """
+import io, contextlib
+from main import RecipeApp
+from utils.console_utils import ConsoleManager, InteractiveMenu
+app = RecipeApp()
+with contextlib.redirect_stdout(io.StringIO()):
+    InteractiveMenu.arrow_keys_supported()
+    ConsoleManager.print_header("Professional Recipe Management System")
+    InteractiveMenu("Welcome", ["Login to Existing Account", "Create New Account"]).display()
+"""
+
+def _run(args):
+    env = dict(os.environ, TERM="dumb", PYTHONDONTWRITEBYTECODE="1")
+    return subprocess.run([sys.executable] + args, cwd=REPO_ROOT, env=env,
+                          stdin=subprocess.DEVNULL, capture_output=True, text=True)
+
+def measure_import_ms() -> float:
+    """Cumulative `-X importtime` cost of `import main`, in milliseconds"""
+    result = _run(["-X", "importtime", "-c", "import main"])
+    for line in reversed(result.stderr.splitlines()):
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == "main":
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"Could not read import time:\n{result.stderr[-500:]}")
+
+def measure_first_menu_ms() -> float:
+    """Wall-clock time from interpreter launch until the first menu is rendered"""
+    started = time.perf_counter()
+    result = _run(["-c", FIRST_MENU_SCRIPT])
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-500:])
+    return elapsed
+
+def eager_lazy_modules() -> list:
+    script = f"import main, sys; print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    output = _run(["-c", script]).stdout.strip()
+    return [name for name in output.split(",") if name]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=120.0)
+    parser.add_argument("--menu-budget-ms", type=float, default=400.0)
+    args = parser.parse_args(argv)
+
+    import_times = [measure_import_ms() for _ in range(args.runs)]
+    menu_times = [measure_first_menu_ms() for _ in range(args.runs)]
+    import_ms = statistics.median(import_times)
+    menu_ms = statistics.median(menu_times)
+    leaked = eager_lazy_modules()
+
+    print(f"import main (median of {args.runs}): {import_ms:.1f} ms  (budget {args.import_budget_ms:.0f} ms)")
+    print(f"time to first menu (median of {args.runs}): {menu_ms:.1f} ms  (budget {args.menu_budget_ms:.0f} ms)")
+    print(f"lazy modules imported at startup: {', '.join(leaked) if leaked else 'none'}")
+
+    failed = import_ms > args.import_budget_ms or menu_ms > args.menu_budget_ms or bool(leaked)
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,104 @@
 # controllers/recipe_controller.py
-import json
-import csv
 import os
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from collections import Counter
+from dataclasses import replace
+try:
+    from functools import cached_property
+except ImportError:
+    # Python 3.7: a minimal stand-in that stores the value on first access
+    class cached_property:
+        def __init__(self, func):
+            self.func = func
+            self.__doc__ = func.__doc__
+
+        def __set_name__(self, owner, name):
+            self.name = name
+
+        def __get__(self, instance, owner=None):
+            if instance is None:
+                return self
+            value = instance.__dict__[self.name] = self.func(instance)
+            return value
 
 # Import models and utilities
 from models.recipe import Recipe, RecipeCategory, Ingredient, NutritionalInfo
 from services.recipe_service import RecipeService
-from utils.console_utils import ConsoleManager, InteractiveMenu, InteractiveForm, FormField, Color
+from services.recipe_index import RecipeQuery
+from utils.console_utils import ConsoleManager, InteractiveMenu, InteractiveForm, FormField, Color, AutocompletePrompt
+
+# (label, sort key, descending) choices offered by the listing screens
+SORT_OPTIONS = [
+    ("Collection Order", None, True),
+    ("Highest Rated", "rating", True),
+    ("Quickest", "total_time", False),
+    ("Newest", "created_at", True),
+    ("Recently Updated", "updated_at", True),
+]
 
 class RecipeController:
-    def __init__(self, username: str):
+    def __init__(self, username: str, service: Optional[RecipeService] = None):
         self.username = username
-        self.service = RecipeService()
+        self.service = service or RecipeService()
+    
+    # Feature services are imported and built on first use so that startup
+    # only pays for what the current session actually touches
+    
+    @cached_property
+    def shopping_lists(self):
+        from services.shopping_list_service import ShoppingListService
+        return ShoppingListService(self.service)
+    
+    @cached_property
+    def nutrition(self):
+        from services.nutrition_service import NutritionService
+        return NutritionService(self.service)
+    
+    @cached_property
+    def recommendations(self):
+        from services.recommendation_service import RecommendationService
+        return RecommendationService(self.service)
+    
+    @cached_property
+    def pantry(self):
+        from services.pantry_service import PantryService
+        return PantryService(self.service)
+    
+    @cached_property
+    def analytics(self):
+        from services.analytics_service import AnalyticsService
+        return AnalyticsService(self.service)
+    
+    @cached_property
+    def catalog(self):
+        from services.catalog_service import GlobalCatalog
+        return GlobalCatalog(self.service.data_dir, backend=self.service.backend)
+    
+    @cached_property
+    def duplicates(self):
+        from services.duplicate_service import DuplicateService
+        return DuplicateService(self.service)
+    
+    @cached_property
+    def meal_plans(self):
+        from services.meal_plan_service import MealPlanService
+        return MealPlanService(self.service)
+    
+    @cached_property
+    def autocomplete(self):
+        from services.autocomplete_service import AutocompleteService
+        return AutocompleteService(self.service)
+    
+    @cached_property
+    def backups(self):
+        from services.backup_service import BackupService
+        return BackupService(self.service)
+    
+    @cached_property
+    def backup_repository(self):
+        from services.backup_repository import BackupRepository
+        return BackupRepository(self.service)
     
     def display_recipe(self, recipe: Recipe):
         """Display a single recipe with enhanced formatting"""
@@ -68,6 +152,8 @@ class RecipeController:
                 print(f"  Carbs: {nutrition.carbs}g")
             if nutrition.fat:
                 print(f"  Fat: {nutrition.fat}g")
+            if nutrition.fiber:
+                print(f"  Fiber: {nutrition.fiber}g")
         
         print(f"\n{Color.BLUE}📅 Created:{Color.RESET} {recipe.created_at}")
         if recipe.updated_at != recipe.created_at:
@@ -131,19 +217,23 @@ class RecipeController:
     def _get_ingredients(self) -> List[Ingredient]:
         """Interactive ingredient collection"""
         ingredients = []
+        index = self.autocomplete.get_index(self.username)
         print(f"\n{Color.GREEN}🛒 Add Ingredients (press Enter with empty name to finish):{Color.RESET}")
         
         while True:
             print(f"\n{Color.BLUE}Ingredient #{len(ingredients) + 1}:{Color.RESET}")
-            name = input("  Name: ").strip().title()
+            name = AutocompletePrompt("  Name: ", index.ingredients.complete).run()
             if not name:
                 break
+            # Reuse the spelling already in the collection ("tomatoes " -> "Tomato")
+            name = index.ingredients.canonical(name.title())
             
             amount = input("  Amount: ").strip()
             if not amount:
                 amount = "1"
             
-            unit = input("  Unit (optional): ").strip()
+            unit = AutocompletePrompt("  Unit (optional): ", index.units.complete).run()
+            unit = index.units.canonical(unit) if unit else ""
             
             ingredients.append(Ingredient(name=name, amount=amount, unit=unit))
             print(f"  ✅ Added: {ingredients[-1]}")
@@ -166,25 +256,23 @@ class RecipeController:
     def _get_tags(self) -> List[str]:
         """Get recipe tags"""
         print(f"\n{Color.CYAN}🏷️ Add Tags (comma-separated, optional):{Color.RESET}")
-        tags_input = input("  Tags: ").strip()
+        tags = self.autocomplete.get_index(self.username).tags
+        
+        def complete_last_tag(text: str) -> List[str]:
+            done, _, current = text.rpartition(",")
+            if not current.strip():
+                return []
+            lead = f"{done}, " if done else ""
+            return [lead + tag for tag in tags.complete(current.strip())]
+        
+        tags_input = AutocompletePrompt("  Tags: ", complete_last_tag).run()
         if tags_input:
-            return [tag.strip().title() for tag in tags_input.split(",") if tag.strip()]
+            return [tags.canonical(tag.strip().title()) for tag in tags_input.split(",") if tag.strip()]
         return []
     
     def list_recipes(self):
         """Display all recipes with interactive selection"""
-        recipes = self.service.load_recipes(self.username)
-        if not recipes:
-            ConsoleManager.print_warning("No recipes found!")
-            return
-        
-        recipe_names = [f"{recipe.name} ({recipe.category.value})" for recipe in recipes]
-        menu = InteractiveMenu("All Recipes", recipe_names)
-        
-        selected = menu.run()
-        if selected >= 0 and selected < len(recipes):
-            self.display_recipe(recipes[selected])
-            self._recipe_actions_menu(recipes[selected])
+        self._browse_query("All Recipes", RecipeQuery(), "No recipes found!")
     
     def _recipe_actions_menu(self, recipe: Recipe):
         """Show actions menu for a specific recipe"""
@@ -192,7 +280,11 @@ class RecipeController:
             "Edit Recipe",
             "Delete Recipe",
             "Toggle Favorite",
-            "Rate Recipe"
+            "Rate Recipe",
+            "Scale Servings",
+            "Compute Nutrition",
+            "Similar Recipes",
+            "Revision History"
         ]
         
         menu = InteractiveMenu(f"Actions for '{recipe.name}'", actions)
@@ -206,6 +298,79 @@ class RecipeController:
             self.toggle_favorite(recipe.recipe_id)
         elif selected == 3:  # Rate
             self.rate_recipe(recipe.recipe_id)
+        elif selected == 4:  # Scale
+            self.scale_recipe(recipe)
+        elif selected == 5:  # Nutrition
+            self.compute_nutrition(recipe.recipe_id)
+        elif selected == 6:  # Similar
+            self.show_similar(recipe)
+        elif selected == 7:  # History
+            self.show_revisions(recipe.recipe_id)
+    
+    def show_similar(self, recipe: Recipe):
+        """Show recipes similar to the given one"""
+        similar = self.recommendations.get_similar(self.username, recipe.recipe_id)
+        if not similar:
+            ConsoleManager.print_warning("No similar recipes found!")
+            return
+        
+        recipe_names = [f"{other.name} ({other.category.value}) - {score:.0%} match" for other, score in similar]
+        menu = InteractiveMenu(f"Recipes Similar to '{recipe.name}'", recipe_names)
+        
+        selected = menu.run()
+        if selected >= 0 and selected < len(similar):
+            self.display_recipe(similar[selected][0])
+            self._recipe_actions_menu(similar[selected][0])
+    
+    def show_revisions(self, recipe_id: str):
+        """Browse a recipe's revision history, compare revisions and restore one"""
+        revisions = self.service.list_revisions(self.username, recipe_id)
+        if not revisions:
+            ConsoleManager.print_warning("No earlier versions of this recipe yet!")
+            return
+        
+        labels = []
+        for revision in reversed(revisions):
+            changes = ", ".join(name.replace('_', ' ') for name in revision.fields)
+            description = {"deleted": "deleted"}.get(revision.kind, changes or "original version")
+            labels.append(f"#{revision.number}  {revision.timestamp[:19].replace('T', ' ')} - {description}")
+        selected = InteractiveMenu("Revision History", labels).run()
+        if selected < 0 or selected >= len(revisions):
+            return
+        
+        revision = revisions[len(revisions) - 1 - selected]
+        latest = revisions[-1].number
+        options = ["View Changes From Previous", "Compare With Current", "Restore This Version"]
+        choice = InteractiveMenu(f"Revision #{revision.number}", options).run()
+        if choice == 0:  # Changes
+            self._show_revision_diff(recipe_id, revision.number - 1, revision.number)
+        elif choice == 1:  # Compare
+            self._show_revision_diff(recipe_id, revision.number, latest)
+        elif choice == 2:  # Restore
+            if InteractiveMenu("Are you sure?", ["Yes, Restore", "No, Cancel"]).run() != 0:
+                return
+            restored = self.service.restore_revision(self.username, recipe_id, revision.number)
+            if restored is not None:
+                ConsoleManager.print_success(f"Restored '{restored.name}' to revision #{revision.number}!")
+            else:
+                ConsoleManager.print_error("Failed to restore this revision!")
+    
+    def _show_revision_diff(self, recipe_id: str, first: int, second: int):
+        if first < 1 or first == second:
+            ConsoleManager.print_info("No differences.")
+            return
+        changes = self.service.diff_revisions(self.username, recipe_id, first, second)
+        if changes is None:
+            ConsoleManager.print_error("This revision could not be rebuilt from the history!")
+            return
+        if not changes:
+            ConsoleManager.print_info("No differences.")
+            return
+        print(f"\n{Color.BOLD}Revision #{first} → #{second}{Color.RESET}")
+        for name, (old, new) in changes.items():
+            print(f"  {Color.CYAN}{name.replace('_', ' ').title()}{Color.RESET}")
+            print(f"    {Color.RED}- {old}{Color.RESET}")
+            print(f"    {Color.GREEN}+ {new}{Color.RESET}")
     
     def search_recipes(self):
         """Search recipes with enhanced interface"""
@@ -235,40 +400,189 @@ class RecipeController:
     
     def show_favorites(self):
         """Display favorite recipes"""
-        favorites = self.service.get_favorites(self.username)
-        if not favorites:
-            ConsoleManager.print_warning("No favorite recipes found!")
-            return
-        
-        recipe_names = [f"{recipe.name} ({recipe.category.value})" for recipe in favorites]
-        menu = InteractiveMenu("⭐ Favorite Recipes", recipe_names)
-        
-        selected = menu.run()
-        if selected >= 0 and selected < len(favorites):
-            self.display_recipe(favorites[selected])
-            self._recipe_actions_menu(favorites[selected])
+        self._browse_query("⭐ Favorite Recipes", RecipeQuery(favorite=True),
+                           "No favorite recipes found!")
     
     def browse_by_category(self):
         """Browse recipes by category"""
-        categories = [cat.value for cat in RecipeCategory]
+        counts = self.service.query_recipes(self.username, RecipeQuery(page_size=1)).facets["category"]
+        categories = [f"{cat.value} ({counts.get(cat.value, 0)})" for cat in RecipeCategory]
         menu = InteractiveMenu("Browse by Category", categories)
         
         selected = menu.run()
         if selected >= 0 and selected < len(categories):
             category = list(RecipeCategory)[selected]
-            recipes = self.service.get_by_category(self.username, category)
+            self._browse_query(f"{category.value} Recipes", RecipeQuery(category=category),
+                               f"No recipes found in {category.value} category!", show_category=False)
+    
+    def browse_catalog(self):
+        """Search and browse recipes shared by every user (read-only)"""
+        # Make sure our own latest edits are on disk before the catalog scans
+        self.service.flush(self.username)
+        self.catalog.refresh()
+        counts = self.catalog.category_counts()
+        if not counts:
+            ConsoleManager.print_warning("The catalog is empty!")
+            return
+        
+        menu = InteractiveMenu(f"Global Catalog ({sum(counts.values())} recipes)",
+                               ["Search Catalog", "Browse by Category"])
+        choice = menu.run()
+        
+        if choice == 0:  # Search
+            query = input(f"\n{Color.BLUE}Search all recipes:{Color.RESET} ").strip()
+            if not query:
+                ConsoleManager.print_warning("Search term cannot be empty!")
+                return
+            entries = self.catalog.search(query)
+            title = f"Catalog results for '{query}'"
+        elif choice == 1:  # Category
+            categories = [f"{cat.value} ({counts.get(cat.value, 0)})" for cat in RecipeCategory]
+            selected = InteractiveMenu("Catalog Categories", categories).run()
+            if selected < 0 or selected >= len(categories):
+                return
+            category = list(RecipeCategory)[selected]
+            entries = self.catalog.browse(category)
+            title = f"Catalog: {category.value}"
+        else:
+            return
+        
+        if not entries:
+            ConsoleManager.print_warning("No recipes found in the catalog!")
+            return
+        
+        labels = [f"{entry.name} — by {entry.username} ({entry.category}"
+                  + (f", {entry.rating}/5" if entry.rating else "") + ")" for entry in entries]
+        selected = InteractiveMenu(title, labels).run()
+        if 0 <= selected < len(entries):
+            recipe = self.catalog.get_recipe(entries[selected])
+            if recipe is None:
+                ConsoleManager.print_error("Recipe is no longer available!")
+                return
+            self.display_recipe(recipe)
+    
+    def filter_recipes(self):
+        """Combine several filters, showing how many recipes match each choice"""
+        query = RecipeQuery()
+        while True:
+            result = self.service.query_recipes(self.username, query)
+            facets = result.facets
+            options = [
+                f"Category: {query.category.value if query.category else 'Any'}",
+                f"Difficulty: {query.difficulty or 'Any'}",
+                f"Favorites Only: {'Yes' if query.favorite else 'No'}",
+                f"Minimum Rating: {query.min_rating or 'Any'}",
+                f"Max Total Time: {f'{query.max_total_time} min' if query.max_total_time else 'Any'}",
+                f"Servings: {query.min_servings or 'Any'} - {query.max_servings or 'Any'}",
+                f"Tags: {', '.join(query.tags) if query.tags else 'Any'}",
+                f"🔍 Show {result.total} Recipe(s)",
+                "Clear Filters"
+            ]
+            menu = InteractiveMenu("🔎 Filter Recipes", options)
+            selected = menu.run()
             
-            if not recipes:
-                ConsoleManager.print_warning(f"No recipes found in {category.value} category!")
+            if selected == 0:
+                categories = list(RecipeCategory)
+                labels = [f"{cat.value} ({facets['category'].get(cat.value, 0)})" for cat in categories]
+                choice = InteractiveMenu("Category", ["Any"] + labels).run()
+                if choice >= 0 and choice <= len(categories):
+                    query.category = categories[choice - 1] if choice > 0 else None
+            elif selected == 1:
+                difficulties = ["Easy", "Medium", "Hard"]
+                labels = [f"{d} ({facets['difficulty'].get(d, 0)})" for d in difficulties]
+                choice = InteractiveMenu("Difficulty", ["Any"] + labels).run()
+                if choice >= 0 and choice <= len(difficulties):
+                    query.difficulty = difficulties[choice - 1] if choice > 0 else None
+            elif selected == 2:
+                query.favorite = None if query.favorite else True
+            elif selected == 3:
+                query.min_rating = self._read_number("Minimum rating (1-5, blank for any)")
+            elif selected == 4:
+                query.max_total_time = self._read_number("Max total time in minutes (blank for any)")
+            elif selected == 5:
+                query.min_servings = self._read_number("Minimum servings (blank for any)")
+                query.max_servings = self._read_number("Maximum servings (blank for any)")
+            elif selected == 6:
+                popular = sorted(facets["tags"].items(), key=lambda item: -item[1])[:10]
+                if popular:
+                    print(f"\n{Color.CYAN}Popular tags:{Color.RESET} " +
+                          ", ".join(f"{tag} ({count})" for tag, count in popular))
+                tags_input = input(f"{Color.BLUE}Tags (comma-separated, blank for any):{Color.RESET} ").strip()
+                query.tags = [tag.strip() for tag in tags_input.split(",") if tag.strip()]
+            elif selected == 7:
+                query.page = 1
+                self._browse_query("🔎 Filtered Recipes", query, "No recipes match these filters!")
+                return
+            elif selected == 8:
+                query = RecipeQuery()
+            else:
+                return
+    
+    def _read_number(self, label: str) -> Optional[int]:
+        value = input(f"\n{Color.BLUE}{label}:{Color.RESET} ").strip()
+        try:
+            return int(value) if value else None
+        except ValueError:
+            ConsoleManager.print_error("Please enter a valid number!")
+            input("Press Enter to continue...")
+            return None
+    
+    def _browse_query(self, title: str, query: RecipeQuery, empty_message: str, show_category: bool = True):
+        """Page through query results and open the selected recipe.
+
+        The list is rebuilt in place when another session changes the collection
+        """
+        selected_index = 0
+        while True:
+            result = self.service.query_recipes(self.username, query)
+            if not result.total:
+                ConsoleManager.print_warning(empty_message)
                 return
             
-            recipe_names = [recipe.name for recipe in recipes]
-            recipe_menu = InteractiveMenu(f"{category.value} Recipes", recipe_names)
+            if show_category:
+                recipe_names = [f"{recipe.name} ({recipe.category.value})" for recipe in result.recipes]
+            else:
+                recipe_names = [recipe.name for recipe in result.recipes]
+            has_next = result.page < result.page_count
+            has_previous = result.page > 1
+            if has_next:
+                recipe_names.append("→ Next Page")
+            if has_previous:
+                recipe_names.append("← Previous Page")
+            sort_label = next((label for label, key, descending in SORT_OPTIONS
+                               if key == query.sort_by and descending == query.descending), "Custom")
+            recipe_names.append(f"↕ Sort: {sort_label}")
+            
+            if result.page_count > 1:
+                title_text = f"{title} - Page {result.page}/{result.page_count} ({result.total} recipes)"
+            else:
+                title_text = title
+            menu = InteractiveMenu(title_text, recipe_names,
+                                   watch=lambda: self.service.refresh(self.username))
+            menu.selected_index = min(selected_index, len(menu.options) - 1)
             
-            recipe_selected = recipe_menu.run()
-            if recipe_selected >= 0 and recipe_selected < len(recipes):
-                self.display_recipe(recipes[recipe_selected])
-                self._recipe_actions_menu(recipes[recipe_selected])
+            selected = menu.run()
+            if selected == InteractiveMenu.REFRESH:
+                selected_index = menu.selected_index
+                continue
+            selected_index = 0
+            count = len(result.recipes)
+            if selected >= 0 and selected < count:
+                self.display_recipe(result.recipes[selected])
+                self._recipe_actions_menu(result.recipes[selected])
+                return
+            elif has_next and selected == count:
+                query.page += 1
+            elif has_previous and selected == count + int(has_next):
+                query.page -= 1
+            elif selected == count + int(has_next) + int(has_previous):
+                sort_menu = InteractiveMenu("Sort Order", [label for label, _, _ in SORT_OPTIONS])
+                sort_choice = sort_menu.run()
+                if sort_choice >= 0 and sort_choice < len(SORT_OPTIONS):
+                    _, query.sort_by, query.descending = SORT_OPTIONS[sort_choice]
+                    query.page = 1
+            else:
+                return
     
     def select_and_edit(self):
         """Select and edit a recipe"""
@@ -337,7 +651,8 @@ class RecipeController:
         form = InteractiveForm(f"Edit Recipe - {recipe.name}", fields)
         updated_data = form.run()
         
-        # Update recipe
+        # Update a copy, so the version being replaced goes into the history
+        recipe = replace(recipe)
         recipe.name = updated_data["name"]
         recipe.category = RecipeCategory(updated_data["category"])
         recipe.difficulty = updated_data["difficulty"]
@@ -374,7 +689,7 @@ class RecipeController:
         recipe = next((r for r in recipes if r.recipe_id == recipe_id), None)
         
         if recipe:
-            recipe.is_favorite = not recipe.is_favorite
+            recipe = replace(recipe, is_favorite=not recipe.is_favorite)
             if self.service.update_recipe(self.username, recipe_id, recipe):
                 status = "added to" if recipe.is_favorite else "removed from"
                 ConsoleManager.print_success(f"Recipe {status} favorites!")
@@ -390,10 +705,159 @@ class RecipeController:
             
             selected = menu.run()
             if selected >= 0:
-                recipe.rating = selected + 1
+                recipe = replace(recipe, rating=selected + 1)
                 if self.service.update_recipe(self.username, recipe_id, recipe):
                     ConsoleManager.print_success(f"Recipe rated {recipe.rating}/5 stars!")
     
+    def scale_recipe(self, recipe: Recipe):
+        """Display a recipe scaled to a different number of servings"""
+        try:
+            servings = int(input(f"\n{Color.BLUE}Number of servings:{Color.RESET} ").strip())
+        except ValueError:
+            ConsoleManager.print_error("Please enter a valid number!")
+            return
+        
+        if servings <= 0:
+            ConsoleManager.print_error("Servings must be greater than zero!")
+            return
+        
+        if not recipe.servings:
+            ConsoleManager.print_warning("Recipe has no serving count, assuming 1 serving.")
+        self.display_recipe(recipe.scaled(servings))
+    
+    def create_shopping_list(self):
+        """Combine the ingredients of several recipes into one shopping list"""
+        recipes = self.service.load_recipes(self.username)
+        if not recipes:
+            ConsoleManager.print_warning("No recipes found!")
+            return
+        
+        ConsoleManager.clear_screen()
+        ConsoleManager.print_header("🛒 Shopping List")
+        for i, recipe in enumerate(recipes, 1):
+            servings = f" - serves {recipe.servings}" if recipe.servings else ""
+            print(f"{Color.CYAN}{i}.{Color.RESET} {recipe.name}{servings}")
+        
+        choice = input(f"\n{Color.BLUE}Recipe numbers (comma-separated):{Color.RESET} ").strip()
+        selections = {}
+        for part in choice.split(","):
+            try:
+                index = int(part.strip()) - 1
+            except ValueError:
+                continue
+            if 0 <= index < len(recipes):
+                recipe = recipes[index]
+                servings = input(f"  Servings for {recipe.name} (Enter to keep): ").strip()
+                selections[recipe.recipe_id] = int(servings) if servings.isdigit() and int(servings) > 0 else None
+        
+        if not selections:
+            ConsoleManager.print_warning("No recipes selected!")
+            return
+        
+        items = self.shopping_lists.build(self.username, selections)
+        menu = InteractiveMenu("Shopping List Output", ["Show on Screen", "Text File", "CSV File"])
+        output = menu.run()
+        
+        if output == 0:
+            print(f"\n{Color.GREEN}{Color.BOLD}🛒 Shopping List:{Color.RESET}")
+            for item in items:
+                print(f"  • {item}")
+        elif output in (1, 2):
+            filename = input(f"\n{Color.BLUE}Filename (without extension):{Color.RESET} ").strip()
+            if not filename:
+                return
+            if output == 1:
+                success = self.shopping_lists.export_text(items, filename)
+            else:
+                success = self.shopping_lists.export_csv(items, filename)
+            if success:
+                ConsoleManager.print_success("Shopping list exported successfully!")
+            else:
+                ConsoleManager.print_error("Export failed!")
+    
+    def compute_nutrition(self, recipe_id: str):
+        """Compute nutritional info for a recipe from the nutrient table"""
+        recipes = self.service.load_recipes(self.username)
+        recipe = next((r for r in recipes if r.recipe_id == recipe_id), None)
+        
+        if recipe:
+            info = self.nutrition.compute(recipe)
+            if info is None:
+                ConsoleManager.print_warning("No ingredients found in the nutrient table!")
+                return
+            recipe = replace(recipe, nutritional_info=info)
+            if self.service.update_recipe(self.username, recipe_id, recipe):
+                ConsoleManager.print_success(f"Nutrition per serving: {info.calories} kcal, "
+                                             f"{info.protein}g protein, {info.carbs}g carbs, "
+                                             f"{info.fat}g fat, {info.fiber}g fiber")
+    
+    def compute_all_nutrition(self, overwrite: bool = False) -> int:
+        """Compute nutritional info for the whole collection"""
+        return self.nutrition.compute_collection(self.username, overwrite)
+    
+    def plan_meals(self):
+        """Build a week of breakfast, main course and dessert within daily budgets"""
+        from services.meal_plan_service import PlanConstraints
+        
+        print(f"\n{Color.CYAN}Leave any budget blank for no limit.{Color.RESET}")
+        constraints = PlanConstraints(
+            days=self._read_number("Days to plan (default 7)") or 7,
+            min_calories=self._read_number("Minimum calories per day"),
+            max_calories=self._read_number("Maximum calories per day"),
+            min_protein=self._read_number("Minimum protein per day (g)"),
+            max_total_time=self._read_number("Maximum cooking time per day (minutes)"),
+        )
+        
+        plan = self.meal_plans.plan_week(self.username, constraints)
+        if plan.skipped:
+            ConsoleManager.print_info(f"{plan.skipped} recipe(s) without nutrition info were left out "
+                                      "(use Settings > Compute Nutrition to include them)")
+        if not any(plan.days):
+            ConsoleManager.print_warning("No plan fits these budgets! Try relaxing them or adding "
+                                         f"{', '.join(c.value for c in constraints.slots)} recipes.")
+            return
+        
+        for number, day in enumerate(plan.days, 1):
+            print(f"\n{Color.BOLD}Day {number}{Color.RESET}")
+            if day is None:
+                print(f"  {Color.RED}No combination fits the budgets{Color.RESET}")
+                continue
+            for category, recipe in zip(constraints.slots, day.recipes):
+                print(f"  {category.value}: {recipe.name}")
+            print(f"  {Color.BLUE}{day.calories:.0f} kcal | {day.protein:.0f} g protein | {day.total_time} min{Color.RESET}")
+        
+        if not plan.optimal:
+            ConsoleManager.print_warning("Search stopped at the time limit; this is the best plan found so far.")
+    
+    def what_can_i_cook(self):
+        """Find recipes that can be made from the ingredients at hand"""
+        pantry_input = input(f"\n{Color.BLUE}🧺 What's in your pantry? (comma-separated):{Color.RESET} ").strip()
+        pantry = [item.strip() for item in pantry_input.split(",") if item.strip()]
+        if not pantry:
+            ConsoleManager.print_warning("Pantry cannot be empty!")
+            return
+        
+        missing_input = input(f"{Color.BLUE}Allow how many missing ingredients? (default 0):{Color.RESET} ").strip()
+        max_missing = int(missing_input) if missing_input.isdigit() else 0
+        
+        matches = self.pantry.what_can_i_cook(self.username, pantry, max_missing)
+        if not matches:
+            ConsoleManager.print_warning("No recipes match your pantry!")
+            return
+        
+        recipe_names = []
+        for match in matches:
+            label = f"{match.recipe.name} - {match.have}/{match.total} ingredients ({match.coverage:.0%})"
+            if match.missing:
+                label += f" | missing: {', '.join(match.missing)}"
+            recipe_names.append(label)
+        menu = InteractiveMenu("🍳 What Can I Cook?", recipe_names)
+        
+        selected = menu.run()
+        if selected >= 0 and selected < len(matches):
+            self.display_recipe(matches[selected].recipe)
+            self._recipe_actions_menu(matches[selected].recipe)
+    
     def show_statistics(self):
         """Display comprehensive recipe statistics"""
         stats = self.service.get_statistics(self.username)
@@ -421,6 +885,9 @@ class RecipeController:
     
     def export_recipes(self, format_choice: int, filename: str) -> bool:
         """Export recipes in various formats"""
+        import csv
+        import json
+        
         recipes = self.service.load_recipes(self.username)
         if not recipes:
             return False
@@ -457,6 +924,8 @@ class RecipeController:
     
     def import_recipes(self, filename: str) -> bool:
         """Import recipes from JSON file"""
+        import json
+        
         try:
             with open(filename, 'r', encoding='utf-8') as f:
                 data = json.load(f)
@@ -475,6 +944,78 @@ class RecipeController:
         backup_filename = f"backup_{self.username}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         return self.export_recipes(0, backup_filename)
     
+    def create_incremental_backup(self, full: bool = False) -> bool:
+        """Back up only the recipes changed or deleted since the last backup point"""
+        entry = self.backups.create_backup(self.username, full)
+        if entry is None:
+            return False
+        if entry["type"] == "full":
+            ConsoleManager.print_info(f"Full backup of {entry['total']} recipe(s) written.")
+        else:
+            ConsoleManager.print_info(f"Delta backup: {entry['changed']} changed, {entry['deleted']} deleted.")
+        return True
+    
+    def restore_backup(self) -> bool:
+        """Restore the collection to a chosen backup point"""
+        backups = self.backups.list_backups(self.username)
+        if not backups:
+            ConsoleManager.print_warning("No backups found!")
+            return False
+        
+        labels = [f"{entry['created_at'][:19].replace('T', ' ')} - {entry['type']} "
+                  f"({entry['total']} recipes)" for entry in reversed(backups)]
+        menu = InteractiveMenu("Restore Backup", labels)
+        selected = menu.run()
+        if selected < 0 or selected >= len(backups):
+            return False
+        
+        entry = backups[len(backups) - 1 - selected]
+        ConsoleManager.print_warning("This will replace your current recipes!")
+        if InteractiveMenu("Are you sure?", ["Yes, Restore", "No, Cancel"]).run() != 0:
+            return False
+        return self.backups.restore(self.username, entry["id"])
+    
+    def create_snapshot(self) -> bool:
+        """Store a deduplicated, compressed snapshot in the backup repository"""
+        manifest = self.backup_repository.snapshot(self.username)
+        if manifest is None:
+            return False
+        ConsoleManager.print_info(f"Snapshot of {len(manifest['recipes'])} recipe(s): "
+                                  f"{manifest['written_bytes']} new bytes stored "
+                                  f"for {manifest['logical_bytes']} bytes of recipes.")
+        return True
+    
+    def restore_snapshot(self) -> bool:
+        """Restore the collection from a repository snapshot"""
+        snapshots = self.backup_repository.list_snapshots(self.username)
+        if not snapshots:
+            ConsoleManager.print_warning("No snapshots found!")
+            return False
+        
+        labels = [f"{snapshot['created_at'][:19].replace('T', ' ')} ({len(snapshot['recipes'])} recipes)"
+                  for snapshot in reversed(snapshots)]
+        selected = InteractiveMenu("Restore Snapshot", labels).run()
+        if selected < 0 or selected >= len(snapshots):
+            return False
+        
+        ConsoleManager.print_warning("This will replace your current recipes!")
+        if InteractiveMenu("Are you sure?", ["Yes, Restore", "No, Cancel"]).run() != 0:
+            return False
+        return self.backup_repository.restore(self.username, snapshots[len(snapshots) - 1 - selected]["id"])
+    
+    def prune_snapshots(self, keep_last: int = 7, keep_daily: int = 30):
+        """Apply the retention policy, free unreferenced blobs and report space usage"""
+        removed = self.backup_repository.prune(self.username, keep_last, keep_daily)
+        collected = self.backup_repository.gc()
+        stats = self.backup_repository.stats()
+        
+        print(f"\n{Color.BLUE}🗄️ Backup Repository:{Color.RESET}")
+        print(f"  Snapshots Removed: {removed}")
+        print(f"  Blobs Freed: {collected['objects_removed']} ({collected['bytes_freed']} bytes)")
+        print(f"  Snapshots Kept: {stats['snapshots']} | Unique Recipes Stored: {stats['objects']}")
+        print(f"  Size as Plain Backups: {stats['logical_bytes']} bytes")
+        print(f"  Size on Disk: {stats['stored_bytes']} bytes (saved {stats['saved_bytes']} bytes)")
+    
     def show_advanced_statistics(self):
         """Show advanced recipe statistics and analytics"""
         recipes = self.service.load_recipes(self.username)
@@ -485,17 +1026,35 @@ class RecipeController:
         ConsoleManager.clear_screen()
         ConsoleManager.print_header("📈 Advanced Recipe Analytics")
         
-        # Time-based analysis
-        total_prep_time = sum(r.prep_time for r in recipes if r.prep_time)
-        total_cook_time = sum(r.cook_time for r in recipes if r.cook_time)
-        avg_prep_time = total_prep_time / len([r for r in recipes if r.prep_time]) if any(r.prep_time for r in recipes) else 0
-        avg_cook_time = total_cook_time / len([r for r in recipes if r.cook_time]) if any(r.cook_time for r in recipes) else 0
+        frame = self.analytics.get_frame(self.username)
         
+        # Time-based analysis
         print(f"\n{Color.BLUE}⏱️ Time Analysis:{Color.RESET}")
-        print(f"  Total Prep Time: {total_prep_time} minutes")
-        print(f"  Total Cook Time: {total_cook_time} minutes")
-        print(f"  Average Prep Time: {avg_prep_time:.1f} minutes")
-        print(f"  Average Cook Time: {avg_cook_time:.1f} minutes")
+        for column, label in (("prep_time", "Prep"), ("cook_time", "Cook")):
+            summary = frame.describe(column)
+            if not summary["count"]:
+                print(f"  {label} Time: no data")
+                continue
+            print(f"  Total {label} Time: {summary['sum']:.0f} minutes")
+            print(f"  Average {label} Time: {summary['mean']:.1f} minutes "
+                  f"(median {summary['p50']:.0f}, 90th percentile {summary['p90']:.0f})")
+            bins = frame.histogram(column, 5)
+            peak = max(count for _, _, count in bins)
+            for low, high, count in bins:
+                print(f"    {low:5.0f}-{high:<5.0f} {'█' * round(count * 30 / peak)} {count}")
+        
+        # Per-category aggregates
+        times = frame.group_by_category("prep_time")
+        ratings = frame.group_by_category("rating")
+        if times or ratings:
+            print(f"\n{Color.CYAN}🗂️ By Category:{Color.RESET}")
+            for category in RecipeCategory:
+                time_stats, rating_stats = times.get(category), ratings.get(category)
+                if not time_stats and not rating_stats:
+                    continue
+                prep = f"avg prep {time_stats['mean']:.0f} min" if time_stats else "no prep times"
+                rating = f"avg rating {rating_stats['mean']:.1f}/5" if rating_stats else "unrated"
+                print(f"  {category.value}: {prep}, {rating}")
         
         # Ingredient analysis
         all_ingredients = []
@@ -510,22 +1069,130 @@ class RecipeController:
             print(f"  • {ingredient.title()}: {count} recipes")
         
         # Rating analysis
-        rated_recipes = [r for r in recipes if r.rating]
-        if rated_recipes:
-            avg_rating = sum(r.rating for r in rated_recipes) / len(rated_recipes)
-            highest_rated = max(rated_recipes, key=lambda r: r.rating)
+        rating_summary = frame.describe("rating")
+        if rating_summary["count"]:
+            avg_rating = rating_summary["mean"]
+            highest_rated = self.service.top_recipes(self.username, "rating", 1)[0]
             
             print(f"\n{Color.YELLOW}⭐ Rating Analysis:{Color.RESET}")
             print(f"  Average Rating: {avg_rating:.1f}/5")
             print(f"  Highest Rated: {highest_rated.name} ({highest_rated.rating}/5)")
-            print(f"  Rated Recipes: {len(rated_recipes)}/{len(recipes)}")
+            print(f"  Rated Recipes: {rating_summary['count']}/{len(frame)}")
+            distribution = frame.rating_distribution()
+            for category in (c for c in RecipeCategory if c in distribution):
+                counts = distribution[category]
+                stars = " ".join(f"{star}★:{count}" for star, count in enumerate(counts, 1))
+                print(f"  {category.value}: {stars}")
+        
+        # Correlations between numeric fields
+        correlations = [(pair, value) for pair, value in frame.correlations().items() if value is not None]
+        if correlations:
+            print(f"\n{Color.BLUE}🔗 Correlations:{Color.RESET}")
+            for (first, second), value in correlations:
+                print(f"  {first.replace('_', ' ').title()} vs {second.replace('_', ' ').title()}: {value:+.2f}")
         
         # Recipe creation timeline
-        created_dates = [datetime.fromisoformat(r.created_at).date() for r in recipes]
-        date_counts = Counter(created_dates)
+        timeline = self.service.get_timeline(self.username)
+        busiest_day = timeline.busiest_day()
+        span = timeline.span()
+        
+        if busiest_day and span:
+            streaks = timeline.streaks()
+            print(f"\n{Color.PURPLE}📅 Creation Timeline:{Color.RESET}")
+            print(f"  Most Productive Day: {busiest_day[0]} ({busiest_day[1]} recipes)")
+            print(f"  Recipe Creation Span: {span[0]} to {span[1]}")
+            print(f"  Longest Streak: {streaks['longest']} day(s) | Current Streak: {streaks['current']} day(s)")
         
-        print(f"\n{Color.PURPLE}📅 Creation Timeline:{Color.RESET}")
-        print(f"  Most Productive Day: {max(date_counts, key=date_counts.get)} ({max(date_counts.values())} recipes)")
-        print(f"  Recipe Creation Span: {min(created_dates)} to {max(created_dates)}")
+        input(f"\n{Color.YELLOW}Press Enter to continue...{Color.RESET}")
+    
+    def find_duplicates(self):
+        """Report clusters of near-identical recipes and optionally merge them"""
+        ConsoleManager.print_info("Looking for near-duplicate recipes...")
+        clusters = self.duplicates.find_duplicates(self.username)
+        if not clusters:
+            ConsoleManager.print_success("No duplicate recipes found!")
+            return
         
-        input(f"\n{Color.YELLOW}Press Enter to continue...{Color.RESET}")
\ No newline at end of file
+        ConsoleManager.print_warning(f"Found {len(clusters)} group(s) of likely duplicates:")
+        for i, cluster in enumerate(clusters[:20], 1):
+            print(f"\n{i}. {Color.BOLD}{cluster.keep.name}{Color.RESET} (kept)")
+            for recipe in cluster.duplicates:
+                print(f"   ↳ {recipe.name} — {cluster.similarity[recipe.recipe_id]:.0%} similar")
+        if len(clusters) > 20:
+            print(f"\n   ... and {len(clusters) - 20} more group(s)")
+        
+        menu = InteractiveMenu("Merge Duplicates?", ["Merge All Groups", "Choose Groups One by One", "Keep Everything"])
+        choice = menu.run()
+        if choice == 0:  # All
+            selected = clusters
+        elif choice == 1:  # One by one
+            selected = []
+            for cluster in clusters:
+                names = ", ".join(recipe.name for recipe in cluster.duplicates)
+                answer = input(f"Merge {names} into '{cluster.keep.name}'? (y/N/q): ").strip().lower()
+                if answer == 'q':
+                    break
+                if answer == 'y':
+                    selected.append(cluster)
+        else:
+            return
+        
+        if not selected:
+            ConsoleManager.print_info("Nothing merged.")
+            return
+        removed = self.duplicates.merge(self.username, selected)
+        if removed is not None:
+            ConsoleManager.print_success(f"Merged {len(selected)} group(s), removing {removed} duplicate recipe(s)!")
+    
+    def show_timeline(self):
+        """Browse recipes by when they were added or changed"""
+        options = [
+            "Added in the Last 7 Days",
+            "Added in the Last 30 Days",
+            "Changed Since a Date...",
+            "Recipes Added per Week",
+            "Recipes Added per Month"
+        ]
+        menu = InteractiveMenu("📅 Recipe Timeline", options)
+        choice = menu.run()
+        
+        now = datetime.now()
+        if choice in (0, 1):
+            days = 7 if choice == 0 else 30
+            recipes = self.service.recipes_between(self.username, "created", now - timedelta(days=days))
+            self._show_recipe_list(f"Added in the Last {days} Days", recipes[::-1])
+        elif choice == 2:
+            value = input(f"\n{Color.BLUE}Since date (YYYY-MM-DD):{Color.RESET} ").strip()
+            try:
+                since = datetime.fromisoformat(value)
+            except ValueError:
+                ConsoleManager.print_error("Please enter a valid date!")
+                return
+            recipes = self.service.recipes_between(self.username, "updated", since)
+            self._show_recipe_list(f"Changed Since {since.date()}", recipes[::-1])
+        elif choice in (3, 4):
+            bucket = "week" if choice == 3 else "month"
+            histogram = self.service.get_timeline(self.username).histogram("created", bucket)
+            if not histogram:
+                ConsoleManager.print_warning("No recipes found!")
+                return
+            
+            peak = max(count for _, count in histogram)
+            print(f"\n{Color.PURPLE}📅 Recipes Added per {bucket.title()}:{Color.RESET}")
+            for label, count in histogram:
+                bar = "█" * max(1, round(count / peak * 40))
+                print(f"  {label:>10} {Color.CYAN}{bar}{Color.RESET} {count}")
+    
+    def _show_recipe_list(self, title: str, recipes: List[Recipe]):
+        """Show a list of recipes and open the selected one"""
+        if not recipes:
+            ConsoleManager.print_warning("No recipes found!")
+            return
+        
+        recipe_names = [f"{recipe.name} ({recipe.category.value})" for recipe in recipes]
+        menu = InteractiveMenu(title, recipe_names)
+        
+        selected = menu.run()
+        if selected >= 0 and selected < len(recipes):
+            self.display_recipe(recipes[selected])
+            self._recipe_actions_menu(recipes[selected])
\ No newline at end of file
@@ -1,13 +1,24 @@
 # main.py
 import re
 import os
+import signal
+import sys
 from controllers.recipe_controller import RecipeController
 from services.recipe_service import RecipeService
 from utils.console_utils import ConsoleManager, InteractiveMenu, Color
 
+# Edits are kept in memory and written at most this often (and on exit)
+AUTOSAVE_INTERVAL_MS = 500
+# Where collections are stored and how ("file", "dbm" or "memory")
+DATA_DIR = os.environ.get("RECIPE_DATA_DIR", "data")
+STORAGE_BACKEND = os.environ.get("RECIPE_STORAGE_BACKEND", "file")
+# Codec for newly written files ("gzip", "lzma" or "zlib"); unset keeps them plain
+COMPRESSION = os.environ.get("RECIPE_COMPRESSION") or None
+
 class RecipeApp:
     def __init__(self):
-        self.service = RecipeService()
+        self.service = RecipeService(DATA_DIR, write_behind_ms=AUTOSAVE_INTERVAL_MS,
+                                     compression=COMPRESSION, backend=STORAGE_BACKEND)
         self.controller = None
         self.username = None
     
@@ -50,8 +61,10 @@ class RecipeApp:
                     return self._create_account()
                 continue
             
+            # Parse and index the collection while the welcome prompt is shown
+            self.service.prefetch(username)
             self.username = username
-            self.controller = RecipeController(username)
+            self.controller = RecipeController(username, self.service)
             ConsoleManager.print_success(f"Welcome back, {username}!")
             input("Press Enter to continue...")
             return True
@@ -78,7 +91,7 @@ class RecipeApp:
             
             if self.service.create_user(username):
                 self.username = username
-                self.controller = RecipeController(username)
+                self.controller = RecipeController(username, self.service)
                 ConsoleManager.print_success(f"Account created successfully! Welcome, {username}!")
                 input("Press Enter to continue...")
                 return True
@@ -96,13 +109,19 @@ class RecipeApp:
     
     def run(self):
         """Main application loop"""
+        try:
+            self._run()
+        finally:
+            # Persist any edits still waiting in the autosave queue
+            self.service.close()
+    
+    def _run(self):
         # Display welcome message with interface info
         ConsoleManager.clear_screen()
         ConsoleManager.print_header("🍳 Professional Recipe Management System")
         
         # Detect and display interface mode
-        test_menu = InteractiveMenu("", [], show_back=False)
-        if test_menu.use_arrows:
+        if InteractiveMenu.arrow_keys_supported():
             ConsoleManager.print_info("✅ Arrow key navigation enabled")
         else:
             ConsoleManager.print_info("📟 Using number selection mode (arrow keys not available)")
@@ -116,7 +135,7 @@ class RecipeApp:
         while True:
             try:
                 choice = self._main_menu()
-                if choice == -1 or choice == 9:  # ESC or Exit
+                if choice == -1 or choice == 12:  # ESC or Exit
                     ConsoleManager.print_info("Thank you for using Recipe Management System!")
                     break
                 
@@ -137,9 +156,12 @@ class RecipeApp:
             "🔍 Search Recipes",
             "⭐ View Favorites",
             "🗂️ Browse by Category",
+            "🔎 Filter Recipes",
             "✏️ Edit Recipe",
             "🗑️ Delete Recipe",
             "📊 View Statistics",
+            "🍽️ Meal Planning",
+            "🌍 Global Catalog",
             "⚙️ Settings",
             "🚪 Exit"
         ]
@@ -159,18 +181,42 @@ class RecipeApp:
             self.controller.show_favorites()
         elif choice == 4:  # Browse by Category
             self.controller.browse_by_category()
-        elif choice == 5:  # Edit Recipe
+        elif choice == 5:  # Filter
+            self.controller.filter_recipes()
+        elif choice == 6:  # Edit Recipe
             self.controller.select_and_edit()
-        elif choice == 6:  # Delete Recipe
+        elif choice == 7:  # Delete Recipe
             self.controller.select_and_delete()
-        elif choice == 7:  # Statistics
+        elif choice == 8:  # Statistics
             self.controller.show_statistics()
-        elif choice == 8:  # Settings
+        elif choice == 9:  # Meal Planning
+            self._meal_planning_menu()
+        elif choice == 10:  # Global Catalog
+            self.controller.browse_catalog()
+        elif choice == 11:  # Settings
             self._settings_menu()
         
-        if choice not in [7, 8]:  # Don't pause after statistics or settings
+        if choice not in [8, 11]:  # Don't pause after statistics or settings
             input(f"\n{Color.YELLOW}Press Enter to continue...{Color.RESET}")
     
+    def _meal_planning_menu(self):
+        """Meal planning tools"""
+        planning_options = [
+            "🛒 Shopping List",
+            "🍳 What Can I Cook?",
+            "📅 Weekly Meal Plan"
+        ]
+        
+        menu = InteractiveMenu("Meal Planning", planning_options)
+        choice = menu.run()
+        
+        if choice == 0:  # Shopping List
+            self.controller.create_shopping_list()
+        elif choice == 1:  # Pantry
+            self.controller.what_can_i_cook()
+        elif choice == 2:  # Meal Plan
+            self.controller.plan_meals()
+    
     def _settings_menu(self):
         """Settings and advanced options"""
         settings_options = [
@@ -179,7 +225,10 @@ class RecipeApp:
             "🔄 Backup Data",
             "🗑️ Delete All Recipes",
             "👤 Change Username",
-            "📈 Advanced Statistics"
+            "📈 Advanced Statistics",
+            "🥗 Compute Nutrition",
+            "📅 Recipe Timeline",
+            "🧬 Find Duplicate Recipes"
         ]
         
         menu = InteractiveMenu("Settings", settings_options)
@@ -197,6 +246,13 @@ class RecipeApp:
             self._change_username()
         elif choice == 5:  # Advanced Stats
             self.controller.show_advanced_statistics()
+        elif choice == 6:  # Nutrition
+            self._compute_nutrition()
+        elif choice == 7:  # Timeline
+            self.controller.show_timeline()
+        elif choice == 8:  # Duplicates
+            self.controller.find_duplicates()
+            input(f"\n{Color.YELLOW}Press Enter to continue...{Color.RESET}")
     
     def _export_recipes(self):
         """Export recipes to various formats"""
@@ -230,11 +286,53 @@ class RecipeApp:
     
     def _backup_data(self):
         """Create backup of user data"""
-        if self.controller.create_backup():
+        backup_options = [
+            "Full Export (JSON file)",
+            "Incremental Backup",
+            "New Full Base Backup",
+            "Restore from Backup",
+            "Snapshot to Backup Repository",
+            "Restore from Snapshot",
+            "Prune Snapshots"
+        ]
+        
+        menu = InteractiveMenu("Backup Data", backup_options)
+        choice = menu.run()
+        
+        if choice == 0:
+            success = self.controller.create_backup()
+        elif choice in (1, 2):
+            success = self.controller.create_incremental_backup(full=choice == 2)
+        elif choice == 3:
+            if self.controller.restore_backup():
+                ConsoleManager.print_success("Backup restored successfully!")
+            return
+        elif choice == 4:
+            success = self.controller.create_snapshot()
+        elif choice == 5:
+            if self.controller.restore_snapshot():
+                ConsoleManager.print_success("Snapshot restored successfully!")
+            return
+        elif choice == 6:
+            self.controller.prune_snapshots()
+            return
+        else:
+            return
+        
+        if success:
             ConsoleManager.print_success("Backup created successfully!")
         else:
             ConsoleManager.print_error("Backup failed!")
     
+    def _compute_nutrition(self):
+        """Compute nutritional info for all recipes"""
+        menu = InteractiveMenu("Compute Nutrition", ["Only Recipes Without Nutrition", "Recompute All Recipes"])
+        choice = menu.run()
+        
+        if choice >= 0:
+            updated = self.controller.compute_all_nutrition(overwrite=choice == 1)
+            ConsoleManager.print_success(f"Nutritional info computed for {updated} recipe(s)!")
+    
     def _delete_all_recipes(self):
         """Delete all user recipes with confirmation"""
         ConsoleManager.print_warning("This will delete ALL your recipes!")
@@ -253,14 +351,16 @@ class RecipeApp:
         new_username = input(f"\n{Color.BLUE}New username:{Color.RESET} ").strip().lower()
         if self._validate_username(new_username) and not self.service.user_exists(new_username):
             # Copy data to new user file
+            self.service.flush(self.username)
             recipes = self.service.load_recipes(self.username)
             if self.service.save_recipes(new_username, recipes):
-                # Delete old user file
-                old_file = self.service.get_user_file(self.username)
-                os.remove(old_file)
+                # Delete old user's collection; history and similarity index move along
+                self.service.revisions.rename_user(self.username, new_username)
+                self.controller.recommendations.rename_user(self.username, new_username)
+                self.service.delete_user(self.username)
                 
                 self.username = new_username
-                self.controller = RecipeController(new_username)
+                self.controller = RecipeController(new_username, self.service)
                 ConsoleManager.print_success(f"Username changed to {new_username}!")
             else:
                 ConsoleManager.print_error("Failed to change username!")
@@ -269,6 +369,8 @@ class RecipeApp:
 
 if __name__ == "__main__":
     try:
+        # Turn SIGTERM into a normal exit so pending edits are flushed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
         app = RecipeApp()
         app.run()
     except Exception as e:
@@ -0,0 +1,201 @@
+# models/quantity.py
+import re
+from dataclasses import dataclass
+from enum import Enum
+from fractions import Fraction
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from models.recipe import canonical_name
+
+class Dimension(Enum):
+    MASS = "mass"
+    VOLUME = "volume"
+    COUNT = "count"
+
+@dataclass(frozen=True)
+class Quantity:
+    """Normalized ingredient quantity expressed in the base unit of its dimension"""
+    value: Optional[float]          # base-unit amount (lower bound for ranges)
+    dimension: Dimension
+    unit: str                       # 'g', 'ml', or the counted noun ('' for plain counts)
+    high: Optional[float] = None    # upper bound for ranges like "2-3"
+
+    @property
+    def is_known(self) -> bool:
+        return self.value is not None
+
+    @property
+    def mean(self) -> Optional[float]:
+        if self.value is None:
+            return None
+        if self.high is None:
+            return self.value
+        return (self.value + self.high) / 2
+
+    def scaled(self, factor: float) -> 'Quantity':
+        if self.value is None:
+            return self
+        high = self.high * factor if self.high is not None else None
+        return Quantity(self.value * factor, self.dimension, self.unit, high)
+
+# Base unit per dimension and the factor converting each alias into it
+BASE_UNITS = {Dimension.MASS: "g", Dimension.VOLUME: "ml"}
+
+UNIT_TABLE: Dict[str, Tuple[Dimension, float]] = {
+    # Mass (grams)
+    "mg": (Dimension.MASS, 0.001),
+    "g": (Dimension.MASS, 1.0),
+    "gr": (Dimension.MASS, 1.0),
+    "gram": (Dimension.MASS, 1.0),
+    "grams": (Dimension.MASS, 1.0),
+    "kg": (Dimension.MASS, 1000.0),
+    "kilo": (Dimension.MASS, 1000.0),
+    "kilogram": (Dimension.MASS, 1000.0),
+    "kilograms": (Dimension.MASS, 1000.0),
+    "oz": (Dimension.MASS, 28.3495),
+    "ounce": (Dimension.MASS, 28.3495),
+    "ounces": (Dimension.MASS, 28.3495),
+    "lb": (Dimension.MASS, 453.592),
+    "lbs": (Dimension.MASS, 453.592),
+    "pound": (Dimension.MASS, 453.592),
+    "pounds": (Dimension.MASS, 453.592),
+    # Volume (millilitres)
+    "ml": (Dimension.VOLUME, 1.0),
+    "milliliter": (Dimension.VOLUME, 1.0),
+    "milliliters": (Dimension.VOLUME, 1.0),
+    "millilitre": (Dimension.VOLUME, 1.0),
+    "millilitres": (Dimension.VOLUME, 1.0),
+    "cl": (Dimension.VOLUME, 10.0),
+    "dl": (Dimension.VOLUME, 100.0),
+    "l": (Dimension.VOLUME, 1000.0),
+    "liter": (Dimension.VOLUME, 1000.0),
+    "liters": (Dimension.VOLUME, 1000.0),
+    "litre": (Dimension.VOLUME, 1000.0),
+    "litres": (Dimension.VOLUME, 1000.0),
+    "tsp": (Dimension.VOLUME, 4.92892),
+    "teaspoon": (Dimension.VOLUME, 4.92892),
+    "teaspoons": (Dimension.VOLUME, 4.92892),
+    "tbsp": (Dimension.VOLUME, 14.7868),
+    "tablespoon": (Dimension.VOLUME, 14.7868),
+    "tablespoons": (Dimension.VOLUME, 14.7868),
+    "fl oz": (Dimension.VOLUME, 29.5735),
+    "cup": (Dimension.VOLUME, 236.588),
+    "cups": (Dimension.VOLUME, 236.588),
+    "pint": (Dimension.VOLUME, 473.176),
+    "pints": (Dimension.VOLUME, 473.176),
+    "quart": (Dimension.VOLUME, 946.353),
+    "quarts": (Dimension.VOLUME, 946.353),
+    "gallon": (Dimension.VOLUME, 3785.41),
+    "gallons": (Dimension.VOLUME, 3785.41),
+}
+
+UNICODE_FRACTIONS = {
+    "½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4",
+    "⅕": "1/5", "⅖": "2/5", "⅗": "3/5", "⅘": "4/5", "⅙": "1/6",
+    "⅚": "5/6", "⅛": "1/8", "⅜": "3/8", "⅝": "5/8", "⅞": "7/8",
+}
+
+_NUMBER = r"(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?)"
+_AMOUNT_RE = re.compile(rf"^\s*({_NUMBER})(?:\s*(?:-|–|to)\s*({_NUMBER}))?\s*$")
+
+def _parse_number(text: str) -> float:
+    total = Fraction(0)
+    for part in text.split():
+        total += Fraction(part.replace(",", "."))
+    return float(total)
+
+def _normalize_unit(unit: str) -> str:
+    return " ".join(unit.lower().replace(".", "").split())
+
+def singular_unit(unit: str) -> str:
+    """Normalized singular form of a counted unit: cloves -> clove, bunches -> bunch"""
+    return canonical_name(unit)
+
+@lru_cache(maxsize=65536)
+def parse_amount(amount: str) -> Optional[Tuple[float, Optional[float]]]:
+    """Parse an amount string into (low, high); high is None unless it is a range"""
+    if not amount:
+        return None
+    text = amount
+    for symbol, fraction in UNICODE_FRACTIONS.items():
+        # "1½" means "1 1/2", so keep the whole part separated
+        text = text.replace(symbol, f" {fraction}")
+    match = _AMOUNT_RE.match(text)
+    if not match:
+        return None
+    try:
+        low = _parse_number(match.group(1))
+        high = _parse_number(match.group(2)) if match.group(2) else None
+    except (ValueError, ZeroDivisionError):
+        # Matches the pattern but is no number, e.g. "1/0"
+        return None
+    return low, high
+
+@lru_cache(maxsize=4096)
+def parse_unit(unit: str) -> Tuple[Dimension, str, float]:
+    """Resolve a unit string to (dimension, canonical unit, factor to base unit)"""
+    key = _normalize_unit(unit)
+    if key in UNIT_TABLE:
+        dimension, factor = UNIT_TABLE[key]
+        return dimension, BASE_UNITS[dimension], factor
+    return Dimension.COUNT, key, 1.0
+
+@lru_cache(maxsize=65536)
+def parse_quantity(amount: str, unit: str = "") -> Quantity:
+    """Parse an ingredient amount and unit into a normalized Quantity.
+
+    Results are cached per distinct (amount, unit) pair, so large collections
+    only pay the parsing cost once for each unique value.
+    """
+    dimension, canonical, factor = parse_unit(unit or "")
+    parsed = parse_amount((amount or "").strip())
+    if parsed is None:
+        return Quantity(None, dimension, canonical)
+    low, high = parsed
+    return Quantity(low * factor, dimension, canonical,
+                    high * factor if high is not None else None)
+
+def convert(value: float, from_unit: str, to_unit: str) -> Optional[float]:
+    """Convert a value between two units of the same dimension"""
+    from_dim, _, from_factor = parse_unit(from_unit)
+    to_dim, _, to_factor = parse_unit(to_unit)
+    if from_dim != to_dim or from_dim == Dimension.COUNT:
+        return value if singular_unit(from_unit) == singular_unit(to_unit) else None
+    return value * from_factor / to_factor
+
+def format_number(value: float) -> str:
+    """Render a number using kitchen-friendly fractions where they are exact enough"""
+    whole = int(value)
+    fraction = Fraction(value - whole).limit_denominator(8)
+    if fraction == 1:
+        whole, fraction = whole + 1, Fraction(0)
+    if abs(whole + float(fraction) - value) < 0.01:
+        if fraction == 0:
+            return str(whole)
+        if whole == 0:
+            return f"{fraction.numerator}/{fraction.denominator}"
+        return f"{whole} {fraction.numerator}/{fraction.denominator}"
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+def format_amount(low: float, high: Optional[float] = None) -> str:
+    if high is None:
+        return format_number(low)
+    return f"{format_number(low)}-{format_number(high)}"
+
+def scale_amounts(amounts: Sequence[str], factor: float) -> List[str]:
+    """Scale a batch of amount strings by a common factor.
+
+    Each distinct amount is parsed and formatted once; amounts that cannot be
+    parsed ("a pinch", "to taste") are returned unchanged.
+    """
+    scaled: Dict[str, str] = {}
+    for amount in set(amounts):
+        parsed = parse_amount((amount or "").strip())
+        if parsed is None:
+            scaled[amount] = amount
+        else:
+            low, high = parsed
+            scaled[amount] = format_amount(low * factor,
+                                           high * factor if high is not None else None)
+    return [scaled[amount] for amount in amounts]
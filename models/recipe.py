@@ -1,8 +1,10 @@
 # models/recipe.py
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from datetime import datetime
 from typing import List, Dict, Optional
 from enum import Enum
+from functools import lru_cache
+import re
 import uuid
 
 class RecipeCategory(Enum):
@@ -15,6 +17,33 @@ class RecipeCategory(Enum):
     SNACK = "Snack"
     BREAKFAST = "Breakfast"
 
+# Plurals that dropping a trailing "s"/"es" gets wrong
+_IRREGULAR_PLURALS = {"leaves": "leaf", "loaves": "loaf", "halves": "half", "knives": "knife"}
+
+def _singular(word: str) -> str:
+    if word in _IRREGULAR_PLURALS:
+        return _IRREGULAR_PLURALS[word]
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("oes", "ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+@lru_cache(maxsize=65536)
+def canonical_name(name: str) -> str:
+    """Normalize an ingredient name so variants like 'Tomatoes ' and 'tomato' match.
+
+    Also used for counted units (cloves -> clove), so shopping-list merging
+    and ingredient matching singularize the same way
+    """
+    words = re.sub(r"[^\w\s-]", "", name.lower()).split()
+    if not words:
+        return ""
+    words[-1] = _singular(words[-1])
+    return " ".join(words)
+
 @dataclass
 class Ingredient:
     name: str
@@ -23,6 +52,10 @@ class Ingredient:
     
     def __str__(self) -> str:
         return f"{self.amount} {self.unit} {self.name}".strip()
+    
+    @property
+    def canonical_name(self) -> str:
+        return canonical_name(self.name)
 
 @dataclass
 class NutritionalInfo:
@@ -67,11 +100,30 @@ class Recipe:
             return self.prep_time + self.cook_time
         return self.prep_time or self.cook_time
     
+    def scaled(self, servings: int) -> 'Recipe':
+        """Return a copy of the recipe with ingredient amounts scaled to `servings`"""
+        from models.quantity import scale_amounts
+        
+        factor = servings / (self.servings or 1)
+        amounts = scale_amounts([ing.amount for ing in self.ingredients], factor)
+        ingredients = [Ingredient(name=ing.name, amount=amount, unit=ing.unit)
+                       for ing, amount in zip(self.ingredients, amounts)]
+        return replace(self, ingredients=ingredients, servings=servings)
+    
     def to_dict(self) -> Dict:
         data = asdict(self)
         data['category'] = self.category.value
         return data
     
+    @classmethod
+    def from_storage(cls, data: Dict) -> 'Recipe':
+        """Strict decoder for records already at the current schema version"""
+        data['category'] = RecipeCategory(data['category'])
+        data['ingredients'] = [Ingredient(**ing_data) for ing_data in data['ingredients']]
+        if data['nutritional_info'] is not None:
+            data['nutritional_info'] = NutritionalInfo(**data['nutritional_info'])
+        return cls(**data)
+    
     @classmethod
     def from_dict(cls, data: Dict) -> 'Recipe':
         # Handle category conversion
@@ -0,0 +1,195 @@
+# services/admin_service.py
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Import models
+from models.recipe import Recipe
+from services.migrations import upgrade
+from services.recipe_service import RecipeService
+from services.record_storage import read_document, is_framed, verify
+from services.recommendation_service import RecommendationService
+from services.storage_backends import FileBackend, LoadResult, create_backend
+
+def discover_users(data_dir: str, backend: str = "file") -> List[str]:
+    """All usernames with a collection in `data_dir` under the named backend"""
+    return create_backend(backend, data_dir).users()
+
+# Tasks run inside worker processes, so they are module-level functions; each
+# chunk of users shares one RecipeService built from the data directory and
+# backend name.
+
+def _check_records(result) -> Tuple[List[Dict], int]:
+    """Upgrade a framed file's document and report damaged or invalid records"""
+    document, version = upgrade(result.document)
+    errors = [f"damaged record at byte {offset}" for offset, _ in result.damaged]
+    ids = Counter()
+    for position, record in enumerate(document["recipes"]):
+        try:
+            recipe = Recipe.from_storage(dict(record))
+            ids[recipe.recipe_id] += 1
+        except Exception as e:
+            errors.append(f"record {position}: {e}")
+    errors.extend(f"duplicate recipe_id {rid} ({count}x)" for rid, count in ids.items() if count > 1)
+    if errors:
+        raise ValueError("; ".join(errors[:10]) + (f" (+{len(errors) - 10} more)" if len(errors) > 10 else ""))
+    return document["recipes"], version
+
+def _load_checked(service: RecipeService, username: str) -> LoadResult:
+    """Read-only load for backends without a framed file to inspect"""
+    if not service.backend.exists(username):
+        raise ValueError("no such user")
+    result = service.backend.load(username, repair=False)
+    if result.warnings:
+        raise ValueError("; ".join(result.warnings))
+    return result
+
+def validate_user(service: RecipeService, username: str) -> Dict[str, Any]:
+    """Check that a user's collection holds well-formed recipes with unique ids"""
+    if not isinstance(service.backend, FileBackend):
+        result = _load_checked(service, username)
+        return {"recipes": len(result.recipes), "outdated": int(result.needs_rewrite)}
+    result = read_document(service.get_user_file(username))
+    records, version = _check_records(result)
+    return {"recipes": len(records), "schema_versions": {str(version): 1}, "framed": int(result.framed)}
+
+def verify_user(service: RecipeService, username: str) -> Dict[str, Any]:
+    """Checksum every record of a framed user file without parsing it"""
+    if not isinstance(service.backend, FileBackend):
+        # Only file collections carry checksums; a full read is the closest check
+        return {"recipes": len(_load_checked(service, username).recipes)}
+    filename = service.get_user_file(username)
+    if not is_framed(filename):
+        return {"legacy_files": 1}
+    stats = verify(filename)
+    if stats["damaged"]:
+        raise ValueError(f"{stats['damaged']} of {stats['frames']} record(s) fail their checksum")
+    return stats
+
+# stats and reindex read with read_recipes: a regular load would repair or
+# migrate the collection, and report one that fails to load as empty
+
+def user_statistics(service: RecipeService, username: str) -> Dict[str, Any]:
+    return RecipeService.summarize(service.read_recipes(username))
+
+def reindex_user(service: RecipeService, username: str) -> Dict[str, Any]:
+    """Rebuild the persisted similar-recipe index"""
+    recipes = service.read_recipes(username)
+    RecommendationService(service).refresh(username, recipes)
+    return {"recipes": len(recipes)}
+
+def migrate_user(service: RecipeService, username: str) -> Dict[str, Any]:
+    """Upgrade a user's collection to the current schema version, if it is behind"""
+    validate_user(service, username)
+    outdated = service.backend.load(username, repair=False).needs_rewrite
+    # Loading an outdated collection migrates and rewrites it
+    recipes = service.load_recipes(username)
+    return {"recipes": len(recipes), "migrated": int(outdated)}
+
+TASKS: Dict[str, Callable[[RecipeService, str], Dict[str, Any]]] = {
+    "validate": validate_user,
+    "verify": verify_user,
+    "stats": user_statistics,
+    "reindex": reindex_user,
+    "migrate": migrate_user,
+}
+
+def _run_chunk(task_name: str, data_dir: str, backend: str, compression: Optional[str],
+               usernames: List[str]) -> List[Tuple[str, bool, Any]]:
+    """Run one task over a chunk of users; failures are captured per user"""
+    task = TASKS[task_name]
+    service = RecipeService(data_dir, compression=compression, backend=backend)
+    results = []
+    try:
+        for username in usernames:
+            try:
+                results.append((username, True, task(service, username)))
+            except Exception as e:
+                results.append((username, False, f"{type(e).__name__}: {e}"))
+    finally:
+        service.close()
+    return results
+
+@dataclass
+class AdminReport:
+    task: str
+    users: int = 0
+    results: Dict[str, Any] = field(default_factory=dict)
+    failures: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+    workers: int = 1
+
+    @property
+    def succeeded(self) -> int:
+        return len(self.results)
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals across users, e.g. global recipe and favorite counts"""
+        totals: Dict[str, Any] = {}
+        for result in self.results.values():
+            for key, value in result.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and key != "avg_rating":
+                    totals[key] = totals.get(key, 0) + value
+                elif isinstance(value, dict):
+                    merged = totals.setdefault(key, {})
+                    for name, count in value.items():
+                        merged[name] = merged.get(name, 0) + count
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"task": self.task, "users": self.users, "succeeded": self.succeeded,
+                "failed": len(self.failures), "workers": self.workers,
+                "elapsed_seconds": round(self.elapsed, 3), "summary": self.summary(),
+                "results": self.results, "failures": self.failures}
+
+class AdminService:
+    def __init__(self, data_dir: str = "data", workers: Optional[int] = None, chunk_size: int = 8,
+                 backend: str = "file", compression: Optional[str] = None):
+        self.data_dir = data_dir
+        # Backend name (see storage_backends.BACKENDS); workers open their own
+        self.backend = backend
+        # Codec for files a task rewrites, e.g. migrate
+        self.compression = compression
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+
+    def run(self, task_name: str, usernames: Optional[List[str]] = None) -> AdminReport:
+        """Fan a task out over all (or the given) users using a bounded process pool"""
+        if task_name not in TASKS:
+            raise ValueError(f"Unknown task: {task_name}")
+        # The same user twice would run the task twice on one collection
+        if usernames is None:
+            usernames = discover_users(self.data_dir, self.backend)
+        else:
+            usernames = list(dict.fromkeys(usernames))
+        report = AdminReport(task_name, users=len(usernames), workers=self.workers)
+        chunks = [usernames[i:i + self.chunk_size] for i in range(0, len(usernames), self.chunk_size)]
+
+        started = time.perf_counter()
+        if self.workers == 1 or len(chunks) <= 1:
+            outcomes = [_run_chunk(task_name, self.data_dir, self.backend, self.compression, chunk) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+                futures = {executor.submit(_run_chunk, task_name, self.data_dir, self.backend,
+                                           self.compression, chunk): chunk
+                           for chunk in chunks}
+                outcomes = []
+                for future in as_completed(futures):
+                    try:
+                        outcomes.append(future.result())
+                    except Exception as e:
+                        # A worker crash loses the whole chunk; report each user in it
+                        outcomes.append([(username, False, f"worker failed: {e}")
+                                         for username in futures[future]])
+
+        for username, ok, value in sorted((result for chunk in outcomes for result in chunk),
+                                          key=lambda result: result[0]):
+            if ok:
+                report.results[username] = value
+            else:
+                report.failures[username] = value
+        report.elapsed = time.perf_counter() - started
+        return report
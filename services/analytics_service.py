@@ -0,0 +1,154 @@
+# services/analytics_service.py
+import math
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# Import models
+from models.recipe import Recipe, RecipeCategory
+from services.recipe_service import RecipeService
+from services.timeline_index import to_epoch
+from utils.cache_utils import VersionedCache
+
+NAN = float("nan")
+
+# Category codes follow the declaration order of RecipeCategory
+CATEGORIES = list(RecipeCategory)
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+
+NUMERIC_COLUMNS = ("prep_time", "cook_time", "servings", "rating", "created")
+
+def _value(value) -> float:
+    return float(value) if value is not None else NAN
+
+class AnalyticsFrame:
+    """Column-oriented copy of a collection's numeric fields.
+
+    Each column is a typed array with one entry per recipe (NaN where the
+    value is missing), built in a single pass so every metric afterwards
+    works on flat machine values instead of walking Recipe objects.
+    """
+
+    def __init__(self, recipes: List[Recipe]):
+        self.size = len(recipes)
+        self.columns: Dict[str, array] = {name: array('d') for name in NUMERIC_COLUMNS}
+        self.category = array('B')
+        prep, cook, servings = self.columns["prep_time"], self.columns["cook_time"], self.columns["servings"]
+        rating, created = self.columns["rating"], self.columns["created"]
+        for recipe in recipes:
+            prep.append(_value(recipe.prep_time))
+            cook.append(_value(recipe.cook_time))
+            servings.append(_value(recipe.servings))
+            rating.append(_value(recipe.rating))
+            created.append(_value(to_epoch(recipe.created_at)))
+            self.category.append(CATEGORY_CODES[recipe.category])
+        self._sorted: Dict[str, List[float]] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def present(self, name: str) -> List[float]:
+        """Non-missing values of a column, in ascending order (cached)"""
+        values = self._sorted.get(name)
+        if values is None:
+            values = sorted(value for value in self.columns[name] if value == value)
+            self._sorted[name] = values
+        return values
+
+    @staticmethod
+    def _percentile(values: List[float], q: float) -> Optional[float]:
+        """Linear interpolation between closest ranks over sorted values"""
+        if not values:
+            return None
+        position = (len(values) - 1) * q / 100
+        low = math.floor(position)
+        high = min(low + 1, len(values) - 1)
+        return values[low] + (values[high] - values[low]) * (position - low)
+
+    def percentile(self, name: str, q: float) -> Optional[float]:
+        return self._percentile(self.present(name), q)
+
+    def describe(self, name: str, percentiles: Tuple[int, ...] = (25, 50, 75, 90)) -> Dict[str, Optional[float]]:
+        """Count, total, mean, spread and percentiles of one column"""
+        values = self.present(name)
+        summary: Dict[str, Optional[float]] = {"count": len(values), "missing": self.size - len(values)}
+        if not values:
+            summary.update(sum=0, mean=None, min=None, max=None, std=None)
+            return summary
+        total = math.fsum(values)
+        mean = total / len(values)
+        summary.update(sum=total, mean=mean, min=values[0], max=values[-1],
+                       std=math.sqrt(math.fsum((value - mean) ** 2 for value in values) / len(values)))
+        for q in percentiles:
+            summary[f"p{q}"] = self._percentile(values, q)
+        return summary
+
+    def histogram(self, name: str, bins: int = 6) -> List[Tuple[float, float, int]]:
+        """Equal-width bins over the column's range as (low, high, count); the last bin is closed"""
+        values = self.present(name)
+        if not values:
+            return []
+        low, high = values[0], values[-1]
+        if low == high:
+            return [(low, high, len(values))]
+        width = (high - low) / bins
+        counts = [0] * bins
+        for value in values:
+            counts[min(int((value - low) / width), bins - 1)] += 1
+        return [(low + i * width, low + (i + 1) * width, counts[i]) for i in range(bins)]
+
+    def group_by_category(self, name: str) -> Dict[RecipeCategory, Dict[str, float]]:
+        """Count, mean, min and max of a column per category (categories with no values are left out)"""
+        sums = [0.0] * len(CATEGORIES)
+        counts = [0] * len(CATEGORIES)
+        lows = [math.inf] * len(CATEGORIES)
+        highs = [-math.inf] * len(CATEGORIES)
+        for code, value in zip(self.category, self.columns[name]):
+            if value != value:
+                continue
+            sums[code] += value
+            counts[code] += 1
+            if value < lows[code]:
+                lows[code] = value
+            if value > highs[code]:
+                highs[code] = value
+        return {CATEGORIES[code]: {"count": counts[code], "mean": sums[code] / counts[code],
+                                   "min": lows[code], "max": highs[code]}
+                for code in range(len(CATEGORIES)) if counts[code]}
+
+    def rating_distribution(self) -> Dict[RecipeCategory, List[int]]:
+        """Per category, how many recipes were rated 1..5 stars"""
+        distribution: Dict[RecipeCategory, List[int]] = {}
+        for code, value in zip(self.category, self.columns["rating"]):
+            if value != value:
+                continue
+            stars = min(5, max(1, int(round(value))))
+            distribution.setdefault(CATEGORIES[code], [0] * 5)[stars - 1] += 1
+        return distribution
+
+    def correlation(self, first: str, second: str) -> Optional[float]:
+        """Pearson correlation over recipes where both values are present"""
+        pairs = [(x, y) for x, y in zip(self.columns[first], self.columns[second]) if x == x and y == y]
+        if len(pairs) < 2:
+            return None
+        mean_x = math.fsum(x for x, _ in pairs) / len(pairs)
+        mean_y = math.fsum(y for _, y in pairs) / len(pairs)
+        covariance = math.fsum((x - mean_x) * (y - mean_y) for x, y in pairs)
+        spread_x = math.fsum((x - mean_x) ** 2 for x, _ in pairs)
+        spread_y = math.fsum((y - mean_y) ** 2 for _, y in pairs)
+        if not spread_x or not spread_y:
+            return None
+        return covariance / math.sqrt(spread_x * spread_y)
+
+    def correlations(self, columns: Tuple[str, ...] = ("prep_time", "cook_time", "servings", "rating")
+                     ) -> Dict[Tuple[str, str], Optional[float]]:
+        return {(first, second): self.correlation(first, second)
+                for i, first in enumerate(columns) for second in columns[i + 1:]}
+
+class AnalyticsService:
+    def __init__(self, recipe_service: RecipeService):
+        self.recipe_service = recipe_service
+        self._frames = VersionedCache()
+
+    def get_frame(self, username: str) -> AnalyticsFrame:
+        return self._frames.fetch(username, self.recipe_service.get_version(username),
+                                  lambda: AnalyticsFrame(self.recipe_service.load_recipes(username)))
@@ -0,0 +1,155 @@
+# services/autocomplete_service.py
+import heapq
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Import models
+from models.recipe import Recipe, canonical_name
+from services.recipe_service import RecipeService
+from utils.cache_utils import VersionedCache
+
+def _plain_key(text: str) -> str:
+    return " ".join(text.lower().split())
+
+class _Node:
+    __slots__ = ("children", "count", "spellings", "top")
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.count = 0
+        self.spellings: Optional[Counter] = None
+        # Cached best (count, key) pairs of this subtree; None means stale
+        self.top: Optional[List[Tuple[int, str]]] = []
+
+class CompletionTrie:
+    """Prefix trie of normalized terms weighted by how often they are used.
+
+    Every node caches the top-k terms of its subtree, so a lookup is a walk
+    down the prefix plus a read of that cache. Increments update the caches
+    on the path in place; decrements mark them stale and they are rebuilt
+    from the children's caches on the next lookup that reaches them.
+    """
+
+    def __init__(self, normalize: Callable[[str], str] = _plain_key, k: int = 8):
+        self.normalize = normalize
+        self.k = k
+        self.root = _Node()
+
+    def _path(self, key: str, create: bool) -> Optional[List[_Node]]:
+        node = self.root
+        path = [node]
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = _Node()
+            node = child
+            path.append(node)
+        return path
+
+    def add(self, text: str, delta: int = 1):
+        """Count one more (or, with a negative delta, fewer) use of `text`"""
+        key = self.normalize(text)
+        if not key:
+            return
+        path = self._path(key, create=delta > 0)
+        if path is None:
+            return
+        leaf = path[-1]
+        if leaf.spellings is None:
+            leaf.spellings = Counter()
+        spelling = " ".join(text.split())
+        leaf.spellings[spelling] += delta
+        if leaf.spellings[spelling] <= 0:
+            del leaf.spellings[spelling]
+        leaf.count = max(0, leaf.count + delta)
+
+        for node in path:
+            if delta < 0 or node.top is None:
+                node.top = None
+                continue
+            entries = [entry for entry in node.top if entry[1] != key]
+            entries.append((leaf.count, key))
+            entries.sort(key=lambda entry: (-entry[0], entry[1]))
+            node.top = entries[:self.k]
+
+    def _top(self, node: _Node, key: str) -> List[Tuple[int, str]]:
+        if node.top is None:
+            candidates = [(node.count, key)] if node.count else []
+            for char, child in node.children.items():
+                candidates.extend(self._top(child, key + char))
+            node.top = heapq.nsmallest(self.k, candidates, key=lambda entry: (-entry[0], entry[1]))
+        return node.top
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """Most used terms starting with `prefix`, in their most common spelling"""
+        # Normalizing may turn a half-typed word into something that is no
+        # longer a prefix (e.g. a trailing "s"), so also try the plain form
+        for key in dict.fromkeys((self.normalize(prefix), _plain_key(prefix))):
+            path = self._path(key, create=False)
+            if path is not None:
+                top = self._top(path[-1], key)
+                if top:
+                    return [self.spelling(term) for _, term in top[:limit or self.k]]
+        return []
+
+    def spelling(self, key: str) -> str:
+        path = self._path(key, create=False)
+        if path is None or not path[-1].spellings:
+            return key
+        return path[-1].spellings.most_common(1)[0][0]
+
+    def canonical(self, text: str) -> str:
+        """The established spelling of `text` if it is already known, otherwise `text` itself"""
+        key = self.normalize(text)
+        path = self._path(key, create=False) if key else None
+        if path is None or not path[-1].count:
+            return " ".join(text.split())
+        return self.spelling(key)
+
+class AutocompleteIndex:
+    """Completion tries for one user's ingredient names, units and tags"""
+
+    def __init__(self, recipes: List[Recipe] = ()):
+        self.ingredients = CompletionTrie(canonical_name)
+        self.units = CompletionTrie()
+        self.tags = CompletionTrie()
+        for recipe in recipes:
+            self.add_recipe(recipe)
+
+    def add_recipe(self, recipe: Recipe, delta: int = 1):
+        for ingredient in recipe.ingredients:
+            self.ingredients.add(ingredient.name, delta)
+            if ingredient.unit:
+                self.units.add(ingredient.unit, delta)
+        for tag in recipe.tags:
+            self.tags.add(tag, delta)
+
+    def remove_recipe(self, recipe: Recipe):
+        self.add_recipe(recipe, -1)
+
+class AutocompleteService:
+    def __init__(self, recipe_service: RecipeService):
+        self.recipe_service = recipe_service
+        self._indexes = VersionedCache()
+        recipe_service.add_listener(self.record_changes)
+
+    def get_index(self, username: str) -> AutocompleteIndex:
+        return self._indexes.fetch(username, self.recipe_service.get_version(username),
+                                   lambda: AutocompleteIndex(self.recipe_service.load_recipes(username)))
+
+    def record_changes(self, username: str, previous_version: Optional[tuple], version: Optional[tuple],
+                       changes: Dict[str, Tuple[Optional[Recipe], Optional[Recipe]]]):
+        """Patch a live index for added, edited and removed recipes instead of rebuilding it.
+
+        Registered with the recipe service, so edits from other sessions are
+        applied the same way
+        """
+        def apply(index: AutocompleteIndex):
+            for old, new in changes.values():
+                if old is not None:
+                    index.remove_recipe(old)
+                if new is not None:
+                    index.add_recipe(new)
+        self._indexes.patch(username, previous_version, version, apply)
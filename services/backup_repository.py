@@ -0,0 +1,243 @@
+# services/backup_repository.py
+import hashlib
+import json
+import lzma
+import os
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+# Import models
+from models.recipe import Recipe
+from services.migrations import CURRENT_SCHEMA_VERSION, decode, upgrade_records
+from services.recipe_service import RecipeService
+from services.record_storage import atomic_write
+from utils.console_utils import ConsoleManager
+
+COMPRESSORS = {
+    "zlib": (".z", lambda data: zlib.compress(data, 9), zlib.decompress),
+    "lzma": (".xz", lzma.compress, lzma.decompress),
+}
+
+# Blobs written (or reused) more recently than this are never collected: a
+# snapshot stores its blobs before the manifest that references them
+GC_GRACE_SECONDS = 3600
+
+def canonical_json(recipe: Recipe) -> bytes:
+    """Stable serialization, so identical recipes always hash the same"""
+    return json.dumps(recipe.to_dict(), sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+
+class BackupRepository:
+    """Content-addressed backup store shared by all users.
+
+    Every recipe is stored once as a compressed blob under objects/<xx>/<sha256>,
+    and each snapshot is a small manifest listing the hashes it contains, so
+    unchanged recipes cost nothing in later snapshots. The repository lives
+    in backups/repository inside the data directory by default.
+    """
+
+    def __init__(self, recipe_service: RecipeService, root: Optional[str] = None,
+                 compression: str = "zlib"):
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.recipe_service = recipe_service
+        self.root = root or os.path.join(recipe_service.data_dir, "backups", "repository")
+        self.compression = compression
+
+    def _object_path(self, digest: str, compression: Optional[str] = None) -> str:
+        extension = COMPRESSORS[compression or self.compression][0]
+        return os.path.join(self.root, "objects", digest[:2], digest + extension)
+
+    def _snapshot_dir(self, username: str) -> str:
+        return os.path.join(self.root, "snapshots", username)
+
+    def _find_object(self, digest: str) -> Optional[str]:
+        for compression in COMPRESSORS:
+            path = self._object_path(digest, compression)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _put(self, data: bytes) -> Tuple[str, int]:
+        """Store a blob unless it already exists; returns (digest, bytes written)"""
+        digest = hashlib.sha256(data).hexdigest()
+        existing = self._find_object(digest)
+        if existing:
+            # Reused blobs restart the grace period, so gc() cannot take one
+            # away before this snapshot's manifest is written
+            os.utime(existing)
+            return digest, 0
+        path = self._object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = COMPRESSORS[self.compression][1](data)
+        with atomic_write(path) as f:
+            f.write(compressed)
+        return digest, len(compressed)
+
+    def _get(self, digest: str) -> bytes:
+        path = self._find_object(digest)
+        if path is None:
+            raise FileNotFoundError(f"Missing backup object {digest}")
+        decompress = next(codec[2] for codec in COMPRESSORS.values() if path.endswith(codec[0]))
+        with open(path, 'rb') as f:
+            data = decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Backup object {digest} is corrupted")
+        return data
+
+    def snapshot(self, username: str) -> Optional[Dict]:
+        """Store the user's current collection and return the snapshot manifest"""
+        try:
+            # A failed load must not become an empty snapshot
+            recipes = self.recipe_service.read_recipes(username)
+        except Exception as e:
+            ConsoleManager.print_error(f"Backup aborted, the collection could not be read: {e}")
+            return None
+        now = datetime.now()
+        hashes = []
+        logical_bytes = written_bytes = 0
+        try:
+            for recipe in recipes:
+                data = canonical_json(recipe)
+                digest, written = self._put(data)
+                hashes.append(digest)
+                logical_bytes += len(data)
+                written_bytes += written
+
+            manifest = {"id": now.strftime('%Y%m%d_%H%M%S_%f'), "username": username,
+                        "created_at": now.isoformat(), "schema_version": CURRENT_SCHEMA_VERSION,
+                        "recipes": hashes,
+                        "logical_bytes": logical_bytes, "written_bytes": written_bytes}
+            os.makedirs(self._snapshot_dir(username), exist_ok=True)
+            path = os.path.join(self._snapshot_dir(username), f"{manifest['id']}.json")
+            with atomic_write(path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            return manifest
+        except OSError as e:
+            ConsoleManager.print_error(f"Backup error: {e}")
+            return None
+
+    def list_snapshots(self, username: str, strict: bool = False) -> List[Dict]:
+        """Snapshot manifests, oldest first; unreadable ones are skipped, or raise ValueError if `strict`"""
+        directory = self._snapshot_dir(username)
+        if not os.path.isdir(directory):
+            return []
+        snapshots = []
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".json"):
+                try:
+                    with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                        snapshot = json.load(f)
+                    if not isinstance(snapshot.get("recipes"), list):
+                        raise ValueError("no recipe list")
+                    snapshots.append(snapshot)
+                except (OSError, ValueError, AttributeError) as e:
+                    if strict:
+                        raise ValueError(f"{os.path.join(directory, filename)}: {e}") from e
+                    continue
+        return snapshots
+
+    def _usernames(self) -> List[str]:
+        snapshot_root = os.path.join(self.root, "snapshots")
+        if not os.path.isdir(snapshot_root):
+            return []
+        return sorted(name for name in os.listdir(snapshot_root)
+                      if os.path.isdir(os.path.join(snapshot_root, name)))
+
+    def _object_dirs(self) -> List[str]:
+        object_root = os.path.join(self.root, "objects")
+        if not os.path.isdir(object_root):
+            return []
+        return [os.path.join(object_root, prefix) for prefix in sorted(os.listdir(object_root))
+                if os.path.isdir(os.path.join(object_root, prefix))]
+
+    def load_snapshot(self, username: str, snapshot_id: str) -> Optional[List[Recipe]]:
+        path = os.path.join(self._snapshot_dir(username), f"{snapshot_id}.json")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            records = [json.loads(self._get(digest)) for digest in manifest["recipes"]]
+            # Snapshots from before schema stamping hold plain to_dict() records
+            return decode({"recipes": upgrade_records(records, manifest.get("schema_version", 1))})
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            ConsoleManager.print_error(f"Snapshot cannot be read: {e}")
+            return None
+
+    def restore(self, username: str, snapshot_id: str) -> bool:
+        """Replace the user's collection with a snapshot; every recipe it changes gets a revision"""
+        recipes = self.load_snapshot(username, snapshot_id)
+        if recipes is None:
+            return False
+        return self.recipe_service.replace_recipes(username, recipes)
+
+    def prune(self, username: str, keep_last: int = 7, keep_daily: int = 30) -> int:
+        """Drop old snapshots, keeping the newest `keep_last` plus one per day for `keep_daily` days.
+
+        Returns the number of snapshots removed; run gc() afterwards to free blobs.
+        """
+        snapshots = self.list_snapshots(username)
+        keep: Set[str] = {snapshot["id"] for snapshot in snapshots[-keep_last:]} if keep_last > 0 else set()
+        seen_days: Set[str] = set()
+        for snapshot in reversed(snapshots):
+            day = snapshot["created_at"][:10]
+            if day not in seen_days and len(seen_days) < keep_daily:
+                seen_days.add(day)
+                keep.add(snapshot["id"])
+
+        removed = 0
+        for snapshot in snapshots:
+            if snapshot["id"] not in keep:
+                os.remove(os.path.join(self._snapshot_dir(username), f"{snapshot['id']}.json"))
+                removed += 1
+        return removed
+
+    def gc(self) -> Dict[str, int]:
+        """Delete blobs that no snapshot of any user references.
+
+        Nothing is deleted if any snapshot manifest cannot be read, since the
+        blobs it references would be lost for good. Blobs younger than
+        GC_GRACE_SECONDS are kept for snapshots still being written.
+        """
+        referenced: Set[str] = set()
+        try:
+            for username in self._usernames():
+                for snapshot in self.list_snapshots(username, strict=True):
+                    referenced.update(snapshot["recipes"])
+        except ValueError as e:
+            ConsoleManager.print_error(f"Garbage collection skipped, unreadable snapshot {e}")
+            return {"objects_removed": 0, "bytes_freed": 0}
+
+        removed = freed = 0
+        cutoff = time.time() - GC_GRACE_SECONDS
+        for directory in self._object_dirs():
+            for filename in os.listdir(directory):
+                digest = filename.split(".", 1)[0]
+                path = os.path.join(directory, filename)
+                if digest in referenced or os.path.getmtime(path) > cutoff:
+                    continue
+                freed += os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+        return {"objects_removed": removed, "bytes_freed": freed}
+
+    def stats(self) -> Dict[str, int]:
+        """Compare the size of all snapshots as plain JSON with what is actually on disk"""
+        logical = snapshots = 0
+        stored = 0
+        for username in self._usernames():
+            for snapshot in self.list_snapshots(username):
+                snapshots += 1
+                logical += snapshot.get("logical_bytes", 0)
+            for filename in os.listdir(self._snapshot_dir(username)):
+                stored += os.path.getsize(os.path.join(self._snapshot_dir(username), filename))
+
+        objects = 0
+        for directory in self._object_dirs():
+            for filename in os.listdir(directory):
+                objects += 1
+                stored += os.path.getsize(os.path.join(directory, filename))
+
+        return {"snapshots": snapshots, "objects": objects, "logical_bytes": logical,
+                "stored_bytes": stored, "saved_bytes": max(0, logical - stored)}
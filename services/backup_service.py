@@ -0,0 +1,170 @@
+# services/backup_service.py
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Import models
+from models.recipe import Recipe
+from services.migrations import CURRENT_SCHEMA_VERSION, decode, upgrade_records
+from services.recipe_service import RecipeService
+from services.record_storage import atomic_write
+from utils.console_utils import ConsoleManager
+
+class BackupService:
+    """Incremental backups: one full base followed by deltas of changed/deleted recipes.
+
+    Each user gets backups/incremental/<username>/manifest.json inside the
+    data directory, which lists every backup point in order and remembers a
+    content hash of every recipe at the last point. A delta stores only
+    recipes whose hash differs from that state plus tombstones for recipes
+    that disappeared, so a change is caught even when its writer did not
+    bump updated_at.
+    """
+
+    # Version 1 states held updated_at values; the first delta after an
+    # upgrade then simply contains every recipe
+    MANIFEST_VERSION = 2
+
+    def __init__(self, recipe_service: RecipeService, backup_dir: Optional[str] = None):
+        self.recipe_service = recipe_service
+        # A root of its own, so no username can collide with the snapshot
+        # repository in backups/repository
+        self.backup_dir = backup_dir or os.path.join(recipe_service.data_dir, "backups", "incremental")
+        # Chains used to sit directly in backups/<username>
+        self._legacy_dir = None if backup_dir else os.path.join(recipe_service.data_dir, "backups")
+
+    def get_user_dir(self, username: str) -> str:
+        user_dir = os.path.join(self.backup_dir, username)
+        if self._legacy_dir is not None and not os.path.isdir(user_dir):
+            self._adopt_legacy(username, user_dir)
+        return user_dir
+
+    def _adopt_legacy(self, username: str, user_dir: str) -> None:
+        """Move a chain from the old backups/<username> location into place"""
+        legacy_dir = os.path.join(self._legacy_dir, username)
+        try:
+            with open(os.path.join(legacy_dir, "manifest.json"), 'r', encoding='utf-8') as f:
+                owner = json.load(f).get("username")
+        except (OSError, ValueError, AttributeError):
+            return
+        # Only a chain whose manifest names this user; never the repository
+        if owner != username:
+            return
+        try:
+            os.makedirs(self.backup_dir, exist_ok=True)
+            os.replace(legacy_dir, user_dir)
+        except OSError as e:
+            ConsoleManager.print_warning(f"Could not move old backups from {legacy_dir}: {e}")
+
+    def get_manifest_file(self, username: str) -> str:
+        return os.path.join(self.get_user_dir(username), "manifest.json")
+
+    def load_manifest(self, username: str) -> Dict:
+        filename = self.get_manifest_file(username)
+        if os.path.exists(filename):
+            try:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                ConsoleManager.print_error(f"Backup manifest is unreadable: {e}")
+        return {"version": self.MANIFEST_VERSION, "username": username, "backups": [], "state": {}}
+
+    def _write_json(self, filename: str, data) -> None:
+        # Write to a temporary file first so an interrupted backup never
+        # leaves a half-written manifest behind
+        with atomic_write(filename, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    @staticmethod
+    def content_hash(data: Dict) -> str:
+        return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def list_backups(self, username: str) -> List[Dict]:
+        return self.load_manifest(username)["backups"]
+
+    def create_backup(self, username: str, full: bool = False) -> Optional[Dict]:
+        """Record a backup point; a full base is written when none exists yet or `full` is set.
+
+        Returns the manifest entry of the new backup, or None on failure.
+        """
+        manifest = self.load_manifest(username)
+        try:
+            # A failed load must not become a delta that deletes every recipe
+            records = [recipe.to_dict() for recipe in self.recipe_service.read_recipes(username)]
+        except Exception as e:
+            ConsoleManager.print_error(f"Backup aborted, the collection could not be read: {e}")
+            return None
+        state = {data["recipe_id"]: self.content_hash(data) for data in records}
+        previous = manifest["state"]
+        full = full or not manifest["backups"]
+
+        now = datetime.now()
+        backup_id = now.strftime('%Y%m%d_%H%M%S_%f')
+        if full:
+            payload = {"type": "full", "schema_version": CURRENT_SCHEMA_VERSION, "recipes": records}
+            changed, deleted = len(records), 0
+        else:
+            changed_records = [data for data in records if previous.get(data["recipe_id"]) != state[data["recipe_id"]]]
+            deleted_ids = sorted(set(previous) - set(state))
+            payload = {"type": "delta", "parent": manifest["backups"][-1]["id"],
+                       "schema_version": CURRENT_SCHEMA_VERSION, "recipes": changed_records,
+                       "deleted": deleted_ids}
+            changed, deleted = len(changed_records), len(deleted_ids)
+
+        filename = f"{backup_id}_{payload['type']}.json"
+        entry = {"id": backup_id, "type": payload["type"], "file": filename,
+                 "created_at": now.isoformat(), "changed": changed, "deleted": deleted,
+                 "total": len(records)}
+        try:
+            os.makedirs(self.get_user_dir(username), exist_ok=True)
+            self._write_json(os.path.join(self.get_user_dir(username), filename), payload)
+            manifest["backups"].append(entry)
+            manifest["state"] = state
+            manifest["version"] = self.MANIFEST_VERSION
+            self._write_json(self.get_manifest_file(username), manifest)
+            return entry
+        except OSError as e:
+            ConsoleManager.print_error(f"Backup error: {e}")
+            return None
+
+    def rebuild(self, username: str, backup_id: str) -> Optional[List[Recipe]]:
+        """Reconstruct the collection as of a backup point from its base plus deltas"""
+        backups = self.list_backups(username)
+        position = next((i for i, entry in enumerate(backups) if entry["id"] == backup_id), None)
+        if position is None:
+            return None
+        base = max((i for i in range(position + 1) if backups[i]["type"] == "full"), default=None)
+        if base is None:
+            return None
+
+        recipes: Dict[str, Dict] = {}
+        try:
+            for entry in backups[base:position + 1]:
+                with open(os.path.join(self.get_user_dir(username), entry["file"]), 'r', encoding='utf-8') as f:
+                    payload = json.load(f)
+                # Payloads from before schema stamping hold plain to_dict() records
+                records = upgrade_records(payload["recipes"], payload.get("schema_version", 1))
+                if payload["type"] == "full":
+                    recipes = {data["recipe_id"]: data for data in records}
+                    continue
+                for recipe_id in payload["deleted"]:
+                    recipes.pop(recipe_id, None)
+                for data in records:
+                    recipes[data["recipe_id"]] = data
+            return decode({"recipes": list(recipes.values())})
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            ConsoleManager.print_error(f"Backup chain is damaged: {e}")
+            return None
+
+    def restore(self, username: str, backup_id: str) -> bool:
+        """Replace the user's collection with the state at a backup point.
+
+        Each recipe the restore changes gets a revision, so it can be undone
+        from the recipe's history
+        """
+        recipes = self.rebuild(username, backup_id)
+        if recipes is None:
+            return False
+        return self.recipe_service.replace_recipes(username, recipes)
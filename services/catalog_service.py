@@ -0,0 +1,213 @@
+# services/catalog_service.py
+import json
+import os
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Set
+
+# Import models
+from models.recipe import Recipe, RecipeCategory
+from services.migrations import SchemaError
+from services.record_storage import atomic_write
+from services.storage_backends import FileBackend, StorageBackend, StorageError
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+@dataclass
+class CatalogEntry:
+    """Read-only summary of one recipe in the global catalog"""
+    username: str
+    recipe_id: str
+    name: str
+    category: str
+    tags: List[str] = field(default_factory=list)
+    ingredients: List[str] = field(default_factory=list)
+    rating: Optional[float] = None
+    total_time: Optional[int] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.username}/{self.recipe_id}"
+
+    @classmethod
+    def from_recipe(cls, username: str, recipe: Recipe) -> 'CatalogEntry':
+        return cls(username, recipe.recipe_id, recipe.name, recipe.category.value, list(recipe.tags),
+                   [ingredient.name for ingredient in recipe.ingredients], recipe.rating, recipe.total_time)
+
+    def terms(self) -> Set[str]:
+        words = tokenize(self.name)
+        for text in self.tags + self.ingredients:
+            words.extend(tokenize(text))
+        return set(words)
+
+class GlobalCatalog:
+    """Searchable index over every user's recipes, kept in data/catalog.json.
+
+    A refresh only asks the storage backend for each user's version and
+    re-reads those that changed since the last pass; searches and category
+    browsing are answered from the inverted index without touching them.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, data_dir: str = "data", filename: str = "catalog.json",
+                 backend: Optional[StorageBackend] = None):
+        self.data_dir = data_dir
+        self.backend = backend if backend is not None else FileBackend(data_dir)
+        self.path = os.path.join(data_dir, filename)
+        self.versions: Dict[str, tuple] = {}
+        self.entries: Dict[str, CatalogEntry] = {}
+        self.by_user: Dict[str, List[str]] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        self.categories: Dict[str, Set[str]] = {}
+        self.errors: Dict[str, str] = {}
+        self._terms: Optional[List[str]] = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Versions from another backend mean nothing to this one
+        if data.get("version") != self.FORMAT_VERSION or data.get("backend", "file") != self.backend.name:
+            return
+        for username, user in data.get("users", {}).items():
+            self.versions[username] = tuple(user["version"])
+            self._add_user(username, [CatalogEntry(**entry) for entry in user["recipes"]])
+
+    def _save(self):
+        users = {username: {"version": list(version),
+                            "recipes": [asdict(self.entries[key]) for key in self.by_user.get(username, [])]}
+                 for username, version in self.versions.items()}
+        with atomic_write(self.path, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.FORMAT_VERSION, "backend": self.backend.name, "users": users}, f,
+                      ensure_ascii=False)
+
+    def _add_user(self, username: str, entries: List[CatalogEntry]):
+        keys = []
+        for entry in entries:
+            key = entry.key
+            keys.append(key)
+            self.entries[key] = entry
+            self.categories.setdefault(entry.category, set()).add(key)
+            for term in entry.terms():
+                self.postings.setdefault(term, set()).add(key)
+        self.by_user[username] = keys
+        self._terms = None
+
+    def _remove_user(self, username: str):
+        for key in self.by_user.pop(username, []):
+            entry = self.entries.pop(key)
+            self.categories[entry.category].discard(key)
+            for term in entry.terms():
+                keys = self.postings.get(term)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self.postings[term]
+        self._terms = None
+
+    def _scan(self) -> Dict[str, tuple]:
+        """Current backend version of every user's collection"""
+        versions = {}
+        try:
+            for username in self.backend.users():
+                version = self.backend.version(username)
+                if version is not None:
+                    versions[username] = version
+        except OSError:
+            pass
+        return versions
+
+    def _read_user(self, username: str) -> List[Recipe]:
+        # Read-only: older collections are upgraded in memory but never
+        # rewritten here, and damaged records are skipped; the owner's next
+        # load repairs them
+        return self.backend.load(username, repair=False).recipes
+
+    def refresh(self) -> Dict[str, int]:
+        """Re-index only collections that were added, changed or removed since the last pass"""
+        current = self._scan()
+        changed = [username for username, version in current.items() if self.versions.get(username) != version]
+        removed = [username for username in self.versions if username not in current]
+
+        for username in removed:
+            self._remove_user(username)
+            del self.versions[username]
+            self.errors.pop(username, None)
+        for username in changed:
+            try:
+                recipes = self._read_user(username)
+            except (OSError, ValueError, KeyError, TypeError, SchemaError, StorageError) as e:
+                # Leave the previous entries (if any) in place and retry next pass
+                self.errors[username] = str(e)
+                continue
+            self._remove_user(username)
+            self._add_user(username, [CatalogEntry.from_recipe(username, recipe) for recipe in recipes])
+            self.versions[username] = current[username]
+            self.errors.pop(username, None)
+
+        if changed or removed:
+            try:
+                self._save()
+            except OSError as e:
+                self.errors["catalog"] = str(e)
+        return {"users": len(self.versions), "recipes": len(self.entries),
+                "reindexed": len(changed) - sum(1 for username in changed if username in self.errors),
+                "removed": len(removed)}
+
+    def _prefix_keys(self, prefix: str) -> Set[str]:
+        if self._terms is None:
+            self._terms = sorted(self.postings)
+        keys: Set[str] = set()
+        position = bisect_left(self._terms, prefix)
+        while position < len(self._terms) and self._terms[position].startswith(prefix):
+            keys |= self.postings[self._terms[position]]
+            position += 1
+        return keys
+
+    def _sorted(self, keys: Set[str]) -> List[CatalogEntry]:
+        return sorted((self.entries[key] for key in keys),
+                      key=lambda entry: (-(entry.rating or 0), entry.name.lower(), entry.username))
+
+    def search(self, query: str, category: Optional[RecipeCategory] = None,
+               exclude_user: Optional[str] = None) -> List[CatalogEntry]:
+        """Recipes where every query word starts a word of the name, tags or ingredients"""
+        candidates: Optional[Set[str]] = None
+        if category is not None:
+            candidates = set(self.categories.get(category.value, ()))
+        for word in sorted(set(tokenize(query)), key=len, reverse=True):
+            keys = self._prefix_keys(word)
+            candidates = keys if candidates is None else candidates & keys
+            if not candidates:
+                return []
+        if candidates is None:
+            return []
+        if exclude_user is not None:
+            candidates = {key for key in candidates if self.entries[key].username != exclude_user}
+        return self._sorted(candidates)
+
+    def browse(self, category: RecipeCategory, exclude_user: Optional[str] = None) -> List[CatalogEntry]:
+        keys = self.categories.get(category.value, set())
+        if exclude_user is not None:
+            keys = {key for key in keys if self.entries[key].username != exclude_user}
+        return self._sorted(keys)
+
+    def category_counts(self) -> Dict[str, int]:
+        return {category: len(keys) for category, keys in self.categories.items() if keys}
+
+    def get_recipe(self, entry: CatalogEntry) -> Optional[Recipe]:
+        """Full recipe for a catalog entry, read from its owner's collection"""
+        try:
+            found = self.backend.get_many(entry.username, [entry.recipe_id])
+            if found is None:
+                found = {recipe.recipe_id: recipe for recipe in self._read_user(entry.username)}
+        except (OSError, ValueError, KeyError, TypeError, SchemaError, StorageError):
+            return None
+        return found.get(entry.recipe_id)
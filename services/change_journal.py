@@ -0,0 +1,88 @@
+# services/change_journal.py
+import json
+import os
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.record_storage import atomic_write, encode_frame, iter_frames
+
+class ChangeJournal:
+    """Per-user log announcing which recipes each session wrote.
+
+    Every write appends one small frame to data/changes/<username>.log with
+    the writing session, the ids it changed (or "reset" for a whole
+    collection rewrite) and the storage version it left behind. Other
+    sessions notice new entries with a single stat, read just the tail, and
+    can patch those recipes into memory instead of reloading everything.
+    Once the log outgrows `max_bytes` it is replaced by a single reset
+    entry; readers see the new inode and fall back to a full reload.
+
+    Without a data directory nothing is recorded: no other session could
+    read it, and readers still notice foreign writes by the stored version.
+    """
+
+    def __init__(self, data_dir: Optional[str] = "data", max_bytes: int = 64 * 1024):
+        self.directory = os.path.join(data_dir, "changes") if data_dir is not None else None
+        self.max_bytes = max_bytes
+        # Identifies this session's own entries, which it never re-applies
+        self.session = uuid.uuid4().hex
+
+    def get_log_file(self, username: str) -> str:
+        return os.path.join(self.directory, f"{username}.log")
+
+    def position(self, username: str) -> Tuple[int, int]:
+        """(inode, size) of the log: where a reader that is up to date stands"""
+        if self.directory is None:
+            return 0, 0
+        try:
+            stat = os.stat(self.get_log_file(username))
+        except OSError:
+            return 0, 0
+        return stat.st_ino, stat.st_size
+
+    def append(self, username: str, version: Optional[tuple], changed: Optional[Iterable[str]] = None):
+        """Announce a write; `changed` None means the whole collection was rewritten"""
+        if self.directory is None:
+            return
+        entry = {"session": self.session, "version": list(version) if version is not None else None,
+                 "ids": sorted(changed) if changed is not None else None}
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.get_log_file(username)
+        with open(path, 'ab') as f:
+            f.write(encode_frame(entry))
+            size = f.tell()
+        if size > self.max_bytes:
+            entry["ids"] = None
+            with atomic_write(path) as f:
+                f.write(encode_frame(entry))
+
+    def read(self, username: str, position: Tuple[int, int]) -> Tuple[Optional[List[Dict]], Tuple[int, int]]:
+        """Entries written since `position` and the new position.
+
+        Returns None instead of entries when the log was replaced since, so
+        the reader cannot tell what it missed.
+        """
+        inode, offset = position
+        current = self.position(username)
+        if current == position:
+            return [], position
+        if not inode:
+            # The log did not exist yet, so everything in it is new
+            inode, offset = current[0], 0
+        elif current[0] != inode or current[1] < offset:
+            return None, current
+        with open(self.get_log_file(username), 'rb') as f:
+            f.seek(offset)
+            data = f.read(current[1] - offset)
+        # A writer may be half-way through its frame; leave it for next time
+        data = data[:data.rfind(b"\n") + 1]
+        entries = []
+        for _, payload, _ in iter_frames(data.splitlines(keepends=True)):
+            if payload is None:
+                return None, (inode, offset + len(data))
+            entries.append(json.loads(payload))
+        return entries, (inode, offset + len(data))
+
+    def remove_user(self, username: str):
+        if self.directory is not None and os.path.exists(self.get_log_file(username)):
+            os.remove(self.get_log_file(username))
@@ -0,0 +1,186 @@
+# services/duplicate_service.py
+import re
+import zlib
+from array import array
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional, Set
+
+# Import models
+from models.recipe import Recipe, canonical_name
+from services.recipe_service import RecipeService
+
+_WORD = re.compile(r"[a-z0-9]+")
+_EMPTY = 0xFFFFFFFF
+
+@dataclass
+class DuplicateCluster:
+    """Recipes that are likely copies of `keep`, with their estimated similarity to it"""
+    keep: Recipe
+    duplicates: List[Recipe]
+    similarity: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def recipes(self) -> List[Recipe]:
+        return [self.keep] + self.duplicates
+
+    @property
+    def score(self) -> float:
+        return min(self.similarity.values()) if self.similarity else 1.0
+
+class _DisjointSet:
+    def __init__(self, size: int):
+        self.parent = array('l', range(size))
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first: int, second: int):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            self.parent[max(first, second)] = min(first, second)
+
+class DuplicateFinder:
+    """MinHash signatures over ingredient sets and instruction shingles, bucketed with LSH.
+
+    Signatures use one-permutation hashing: every feature is hashed once and
+    lands in one of `num_perm` bins, keeping the minimum per bin (empty bins
+    borrow from the next non-empty one). That costs O(features) per recipe
+    instead of O(features * num_perm), which is what makes large imports
+    tractable. Candidates sharing any LSH band are verified on the signature
+    estimate and merged into clusters with union-find, so no step is
+    quadratic in the collection size.
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 3):
+        if num_perm & (num_perm - 1) or num_perm % bands:
+            raise ValueError("num_perm must be a power of two divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self._shift = num_perm.bit_length() - 1
+
+    def features(self, recipe: Recipe) -> Set[str]:
+        """Normalized ingredient names plus word shingles of the instructions"""
+        features = {f"i:{ingredient.canonical_name}" for ingredient in recipe.ingredients
+                    if ingredient.canonical_name}
+        words = _WORD.findall(" ".join(recipe.instructions).lower())
+        size = self.shingle_size
+        if len(words) < size:
+            if words:
+                features.add("s:" + " ".join(words))
+        else:
+            features.update("s:" + " ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+        if not features:
+            features.add("n:" + canonical_name(recipe.name))
+        return features
+
+    def signature(self, features: Iterable[str]) -> array:
+        num_perm, shift, mask = self.num_perm, self._shift, self.num_perm - 1
+        bins = [_EMPTY] * num_perm
+        for feature in features:
+            value = zlib.crc32(feature.encode('utf-8'))
+            position = value & mask
+            value >>= shift
+            if value < bins[position]:
+                bins[position] = value
+        # Rotation densification: an empty bin takes the value of the next
+        # non-empty bin (offset by the distance) so all bins stay comparable
+        if _EMPTY in bins and any(value != _EMPTY for value in bins):
+            original = bins[:]
+            for i in range(num_perm):
+                if original[i] == _EMPTY:
+                    distance = 1
+                    while original[(i + distance) & mask] == _EMPTY:
+                        distance += 1
+                    bins[i] = original[(i + distance) & mask] ^ (distance << 26)
+        return array('I', bins)
+
+    @staticmethod
+    def similarity(first: array, second: array) -> float:
+        """Estimated Jaccard similarity: the share of matching signature slots"""
+        return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+    def find(self, recipes: List[Recipe]) -> List[DuplicateCluster]:
+        signatures = [self.signature(self.features(recipe)) for recipe in recipes]
+        groups = _DisjointSet(len(recipes))
+        rows = self.rows
+        for band in range(self.bands):
+            start = band * rows
+            buckets: Dict[tuple, int] = {}
+            for position, signature in enumerate(signatures):
+                key = tuple(signature[start:start + rows])
+                first = buckets.setdefault(key, position)
+                if first != position and groups.find(first) != groups.find(position):
+                    if self.similarity(signatures[first], signature) >= self.threshold:
+                        groups.union(first, position)
+
+        members: Dict[int, List[int]] = {}
+        for position in range(len(recipes)):
+            members.setdefault(groups.find(position), []).append(position)
+
+        clusters = []
+        for positions in members.values():
+            if len(positions) < 2:
+                continue
+            keep = max(positions, key=lambda p: self._keep_rank(recipes[p]))
+            duplicates = [p for p in positions if p != keep]
+            clusters.append(DuplicateCluster(
+                recipes[keep], [recipes[p] for p in duplicates],
+                {recipes[p].recipe_id: self.similarity(signatures[keep], signatures[p]) for p in duplicates}))
+        clusters.sort(key=lambda cluster: (-len(cluster.duplicates), -cluster.score))
+        return clusters
+
+    @staticmethod
+    def _keep_rank(recipe: Recipe):
+        """Prefer favorites, then the better-rated, more complete and more recently updated copy"""
+        return (recipe.is_favorite, recipe.rating or 0, len(recipe.ingredients) + len(recipe.instructions),
+                recipe.updated_at or "")
+
+def merge_cluster(cluster: DuplicateCluster) -> Recipe:
+    """Fold the duplicates' tags, rating, favorite flag and missing details into the kept recipe"""
+    keep = cluster.keep
+    tags = list(keep.tags)
+    for recipe in cluster.duplicates:
+        tags.extend(tag for tag in recipe.tags if tag not in tags)
+    ratings = [recipe.rating for recipe in cluster.recipes if recipe.rating]
+    return replace(
+        keep,
+        tags=tags,
+        is_favorite=any(recipe.is_favorite for recipe in cluster.recipes),
+        rating=max(ratings) if ratings else None,
+        prep_time=keep.prep_time or next((r.prep_time for r in cluster.duplicates if r.prep_time), None),
+        cook_time=keep.cook_time or next((r.cook_time for r in cluster.duplicates if r.cook_time), None),
+        servings=keep.servings or next((r.servings for r in cluster.duplicates if r.servings), None),
+        nutritional_info=keep.nutritional_info or next((r.nutritional_info for r in cluster.duplicates
+                                                        if r.nutritional_info), None),
+    )
+
+class DuplicateService:
+    def __init__(self, recipe_service: RecipeService):
+        self.recipe_service = recipe_service
+
+    def find_duplicates(self, username: str, threshold: float = 0.6) -> List[DuplicateCluster]:
+        return DuplicateFinder(threshold).find(self.recipe_service.load_recipes(username))
+
+    def merge(self, username: str, clusters: List[DuplicateCluster]) -> Optional[int]:
+        """Merge each cluster into its kept recipe; returns recipes removed, or None on a failed write.
+
+        The kept recipes are updated in one write and each duplicate is then
+        deleted, so both show up in revision history and can be undone
+        """
+        if not self.recipe_service.update_recipes(username, [merge_cluster(cluster) for cluster in clusters]):
+            return None
+        removed = 0
+        for cluster in clusters:
+            for recipe in cluster.duplicates:
+                # A failed write reports itself; the count then says what was removed
+                if self.recipe_service.delete_recipe(username, recipe.recipe_id):
+                    removed += 1
+        return removed
@@ -0,0 +1,193 @@
+# services/meal_plan_service.py
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+# Import models
+from models.recipe import Recipe, RecipeCategory
+from services.recipe_service import RecipeService
+
+DEFAULT_SLOTS = (RecipeCategory.BREAKFAST, RecipeCategory.MAIN_COURSE, RecipeCategory.DESSERT)
+
+@dataclass
+class PlanConstraints:
+    """Daily budgets; None leaves a limit open. Nutrition is per serving, one serving per slot"""
+    days: int = 7
+    slots: Tuple[RecipeCategory, ...] = DEFAULT_SLOTS
+    min_calories: Optional[float] = None
+    max_calories: Optional[float] = None
+    min_protein: Optional[float] = None
+    max_total_time: Optional[int] = None
+    allow_repeats: bool = False
+    time_limit: float = 2.0
+
+@dataclass
+class DayPlan:
+    recipes: List[Recipe]
+    calories: float
+    protein: float
+    total_time: int
+    score: float
+
+@dataclass
+class MealPlan:
+    days: List[Optional[DayPlan]] = field(default_factory=list)
+    optimal: bool = True
+    # Recipes left out because they have no nutrition data to plan with
+    skipped: int = 0
+
+    @property
+    def complete(self) -> bool:
+        return bool(self.days) and all(day is not None for day in self.days)
+
+class _SlotColumns:
+    """Numeric columns for one slot's candidates, ordered best score first"""
+
+    def __init__(self, recipes: List[Recipe]):
+        recipes = sorted(recipes, key=MealPlanner.score, reverse=True)
+        self.recipes = recipes
+        self.calories = array('d', (recipe.nutritional_info.calories for recipe in recipes))
+        self.protein = array('d', (recipe.nutritional_info.protein or 0 for recipe in recipes))
+        self.time = array('l', (recipe.total_time or 0 for recipe in recipes))
+        self.score = array('d', (MealPlanner.score(recipe) for recipe in recipes))
+        self.min_calories = min(self.calories, default=0.0)
+        self.max_calories = max(self.calories, default=0.0)
+        self.max_protein = max(self.protein, default=0.0)
+        self.min_time = min(self.time, default=0)
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+class MealPlanner:
+    """Depth-first branch and bound over one recipe per slot, one day at a time.
+
+    Candidates are ordered by score, so the first feasible plan is usually
+    close to optimal; a branch is cut when even the best remaining scores
+    cannot beat the incumbent, or when the remaining slots' extreme calorie,
+    protein and time values make the budgets unreachable. When the time
+    limit runs out the best plan found so far is returned.
+    """
+
+    def __init__(self, recipes: List[Recipe], constraints: PlanConstraints):
+        self.constraints = constraints
+        usable = [recipe for recipe in recipes
+                  if recipe.nutritional_info is not None and recipe.nutritional_info.calories is not None]
+        self.skipped = len(recipes) - len(usable)
+        by_category: Dict[RecipeCategory, List[Recipe]] = {}
+        for recipe in usable:
+            by_category.setdefault(recipe.category, []).append(recipe)
+        self.columns = [_SlotColumns(by_category.get(category, [])) for category in constraints.slots]
+
+    @staticmethod
+    def score(recipe: Recipe) -> float:
+        """Preference for a recipe: its rating (unrated counts as 3) plus one for favorites"""
+        return (recipe.rating if recipe.rating else 3.0) + (1.0 if recipe.is_favorite else 0.0)
+
+    def plan(self) -> MealPlan:
+        constraints = self.constraints
+        deadline = time.monotonic() + constraints.time_limit
+        result = MealPlan(skipped=self.skipped)
+        used: List[Set[int]] = [set() for _ in self.columns]
+        for day in range(constraints.days):
+            # Share what is left of the time limit evenly across the remaining days
+            remaining = max(0.0, deadline - time.monotonic())
+            day_deadline = time.monotonic() + remaining / (constraints.days - day)
+            choice, optimal = self._solve_day(used if not constraints.allow_repeats else None, day_deadline)
+            if choice is None and not constraints.allow_repeats:
+                # Not enough distinct recipes left: fall back to repeating earlier ones
+                choice, optimal = self._solve_day(None, day_deadline)
+            result.optimal = result.optimal and optimal
+            if choice is None:
+                result.days.append(None)
+                continue
+            for slot, position in enumerate(choice):
+                used[slot].add(position)
+            result.days.append(self._day_plan(choice))
+        return result
+
+    def _day_plan(self, choice: List[int]) -> DayPlan:
+        columns = self.columns
+        return DayPlan(
+            recipes=[columns[slot].recipes[position] for slot, position in enumerate(choice)],
+            calories=sum(columns[slot].calories[position] for slot, position in enumerate(choice)),
+            protein=sum(columns[slot].protein[position] for slot, position in enumerate(choice)),
+            total_time=sum(columns[slot].time[position] for slot, position in enumerate(choice)),
+            score=sum(columns[slot].score[position] for slot, position in enumerate(choice)),
+        )
+
+    def _solve_day(self, used: Optional[List[Set[int]]], deadline: float) -> Tuple[Optional[List[int]], bool]:
+        """Best-scoring feasible choice of one candidate per slot, and whether the search finished"""
+        columns = self.columns
+        if not columns or any(len(column) == 0 for column in columns):
+            return None, True
+        constraints = self.constraints
+        min_calories = constraints.min_calories if constraints.min_calories is not None else float("-inf")
+        max_calories = constraints.max_calories if constraints.max_calories is not None else float("inf")
+        min_protein = constraints.min_protein if constraints.min_protein is not None else float("-inf")
+        max_time = constraints.max_total_time if constraints.max_total_time is not None else float("inf")
+
+        # Suffix bounds: what the slots from `depth` onwards can contribute at best/worst
+        slots = len(columns)
+        best_score = [0.0] * (slots + 1)
+        low_calories = [0.0] * (slots + 1)
+        high_calories = [0.0] * (slots + 1)
+        high_protein = [0.0] * (slots + 1)
+        low_time = [0] * (slots + 1)
+        for depth in range(slots - 1, -1, -1):
+            column = columns[depth]
+            best_score[depth] = best_score[depth + 1] + column.score[0]
+            low_calories[depth] = low_calories[depth + 1] + column.min_calories
+            high_calories[depth] = high_calories[depth + 1] + column.max_calories
+            high_protein[depth] = high_protein[depth + 1] + column.max_protein
+            low_time[depth] = low_time[depth + 1] + column.min_time
+
+        incumbent: List[Optional[List[int]]] = [None]
+        incumbent_score = [float("-inf")]
+        chosen = [0] * slots
+        steps = [0]
+        timed_out = [False]
+
+        def search(depth: int, calories: float, protein: float, minutes: int, score: float):
+            column = columns[depth]
+            skip = used[depth] if used is not None else ()
+            last = depth == slots - 1
+            rest = depth + 1
+            for position in range(len(column)):
+                steps[0] += 1
+                if steps[0] & 1023 == 0 and time.monotonic() > deadline:
+                    timed_out[0] = True
+                    return
+                # Scores are sorted, so once the bound fails it fails for every later candidate
+                if score + column.score[position] + best_score[rest] <= incumbent_score[0]:
+                    return
+                if position in skip:
+                    continue
+                total_calories = calories + column.calories[position]
+                total_protein = protein + column.protein[position]
+                total_time = minutes + column.time[position]
+                if (total_time + low_time[rest] > max_time
+                        or total_calories + low_calories[rest] > max_calories
+                        or total_calories + high_calories[rest] < min_calories
+                        or total_protein + high_protein[rest] < min_protein):
+                    continue
+                chosen[depth] = position
+                if last:
+                    incumbent[0] = list(chosen)
+                    incumbent_score[0] = score + column.score[position]
+                    # Later candidates in this slot score no higher
+                    return
+                search(rest, total_calories, total_protein, total_time, score + column.score[position])
+                if timed_out[0]:
+                    return
+
+        search(0, 0.0, 0.0, 0, 0.0)
+        return incumbent[0], not timed_out[0]
+
+class MealPlanService:
+    def __init__(self, recipe_service: RecipeService):
+        self.recipe_service = recipe_service
+
+    def plan_week(self, username: str, constraints: Optional[PlanConstraints] = None) -> MealPlan:
+        constraints = constraints or PlanConstraints()
+        return MealPlanner(self.recipe_service.load_recipes(username), constraints).plan()
@@ -0,0 +1,86 @@
+# services/migrations.py
+from dataclasses import fields
+from typing import Any, Callable, Dict, List, Tuple
+
+# Import models
+from models.recipe import Recipe, RecipeCategory, NutritionalInfo
+
+CURRENT_SCHEMA_VERSION = 2
+
+class SchemaError(ValueError):
+    """Raised when a user file cannot be brought to the current schema"""
+
+def schema_version(data: Any) -> int:
+    """Version 1 files are the original bare JSON list of recipes"""
+    if isinstance(data, list):
+        return 1
+    if isinstance(data, dict) and isinstance(data.get("schema_version"), int):
+        return data["schema_version"]
+    raise SchemaError("Unrecognized recipe file format")
+
+_RECIPE_FIELDS = {f.name for f in fields(Recipe)}
+_NUTRITION_FIELDS = {f.name for f in fields(NutritionalInfo)}
+_CATEGORY_VALUES = {category.value for category in RecipeCategory}
+
+def _upgrade_recipe_v1(record: Dict) -> Dict:
+    """Apply every compatibility rule Recipe.from_dict used to run on each load"""
+    record = {key: value for key, value in record.items() if key in _RECIPE_FIELDS}
+
+    if record.get("category") not in _CATEGORY_VALUES:
+        record["category"] = RecipeCategory.MAIN_COURSE.value
+
+    ingredients = []
+    for ingredient in record.get("ingredients") or []:
+        if isinstance(ingredient, dict):
+            ingredients.append({"name": str(ingredient.get("name", "")),
+                                "amount": str(ingredient.get("amount", "")),
+                                "unit": str(ingredient.get("unit", "") or "")})
+        else:
+            ingredients.append({"name": str(ingredient), "amount": "", "unit": ""})
+    record["ingredients"] = ingredients
+
+    record["instructions"] = list(record.get("instructions") or [])
+    record["tags"] = list(record.get("tags") or [])
+
+    nutrition = record.get("nutritional_info")
+    if isinstance(nutrition, dict) and nutrition:
+        record["nutritional_info"] = {key: nutrition.get(key) for key in _NUTRITION_FIELDS}
+    else:
+        record["nutritional_info"] = None
+
+    # Fill defaults so the strict decoder sees every field, including ids and
+    # timestamps generated now rather than on every future load
+    return Recipe.from_dict(record).to_dict()
+
+def _v1_to_v2(data: List) -> Dict:
+    return {"schema_version": 2, "recipes": [_upgrade_recipe_v1(dict(record)) for record in data]}
+
+# Each entry upgrades a document from the keyed version to the next one
+MIGRATIONS: Dict[int, Callable[[Any], Dict]] = {
+    1: _v1_to_v2,
+}
+
+def upgrade(data: Any) -> Tuple[Dict, int]:
+    """Bring a parsed user file to the current schema; returns (document, original version)"""
+    original = version = schema_version(data)
+    if version > CURRENT_SCHEMA_VERSION:
+        raise SchemaError(f"Recipe file uses schema {version}, newer than supported {CURRENT_SCHEMA_VERSION}")
+    while version < CURRENT_SCHEMA_VERSION:
+        migration = MIGRATIONS.get(version)
+        if migration is None:
+            raise SchemaError(f"No migration from schema {version}")
+        data = migration(data)
+        version = schema_version(data)
+    return data, original
+
+def upgrade_records(records: List[Dict], version: int) -> List[Dict]:
+    """Bring recipe records kept outside a user file (e.g. in backups) from schema `version` to the current one"""
+    document, _ = upgrade(list(records) if version == 1 else {"schema_version": version, "recipes": records})
+    return document["recipes"]
+
+def encode(recipes: List[Recipe]) -> Dict:
+    return {"schema_version": CURRENT_SCHEMA_VERSION, "recipes": [recipe.to_dict() for recipe in recipes]}
+
+def decode(document: Dict) -> List[Recipe]:
+    """Strict decoding for documents already at the current schema"""
+    return [Recipe.from_storage(record) for record in document["recipes"]]
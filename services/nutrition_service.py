@@ -0,0 +1,180 @@
+# services/nutrition_service.py
+import csv
+import os
+import sqlite3
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+# Import models
+from models.quantity import Dimension, parse_quantity
+from models.recipe import Recipe, Ingredient, NutritionalInfo, canonical_name
+from services.recipe_service import RecipeService
+from utils.console_utils import ConsoleManager
+
+NUTRIENT_FIELDS = ("calories", "protein", "carbs", "fat", "fiber")
+# Looked up in the recipe service's data directory
+DEFAULT_NUTRIENT_TABLE = "nutrients.csv"
+
+# Count units that mean "one of the ingredient itself" rather than a container
+PIECE_UNITS = {"", "piece", "pieces", "pc", "pcs", "whole", "clove", "cloves",
+               "slice", "slices", "small", "medium", "large"}
+
+Nutrients = Tuple[float, float, float, float, float]
+ZERO: Nutrients = (0.0, 0.0, 0.0, 0.0, 0.0)
+
+class NutrientEntry:
+    """Nutrients per 100 g plus the conversions needed to get to grams"""
+    __slots__ = ("per_100g", "grams_per_ml", "grams_per_unit")
+
+    def __init__(self, per_100g: Nutrients, grams_per_ml: Optional[float] = None,
+                 grams_per_unit: Optional[float] = None):
+        self.per_100g = per_100g
+        self.grams_per_ml = grams_per_ml
+        self.grams_per_unit = grams_per_unit
+
+def _optional_float(value) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    return float(value)
+
+class NutritionService:
+    def __init__(self, recipe_service: RecipeService, table_path: Optional[str] = None):
+        self.recipe_service = recipe_service
+        if table_path is None:
+            table_path = os.path.join(recipe_service.data_dir, DEFAULT_NUTRIENT_TABLE)
+        self.table_path = table_path
+        self.table: Dict[str, NutrientEntry] = {}
+        self._line_cache: Dict[Tuple[str, str, str], Optional[Nutrients]] = {}
+        self._lookup_cache: Dict[str, Optional[NutrientEntry]] = {}
+        if os.path.exists(table_path):
+            self.load_table(table_path)
+
+    def load_table(self, path: str) -> bool:
+        """Load a nutrient table from CSV, or from SQLite (a `nutrients` table with the same columns)"""
+        try:
+            # Row numbers in warnings: CSV rows count the header line
+            first_row = 2
+            if path.endswith((".db", ".sqlite", ".sqlite3")):
+                first_row = 1
+                connection = sqlite3.connect(path)
+                try:
+                    connection.row_factory = sqlite3.Row
+                    rows = [dict(row) for row in connection.execute("SELECT * FROM nutrients")]
+                finally:
+                    connection.close()
+            else:
+                with open(path, 'r', encoding='utf-8', newline='') as f:
+                    rows = list(csv.DictReader(f))
+        except (OSError, sqlite3.Error, csv.Error) as e:
+            ConsoleManager.print_error(f"Error loading nutrient table: {e}")
+            return False
+
+        table = {}
+        skipped = []
+        for line, row in enumerate(rows, start=first_row):
+            name = canonical_name(row.get("name") or "")
+            if not name:
+                continue
+            try:
+                per_100g = tuple(_optional_float(row.get(key)) or 0.0 for key in NUTRIENT_FIELDS)
+                table[name] = NutrientEntry(per_100g, _optional_float(row.get("grams_per_ml")),
+                                            _optional_float(row.get("grams_per_unit")))
+            except (TypeError, ValueError):
+                # One malformed cell (e.g. "n/a") loses that row, not the table
+                skipped.append(str(line))
+        if skipped:
+            ConsoleManager.print_warning(f"Skipped {len(skipped)} nutrient row(s) with non-numeric values "
+                                         f"(row {', '.join(skipped[:5])}{', ...' if len(skipped) > 5 else ''})")
+
+        self.table = table
+        self.table_path = path
+        self._line_cache.clear()
+        self._lookup_cache.clear()
+        return True
+
+    def lookup(self, name: str) -> Optional[NutrientEntry]:
+        """Find the table entry for an ingredient, dropping leading words ('red onion' -> 'onion')"""
+        key = canonical_name(name)
+        if key in self._lookup_cache:
+            return self._lookup_cache[key]
+
+        entry = None
+        words = key.split()
+        for start in range(len(words)):
+            entry = self.table.get(" ".join(words[start:]))
+            if entry is not None:
+                break
+        self._lookup_cache[key] = entry
+        return entry
+
+    def ingredient_nutrients(self, ingredient: Ingredient) -> Optional[Nutrients]:
+        """Nutrients for one ingredient line, or None if it cannot be resolved to grams"""
+        key = (ingredient.name, ingredient.amount, ingredient.unit)
+        if key in self._line_cache:
+            return self._line_cache[key]
+
+        result = None
+        entry = self.lookup(ingredient.name)
+        quantity = parse_quantity(ingredient.amount, ingredient.unit)
+        if entry is not None and quantity.is_known:
+            grams = None
+            if quantity.dimension == Dimension.MASS:
+                grams = quantity.mean
+            elif quantity.dimension == Dimension.VOLUME and entry.grams_per_ml:
+                grams = quantity.mean * entry.grams_per_ml
+            elif quantity.dimension == Dimension.COUNT and quantity.unit in PIECE_UNITS \
+                    and entry.grams_per_unit:
+                grams = quantity.mean * entry.grams_per_unit
+            if grams is not None:
+                factor = grams / 100.0
+                result = tuple(value * factor for value in entry.per_100g)
+
+        self._line_cache[key] = result
+        return result
+
+    def compute(self, recipe: Recipe) -> Optional[NutritionalInfo]:
+        """Compute per-serving nutrition for a recipe; None if no ingredient is known"""
+        totals = ZERO
+        matched = False
+        for ingredient in recipe.ingredients:
+            nutrients = self.ingredient_nutrients(ingredient)
+            if nutrients is not None:
+                totals = tuple(a + b for a, b in zip(totals, nutrients))
+                matched = True
+        if not matched:
+            return None
+
+        servings = recipe.servings or 1
+        calories, protein, carbs, fat, fiber = (value / servings for value in totals)
+        return NutritionalInfo(calories=round(calories), protein=round(protein, 1),
+                               carbs=round(carbs, 1), fat=round(fat, 1), fiber=round(fiber, 1))
+
+    def compute_collection(self, username: str, overwrite: bool = False) -> int:
+        """Fill in nutritional info across a user's collection and save once.
+
+        Recipes that already have nutritional info are kept unless `overwrite`
+        is set. Changed recipes are saved as copies through update_recipes, so
+        they get a new updated_at and a revision. Returns the number of
+        recipes updated.
+        """
+        updated = []
+        for recipe in self.recipe_service.load_recipes(username):
+            copy = replace(recipe)
+            if self.apply([copy], overwrite) and copy.nutritional_info != recipe.nutritional_info:
+                updated.append(copy)
+        if updated and not self.recipe_service.update_recipes(username, updated):
+            return 0
+        return len(updated)
+
+    def apply(self, recipes: List[Recipe], overwrite: bool = False) -> int:
+        """Compute nutritional info in place for a batch of recipes"""
+        updated = 0
+        for recipe in recipes:
+            if recipe.nutritional_info and any(vars(recipe.nutritional_info).values()) \
+                    and not overwrite:
+                continue
+            info = self.compute(recipe)
+            if info is not None:
+                recipe.nutritional_info = info
+                updated += 1
+        return updated
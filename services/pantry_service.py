@@ -0,0 +1,78 @@
+# services/pantry_service.py
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+# Import models
+from models.recipe import Recipe, canonical_name
+from services.recipe_service import RecipeService
+from utils.bit_utils import iter_bits, popcount
+from utils.cache_utils import VersionedCache
+
+@dataclass
+class PantryMatch:
+    recipe: Recipe
+    have: int
+    total: int
+    missing: List[str]
+
+    @property
+    def coverage(self) -> float:
+        return self.have / self.total if self.total else 1.0
+
+class IngredientBitsetIndex:
+    """One bitmask per recipe over canonical ingredient ids"""
+
+    def __init__(self, recipes: List[Recipe]):
+        self.ingredient_ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.recipes = recipes
+        self.masks: List[int] = []
+        self.sizes: List[int] = []
+        for recipe in recipes:
+            mask = self.mask_for(ing.canonical_name for ing in recipe.ingredients)
+            self.masks.append(mask)
+            self.sizes.append(popcount(mask))
+
+    def mask_for(self, names: Iterable[str], add: bool = True) -> int:
+        mask = 0
+        for name in names:
+            if not name:
+                continue
+            ingredient_id = self.ingredient_ids.get(name)
+            if ingredient_id is None:
+                if not add:
+                    continue
+                ingredient_id = self.ingredient_ids[name] = len(self.names)
+                self.names.append(name)
+            mask |= 1 << ingredient_id
+        return mask
+
+    def names_for(self, mask: int) -> List[str]:
+        return [self.names[position] for position in iter_bits(mask)]
+
+    def match(self, pantry: Iterable[str], max_missing: int = 0) -> List[PantryMatch]:
+        """Recipes missing at most `max_missing` ingredients, best coverage first"""
+        pantry_mask = self.mask_for((canonical_name(item) for item in pantry), add=False)
+        matches = []
+        for recipe, mask, size in zip(self.recipes, self.masks, self.sizes):
+            if not size:
+                # Nothing to match against; would otherwise top every list as 0/0
+                continue
+            have = popcount(mask & pantry_mask)
+            if size - have <= max_missing:
+                missing = self.names_for(mask & ~pantry_mask) if have < size else []
+                matches.append(PantryMatch(recipe, have, size, missing))
+        matches.sort(key=lambda m: (-m.coverage, len(m.missing), m.recipe.name))
+        return matches
+
+class PantryService:
+    def __init__(self, recipe_service: RecipeService):
+        self.recipe_service = recipe_service
+        self._indexes = VersionedCache()
+
+    def get_index(self, username: str) -> IngredientBitsetIndex:
+        return self._indexes.fetch(username, self.recipe_service.get_version(username),
+                                   lambda: IngredientBitsetIndex(self.recipe_service.load_recipes(username)))
+
+    def what_can_i_cook(self, username: str, pantry: Iterable[str], max_missing: int = 0) -> List[PantryMatch]:
+        return self.get_index(username).match(pantry, max_missing)
@@ -0,0 +1,260 @@
+# services/recipe_index.py
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Import models
+from models.recipe import Recipe, RecipeCategory
+from services.timeline_index import TimelineIndex
+from utils.bit_utils import iter_bits, popcount
+
+@dataclass
+class RecipeQuery:
+    category: Optional[RecipeCategory] = None
+    difficulty: Optional[str] = None
+    favorite: Optional[bool] = None
+    min_rating: Optional[float] = None
+    max_total_time: Optional[int] = None
+    min_servings: Optional[int] = None
+    max_servings: Optional[int] = None
+    tags: List[str] = field(default_factory=list)  # every tag must be present
+    sort_by: Optional[str] = None   # one of RecipeIndex.SORT_KEYS; None keeps collection order
+    descending: bool = True
+    page: int = 1
+    page_size: int = 20
+
+@dataclass
+class RecipeQueryResult:
+    recipes: List[Recipe]
+    total: int
+    page: int
+    page_size: int
+    facets: Dict[str, Dict[str, int]]
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-self.total // self.page_size))
+
+class RecipeIndex:
+    """Per-facet bitmaps and sorted numeric arrays over a user's recipes.
+
+    Every recipe occupies a slot; categorical facets keep one bitmap (a Python
+    int) per value and sortable fields keep a sorted list of (value, slot).
+    Mutations update the structures in place with bisect, so queries, sorted
+    listings and top-k lookups never rescan or re-sort the collection.
+    """
+
+    SORT_KEYS = ("rating", "total_time", "servings", "created_at", "updated_at")
+
+    def __init__(self, recipes: List[Recipe] = ()):
+        self.slots: List[Optional[Recipe]] = []
+        # Values each slot was indexed under; recipes may be mutated in place
+        # before update() is called, so they cannot be recomputed on removal
+        self.indexed: List[Optional[tuple]] = []
+        self.slot_of: Dict[str, int] = {}
+        self.live = 0
+        self.categorical: Dict[str, Dict[object, int]] = {
+            "category": {}, "difficulty": {}, "favorite": {}, "tags": {}
+        }
+        self.numeric: Dict[str, List[Tuple[float, int]]] = {name: [] for name in self.SORT_KEYS}
+        self.timeline = TimelineIndex()
+        for recipe in recipes:
+            self.add(recipe)
+
+    def __len__(self) -> int:
+        return len(self.slot_of)
+
+    @staticmethod
+    def _facet_values(recipe: Recipe) -> Dict[str, List[object]]:
+        return {
+            "category": [recipe.category],
+            "difficulty": [recipe.difficulty],
+            "favorite": [bool(recipe.is_favorite)],
+            "tags": sorted({tag.strip().lower() for tag in recipe.tags if tag.strip()}),
+        }
+
+    @staticmethod
+    def _numeric_values(recipe: Recipe) -> Dict[str, Optional[float]]:
+        return {"rating": recipe.rating, "total_time": recipe.total_time, "servings": recipe.servings,
+                "created_at": recipe.created_at, "updated_at": recipe.updated_at}
+
+    def add(self, recipe: Recipe):
+        slot = self.slot_of.get(recipe.recipe_id)
+        if slot is not None:
+            self._unindex(slot)
+        else:
+            slot = len(self.slots)
+            self.slots.append(None)
+            self.indexed.append(None)
+            self.slot_of[recipe.recipe_id] = slot
+        self._index(recipe, slot)
+
+    def update(self, recipe: Recipe):
+        """Re-index a changed recipe in its existing slot, keeping its position"""
+        self.add(recipe)
+
+    def remove(self, recipe_id: str) -> bool:
+        slot = self.slot_of.pop(recipe_id, None)
+        if slot is None:
+            return False
+        self._unindex(slot)
+        if len(self.slots) > 64 and len(self.slot_of) < len(self.slots) // 2:
+            self._compact()
+        return True
+
+    def _index(self, recipe: Recipe, slot: int):
+        facet_values, numeric_values = self._facet_values(recipe), self._numeric_values(recipe)
+        self.slots[slot] = recipe
+        self.indexed[slot] = (facet_values, numeric_values)
+        self.live |= 1 << slot
+        for facet, values in facet_values.items():
+            bitmaps = self.categorical[facet]
+            for value in values:
+                bitmaps[value] = bitmaps.get(value, 0) | (1 << slot)
+        for facet, value in numeric_values.items():
+            if value is not None:
+                insort(self.numeric[facet], (value, slot))
+        self.timeline.add(slot, numeric_values["created_at"], numeric_values["updated_at"])
+
+    def _unindex(self, slot: int):
+        facet_values, numeric_values = self.indexed[slot]
+        self.slots[slot] = None
+        self.indexed[slot] = None
+        self.live &= ~(1 << slot)
+        for facet, values in facet_values.items():
+            bitmaps = self.categorical[facet]
+            for value in values:
+                remaining = bitmaps.get(value, 0) & ~(1 << slot)
+                if remaining:
+                    bitmaps[value] = remaining
+                else:
+                    bitmaps.pop(value, None)
+        for facet, value in numeric_values.items():
+            if value is not None:
+                entries = self.numeric[facet]
+                position = bisect_left(entries, (value, slot))
+                if position < len(entries) and entries[position] == (value, slot):
+                    del entries[position]
+        self.timeline.remove(slot, numeric_values["created_at"], numeric_values["updated_at"])
+
+    def _compact(self):
+        """Drop the holes left by deletions once they make up half the slots"""
+        self.__init__(self.recipes())
+
+    def get(self, recipe_id: str) -> Optional[Recipe]:
+        slot = self.slot_of.get(recipe_id)
+        return self.slots[slot] if slot is not None else None
+
+    def recipes(self, mask: Optional[int] = None) -> List[Recipe]:
+        return [self.slots[slot] for slot in iter_bits(self.live if mask is None else mask)]
+
+    def timeline_recipes(self, kind: str, start: Optional[int] = None, end: Optional[int] = None) -> List[Recipe]:
+        """Recipes created or updated within [start, end) epoch seconds, oldest first"""
+        return [self.slots[slot] for slot in self.timeline.range(kind, start, end)]
+
+    def _ordered_slots(self, key: str, descending: bool) -> Iterator[int]:
+        """Slots in sort order; recipes without a value follow in collection order"""
+        entries = self.numeric[key]
+        ordered = reversed(entries) if descending else iter(entries)
+        valued = 0
+        for _, slot in ordered:
+            valued |= 1 << slot
+            yield slot
+        yield from iter_bits(self.live & ~valued)
+
+    def top_k(self, key: str, k: int, descending: bool = True) -> List[Recipe]:
+        """The k recipes with the highest (or lowest) value, skipping recipes without one"""
+        entries = self.numeric[key]
+        chosen = entries[-k:][::-1] if descending else entries[:k]
+        return [self.slots[slot] for _, slot in chosen] if k > 0 else []
+
+    def range(self, key: str, low=None, high=None, descending: bool = False) -> List[Recipe]:
+        """Recipes whose value lies within [low, high], in sorted order"""
+        start, end = self._range_bounds(key, low, high)
+        chosen = self.numeric[key][start:end]
+        if descending:
+            chosen = chosen[::-1]
+        return [self.slots[slot] for _, slot in chosen]
+
+    def _range_bounds(self, facet: str, low: Optional[float], high: Optional[float]) -> Tuple[int, int]:
+        entries = self.numeric[facet]
+        start = bisect_left(entries, (low, -1)) if low is not None else 0
+        end = bisect_right(entries, (high, len(self.slots))) if high is not None else len(entries)
+        return start, max(start, end)
+
+    def _range_mask(self, facet: str, start: int, end: int) -> int:
+        mask = 0
+        for _, slot in self.numeric[facet][start:end]:
+            mask |= 1 << slot
+        return mask
+
+    def match(self, query: RecipeQuery) -> int:
+        """Bitmap of slots matching every filter, intersecting the smallest sets first"""
+        # Each candidate is (estimated size, materializer) so large sets are never built
+        # once an intersection has already come up empty
+        candidates = []
+
+        def add_bitmap(facet: str, value):
+            bitmap = self.categorical[facet].get(value, 0)
+            candidates.append((popcount(bitmap), lambda: bitmap))
+
+        def add_range(facet: str, low, high):
+            start, end = self._range_bounds(facet, low, high)
+            candidates.append((end - start, lambda: self._range_mask(facet, start, end)))
+
+        if query.category is not None:
+            add_bitmap("category", query.category)
+        if query.difficulty is not None:
+            add_bitmap("difficulty", query.difficulty)
+        if query.favorite is not None:
+            add_bitmap("favorite", bool(query.favorite))
+        for tag in query.tags:
+            add_bitmap("tags", tag.strip().lower())
+        if query.min_rating is not None:
+            add_range("rating", query.min_rating, None)
+        if query.max_total_time is not None:
+            add_range("total_time", None, query.max_total_time)
+        if query.min_servings is not None or query.max_servings is not None:
+            add_range("servings", query.min_servings, query.max_servings)
+
+        result = self.live
+        for _, materialize in sorted(candidates, key=lambda candidate: candidate[0]):
+            result &= materialize()
+            if not result:
+                break
+        return result
+
+    def facet_counts(self, mask: int) -> Dict[str, Dict[str, int]]:
+        """Count matching recipes per categorical facet value"""
+        facets = {}
+        for facet, bitmaps in self.categorical.items():
+            counts = {}
+            for value, bitmap in bitmaps.items():
+                count = popcount(bitmap & mask)
+                if count:
+                    label = value.value if isinstance(value, RecipeCategory) else str(value)
+                    counts[label] = count
+            facets[facet] = counts
+        return facets
+
+    def query(self, query: RecipeQuery) -> RecipeQueryResult:
+        mask = self.match(query)
+        total = popcount(mask)
+        page_size = max(1, query.page_size)
+        page = max(1, query.page)
+        offset = (page - 1) * page_size
+
+        if query.sort_by:
+            ordered = (slot for slot in self._ordered_slots(query.sort_by, query.descending)
+                       if mask >> slot & 1)
+        else:
+            ordered = iter_bits(mask)
+
+        recipes = []
+        for position, slot in enumerate(ordered):
+            if position >= offset + page_size:
+                break
+            if position >= offset:
+                recipes.append(self.slots[slot])
+
+        return RecipeQueryResult(recipes, total, page, page_size, self.facet_counts(mask))
@@ -1,85 +1,671 @@
 # services/recipe_service.py
-import json
 import os
-from typing import List, Optional, Dict, Any
+import threading
+import time
+from typing import Callable, List, Optional, Dict, Any, Iterable, Set, Tuple, Union
 from datetime import datetime
 
 # Import models
 from models.recipe import Recipe, RecipeCategory
+from services.change_journal import ChangeJournal
+from services.migrations import SchemaError
+from services.record_storage import DEFAULT_COMPRESSION
+from services.recipe_index import RecipeIndex, RecipeQuery, RecipeQueryResult
+from services.revision_history import Revision, RevisionHistory, field_delta
+from services.storage_backends import StorageBackend, StorageError, create_backend
+from services.timeline_index import TimelineIndex, datetime_to_epoch
+from utils.cache_utils import VersionedCache
 from utils.console_utils import ConsoleManager
 
+def _apply_changes(recipes: List[Recipe], updates: Dict[str, Optional[Recipe]]) -> List[Recipe]:
+    """Replace, append or (for None) drop recipes by id, keeping collection order"""
+    result = []
+    for recipe in recipes:
+        if recipe.recipe_id not in updates:
+            result.append(recipe)
+        elif updates[recipe.recipe_id] is not None:
+            result.append(updates[recipe.recipe_id])
+    present = {recipe.recipe_id for recipe in recipes}
+    result.extend(recipe for recipe_id, recipe in updates.items() if recipe is not None and recipe_id not in present)
+    return result
+
 class RecipeService:
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", write_behind_ms: Optional[int] = None,
+                 compression: Optional[str] = DEFAULT_COMPRESSION, compression_level: Optional[int] = None,
+                 backend: Union[str, StorageBackend] = "file"):
         self.data_dir = data_dir
         os.makedirs(data_dir, exist_ok=True)
+        # Where collections are stored: a backend instance or a name from
+        # storage_backends.BACKENDS. The compression settings apply to "file"
+        if isinstance(backend, str):
+            backend = create_backend(backend, data_dir, compression=compression,
+                                     compression_level=compression_level)
+        self.backend = backend
+        # Parsed collections and their indexes, keyed by username and
+        # tagged with the backend version they were built from
+        self._collections: Dict[str, Tuple[tuple, List[Recipe]]] = {}
+        self._indexes = VersionedCache()
+        # Background loads started by prefetch(), collected on first use
+        self._pending: Dict[str, Any] = {}
+        self._executor = None
+        # Write-behind: with `write_behind_ms` set, mutations only touch the
+        # in-memory collection and a writer thread flushes each dirty user at
+        # most once per interval. `_dirty` maps username -> change generation.
+        self.write_behind_ms = write_behind_ms
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._dirty: Dict[str, int] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._generation = 0
+        self._writer: Optional[threading.Thread] = None
+        self._closing = False
+        self._write_errors: Dict[str, str] = {}
+        # Field-level history of every update and delete, see revision_history.py.
+        # Both logs stay off disk when the collections themselves do
+        log_dir = data_dir if self.backend.persistent else None
+        self.revisions = RevisionHistory(log_dir)
+        # Other sessions of the same user: every write is announced in the
+        # change journal, and their announcements are read back from the
+        # position each loaded collection is current to
+        self.changes = ChangeJournal(log_dir)
+        self._journal_positions: Dict[str, Tuple[int, int]] = {}
+        # Recipe ids changed since the last flush, per dirty user
+        self._dirty_ids: Dict[str, Set[str]] = {}
+        # See add_listener
+        self._listeners: List[Callable[[str, Optional[tuple], Optional[tuple], Dict], None]] = []
     
     def get_user_file(self, username: str) -> str:
-        return os.path.join(self.data_dir, f"recipes_{username}.json")
+        """Path of a user's collection, for backends that keep one per user on disk"""
+        return self.backend.get_user_file(username)
+    
+    def get_version(self, username: str) -> Optional[Tuple[int, ...]]:
+        """Cheap change marker for a user's collection, or None if missing.
+
+        This is the backend's version (a file's mtime_ns, size and inode),
+        plus the change generation while unflushed write-behind changes
+        exist, so callers caching derived data see in-memory edits straight
+        away.
+        """
+        version = self._stored_version(username)
+        with self._lock:
+            generation = self._dirty.get(username)
+        if generation is None or version is None:
+            return version
+        return version + (generation,)
+    
+    def _stored_version(self, username: str) -> Optional[tuple]:
+        return self.backend.version(username)
+    
+    def add_listener(self, listener: Callable[[str, Optional[tuple], Optional[tuple], Dict], None]) -> None:
+        """Have `listener(username, previous_version, version, changes)` called after each known change.
+
+        Versions are get_version() values and `changes` maps recipe_id to
+        (old recipe or None, new recipe or None), so caches built at
+        `previous_version` can patch themselves instead of rebuilding. It is
+        called for this session's edits, for flushes (with no changes, the
+        version only moves on) and for recipes patched in from other
+        sessions. Changes it cannot describe, such as full reloads, are not
+        reported; the version then simply no longer matches.
+        """
+        self._listeners.append(listener)
+    
+    def _notify(self, username: str, previous_version: Optional[tuple],
+                changes: Dict[str, Tuple[Optional[Recipe], Optional[Recipe]]]) -> None:
+        if self._listeners:
+            version = self.get_version(username)
+            for listener in self._listeners:
+                listener(username, previous_version, version, changes)
+    
+    def prefetch(self, username: str):
+        """Start parsing and indexing a user's collection on a worker thread.
+
+        The result is picked up by the next load_recipes/get_index call, so the
+        load overlaps with whatever the user is doing in the meantime.
+        """
+        future = self._pending.get(username)
+        if future is None:
+            from concurrent.futures import ThreadPoolExecutor
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recipe-prefetch")
+            future = self._executor.submit(self._read_collection, username)
+            self._pending[username] = future
+        return future
+    
+    def _read_collection(self, username: str):
+        """Worker side of prefetch: builds everything locally and never prints.
+
+        Files that need migrating or fail to load are left to the regular load
+        path, which writes and reports errors on the main thread.
+        """
+        try:
+            position = self.changes.position(username)
+            result = self.backend.load(username, repair=False)
+            if result.version is None or result.needs_rewrite:
+                return None
+            return result.version, result.recipes, RecipeIndex(result.recipes), position
+        except Exception:
+            return None
+    
+    def _collect_prefetch(self, username: str) -> None:
+        future = self._pending.pop(username, None)
+        if future is None:
+            return
+        result = future.result()
+        # Discard the result if the file changed while it was being read
+        if result is None or result[0] != self._stored_version(username):
+            return
+        version, recipes, index, position = result
+        self._collections[username] = (version, recipes)
+        self._indexes[username] = (version, index)
+        self._journal_positions[username] = position
     
     def load_recipes(self, username: str) -> List[Recipe]:
-        filename = self.get_user_file(username)
-        if not os.path.exists(filename):
+        self._collect_prefetch(username)
+        self.refresh(username)
+        with self._lock:
+            # Unflushed changes make the in-memory copy authoritative
+            if username in self._dirty:
+                return list(self._collections[username][1])
+        version = self._stored_version(username)
+        if version is None:
             return []
         
+        cached = self._collections.get(username)
+        if cached is not None and cached[0] == version:
+            return list(cached[1])
+        
         try:
-            with open(filename, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                return [Recipe.from_dict(recipe_data) for recipe_data in data]
-        except json.JSONDecodeError:
-            ConsoleManager.print_error("Recipe file is corrupted!")
+            position = self.changes.position(username)
+            result = self.backend.load(username)
+        except (StorageError, SchemaError) as e:
+            ConsoleManager.print_error(str(e))
             return []
         except Exception as e:
             ConsoleManager.print_error(f"Error loading recipes: {e}")
             return []
+        for warning in result.warnings:
+            ConsoleManager.print_warning(warning)
+        if result.needs_rewrite:
+            # Migrate or repair once so later loads take the strict fast path
+            self._write_recipes(username, result.recipes)
+        else:
+            self._collections[username] = (result.version, result.recipes)
+            self._journal_positions[username] = position
+        return list(result.recipes)
+    
+    def read_recipes(self, username: str) -> List[Recipe]:
+        """The stored collection, read without repairing or migrating anything.
+
+        For callers that must not mistake a failed load for an empty
+        collection (backups, admin tasks): pending edits are flushed first,
+        and a missing, damaged or unreadable collection raises instead of
+        returning what could be salvaged.
+        """
+        if not self.flush(username):
+            raise StorageError(f"Unsaved changes for {username} could not be written")
+        if not self.backend.exists(username):
+            raise StorageError(f"No recipe collection for {username}")
+        result = self.backend.load(username, repair=False)
+        if result.warnings:
+            raise StorageError("; ".join(result.warnings))
+        return result.recipes
+    
+    def refresh(self, username: str) -> bool:
+        """Pick up what other sessions wrote to a loaded collection; True if anything changed.
+
+        Costs two stats while nothing happened. Recipes named in the change
+        journal are read back on their own and patched into the cached
+        collection and index. When the journal cannot account for the stored
+        version (it was rotated, the collection was rewritten wholesale, or
+        the writer does not keep it) the collection is reloaded in full
+        instead. Unflushed edits of this session always stay on top.
+        """
+        with self._lock:
+            position = self._journal_positions.get(username)
+            cached = self._collections.get(username)
+            if position is None or cached is None:
+                return False
+            entries, position = self.changes.read(username, position)
+            if entries is not None:
+                foreign = [entry for entry in entries if entry["session"] != self.changes.session]
+                # A writer that bypasses the journal still changes the stored version
+                if not foreign and self._stored_version(username) == cached[0]:
+                    self._journal_positions[username] = position
+                    return False
+            version = self._stored_version(username)
+            found = None
+            if entries and all(entry["ids"] is not None for entry in foreign) \
+                    and entries[-1]["version"] is not None and tuple(entries[-1]["version"]) == version:
+                changed = {recipe_id for entry in foreign for recipe_id in entry["ids"]}
+                found = self.backend.get_many(username, changed)
+                if found is not None and self._stored_version(username) != version:
+                    found = None
+            local = self._dirty_ids.get(username, set())
+            if found is None:
+                return self._reload_merged(username, cached[1], local)
+            
+            updates = {recipe_id: found.get(recipe_id) for recipe_id in changed if recipe_id not in local}
+            generation = self._dirty.get(username)
+            previous_version = cached[0] if generation is None else cached[0] + (generation,)
+            previous = {recipe.recipe_id: recipe for recipe in cached[1] if recipe.recipe_id in updates}
+            index = self._indexes.get(username)
+            if index is not None and index[0] == cached[0]:
+                for recipe_id, recipe in updates.items():
+                    if recipe is None:
+                        index[1].remove(recipe_id)
+                    else:
+                        index[1].add(recipe)
+                self._indexes[username] = (version, index[1])
+            else:
+                self._indexes.pop(username, None)
+            self._collections[username] = (version, _apply_changes(cached[1], updates))
+            self._journal_positions[username] = position
+            self._notify(username, previous_version,
+                         {recipe_id: (previous.get(recipe_id), recipe) for recipe_id, recipe in updates.items()
+                          if recipe is not None or recipe_id in previous})
+            return True
+    
+    def _reload_merged(self, username: str, recipes: List[Recipe], local: Set[str]) -> bool:
+        """Full-reload side of refresh(); keeps this session's unflushed recipes"""
+        self._indexes.pop(username, None)
+        self._journal_positions.pop(username, None)
+        if username not in self._dirty:
+            # The next load_recipes reads (and reports problems) as usual
+            self._collections.pop(username, None)
+            return True
+        position = self.changes.position(username)
+        try:
+            result = self.backend.load(username, repair=False)
+        except Exception:
+            # Keep the in-memory copy; the next flush writes it back
+            return False
+        ours = {recipe.recipe_id: recipe for recipe in recipes}
+        merged = _apply_changes(result.recipes, {recipe_id: ours.get(recipe_id) for recipe_id in local})
+        self._collections[username] = (result.version, merged)
+        self._journal_positions[username] = position
+        return True
     
     def save_recipes(self, username: str, recipes: List[Recipe]) -> bool:
-        filename = self.get_user_file(username)
+        self._indexes.pop(username, None)
+        return self._write_recipes(username, recipes)
+    
+    def _announce(self, username: str, version: Optional[tuple], changed: Optional[Iterable[str]]) -> None:
         try:
-            with open(filename, 'w', encoding='utf-8') as file:
-                json.dump([recipe.to_dict() for recipe in recipes], 
-                         file, ensure_ascii=False, indent=2)
+            self.changes.append(username, version, changed)
+        except OSError:
+            # Other sessions then notice the new version and reload in full
+            pass
+    
+    def _write_recipes(self, username: str, recipes: List[Recipe], changed: Optional[Iterable[str]] = None) -> bool:
+        """Synchronous write; supersedes any pending write-behind changes.
+
+        `changed` names the recipes that differ from the stored copy, if known,
+        so other sessions can patch just those in.
+        """
+        with self._write_lock:
+            try:
+                version = self.backend.save_all(username, recipes)
+            except Exception as e:
+                with self._lock:
+                    self._collections.pop(username, None)
+                    self._dirty.pop(username, None)
+                    self._dirty_ids.pop(username, None)
+                    self._deadlines.pop(username, None)
+                ConsoleManager.print_error(f"Error saving recipes: {e}")
+                return False
+            self._announce(username, version, changed)
+            with self._lock:
+                self._collections[username] = (version, list(recipes))
+                self._dirty.pop(username, None)
+                self._dirty_ids.pop(username, None)
+                self._deadlines.pop(username, None)
+                self._write_errors.pop(username, None)
+                if changed is None:
+                    # Everything stored now came from here
+                    self._journal_positions[username] = self.changes.position(username)
             return True
-        except Exception as e:
-            ConsoleManager.print_error(f"Error saving recipes: {e}")
-            return False
+    
+    def _sync_index(self, username: str, previous_version: Optional[tuple], change) -> None:
+        """Apply a single-recipe change to a live index instead of rebuilding it"""
+        self._indexes.patch(username, previous_version, self._stored_version(username), change)
+    
+    def _write_change(self, username: str, recipes: List[Recipe], stored: Optional[Recipe],
+                      removed: Optional[str]) -> bool:
+        """Synchronous single-recipe write: one put/delete where the backend supports it"""
+        changed = [stored.recipe_id if stored is not None else removed]
+        if not self.backend.incremental:
+            return self._write_recipes(username, recipes, changed)
+        with self._write_lock:
+            try:
+                if stored is not None:
+                    version = self.backend.put(username, stored)
+                else:
+                    version = self.backend.delete(username, removed)
+            except Exception as e:
+                with self._lock:
+                    self._collections.pop(username, None)
+                ConsoleManager.print_error(f"Error saving recipes: {e}")
+                return False
+            self._announce(username, version, changed)
+            with self._lock:
+                self._collections[username] = (version, list(recipes))
+            return True
+    
+    def _commit(self, username: str, previous_version: Optional[tuple], recipes: List[Recipe], change,
+                durable: bool, stored: Optional[Recipe] = None, removed: Optional[str] = None) -> bool:
+        """Persist a single-recipe change (`stored` put or `removed` deleted).
+
+        Backends that write one recipe in O(1) are written through directly;
+        otherwise the collection is rewritten now or via the write-behind queue.
+        """
+        if self.write_behind_ms is None or self.backend.incremental:
+            if not self._write_change(username, recipes, stored, removed):
+                return False
+            self._sync_index(username, previous_version, change)
+            return True
+        
+        with self._lock:
+            cached = self._collections.get(username)
+            version = cached[0] if cached is not None else previous_version
+            index = self._indexes.get(username)
+            if index is not None and index[0] == version:
+                change(index[1])
+            else:
+                self._indexes.pop(username, None)
+            self._collections[username] = (version, recipes)
+            self._generation += 1
+            self._dirty[username] = self._generation
+            self._dirty_ids.setdefault(username, set()).add(stored.recipe_id if stored is not None else removed)
+            self._deadlines.setdefault(username, time.monotonic() + self.write_behind_ms / 1000)
+            self._start_writer()
+            self._wakeup.notify()
+        return self.flush(username) if durable else True
+    
+    def _start_writer(self) -> None:
+        if self._writer is None:
+            import atexit
+            self._writer = threading.Thread(target=self._writer_loop, name="recipe-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+    
+    def _writer_loop(self) -> None:
+        while True:
+            with self._wakeup:
+                while not self._deadlines and not self._closing:
+                    self._wakeup.wait()
+                if self._closing:
+                    return
+                username, deadline = min(self._deadlines.items(), key=lambda item: item[1])
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                    continue
+                del self._deadlines[username]
+            self._flush_user(username)
+    
+    def _flush_user(self, username: str) -> bool:
+        """Write one user's current in-memory collection if it has unflushed changes"""
+        with self._write_lock:
+            # Fold in what other sessions wrote meanwhile, so this rewrite keeps it
+            self.refresh(username)
+            with self._lock:
+                generation = self._dirty.get(username)
+                if generation is None:
+                    return True
+                version, recipes = self._collections[username]
+                recipes = list(recipes)
+                changed = self._dirty_ids.pop(username, set())
+            try:
+                new_version = self.backend.save_all(username, recipes)
+            except Exception as e:
+                with self._lock:
+                    # Keep the changes and retry on the next interval
+                    self._dirty_ids.setdefault(username, set()).update(changed)
+                    self._write_errors[username] = str(e)
+                    if not self._closing:
+                        self._deadlines.setdefault(username, time.monotonic() + self.write_behind_ms / 1000)
+                return False
+            self._announce(username, new_version, changed)
+            with self._lock:
+                self._write_errors.pop(username, None)
+                # What get_version reported until now
+                previous_version = version + (self._dirty.get(username, generation),)
+                if self._dirty.get(username) == generation:
+                    del self._dirty[username]
+                # Re-tag the cached state so it matches the file just written;
+                # if newer changes arrived meanwhile they stay dirty
+                self._collections[username] = (new_version, self._collections[username][1])
+                index = self._indexes.get(username)
+                if index is not None and index[0] == version:
+                    self._indexes[username] = (new_version, index[1])
+            self._notify(username, previous_version, {})
+            return True
+    
+    def flush(self, username: Optional[str] = None) -> bool:
+        """Write pending changes now, for one user or all of them"""
+        with self._lock:
+            usernames = [username] if username is not None else list(self._dirty)
+            for name in usernames:
+                self._deadlines.pop(name, None)
+        ok = True
+        for name in usernames:
+            if not self._flush_user(name):
+                ConsoleManager.print_error(f"Error saving recipes: {self._write_errors.get(name)}")
+                ok = False
+        return ok
+    
+    def has_pending_writes(self, username: Optional[str] = None) -> bool:
+        with self._lock:
+            return bool(self._dirty) if username is None else username in self._dirty
+    
+    def close(self) -> bool:
+        """Flush everything and stop the background writer"""
+        ok = self.flush()
+        with self._wakeup:
+            self._closing = True
+            self._wakeup.notify_all()
+        self.backend.close()
+        return ok
+    
+    def get_index(self, username: str) -> RecipeIndex:
+        """Return the user's facet index, rebuilding it only when the file changed on disk"""
+        recipes = self.load_recipes(username)
+        with self._lock:
+            if username in self._dirty:
+                version = self._collections[username][0]
+            else:
+                version = self._stored_version(username)
+        return self._indexes.fetch(username, version, lambda: RecipeIndex(recipes))
+    
+    def query_recipes(self, username: str, query: RecipeQuery) -> RecipeQueryResult:
+        """Filter by any combination of facets, returning one page plus facet counts"""
+        return self.get_index(username).query(query)
     
     def create_user(self, username: str) -> bool:
-        filename = self.get_user_file(username)
-        if os.path.exists(filename):
+        if self.backend.exists(username):
             return False
         
         try:
-            with open(filename, 'w', encoding='utf-8') as file:
-                json.dump([], file)
+            self.backend.create(username)
             return True
         except Exception as e:
             ConsoleManager.print_error(f"Error creating user: {e}")
             return False
     
     def user_exists(self, username: str) -> bool:
-        return os.path.exists(self.get_user_file(username))
+        return self.backend.exists(username)
     
-    def add_recipe(self, username: str, recipe: Recipe) -> bool:
+    def delete_user(self, username: str) -> bool:
+        """Remove a user's collection, revision history, change journal and similarity index"""
+        with self._lock:
+            self._collections.pop(username, None)
+            self._indexes.pop(username, None)
+            self._dirty.pop(username, None)
+            self._dirty_ids.pop(username, None)
+            self._deadlines.pop(username, None)
+            self._journal_positions.pop(username, None)
+        try:
+            self.backend.remove_user(username)
+        except Exception as e:
+            ConsoleManager.print_error(f"Error deleting user: {e}")
+            return False
+        self.revisions.remove_user(username)
+        self.changes.remove_user(username)
+        from services.recommendation_service import RecommendationService
+        RecommendationService(self).remove_user(username)
+        return True
+    
+    def top_recipes(self, username: str, key: str, k: int = 10, descending: bool = True) -> List[Recipe]:
+        """Top-k recipes by rating, total_time, servings, created_at or updated_at"""
+        return self.get_index(username).top_k(key, k, descending)
+    
+    def recipes_in_range(self, username: str, key: str, low=None, high=None) -> List[Recipe]:
+        """Recipes with `key` between low and high (inclusive), in ascending order"""
+        return self.get_index(username).range(key, low, high)
+    
+    def get_timeline(self, username: str) -> TimelineIndex:
+        """Creation/update timeline for histograms, streaks and date ranges"""
+        return self.get_index(username).timeline
+    
+    def recipes_between(self, username: str, kind: str, start: Optional[datetime] = None,
+                        end: Optional[datetime] = None) -> List[Recipe]:
+        """Recipes created (kind='created') or changed (kind='updated') in [start, end)"""
+        return self.get_index(username).timeline_recipes(
+            kind,
+            datetime_to_epoch(start) if start else None,
+            datetime_to_epoch(end) if end else None
+        )
+    
+    def add_recipe(self, username: str, recipe: Recipe, durable: bool = False) -> bool:
+        """Add a recipe; `durable` forces it to disk before returning in write-behind mode"""
         recipes = self.load_recipes(username)
+        version = self._stored_version(username)
+        previous_version = self.get_version(username)
         recipes.append(recipe)
-        return self.save_recipes(username, recipes)
+        if not self._commit(username, version, recipes, lambda index: index.add(recipe), durable, stored=recipe):
+            return False
+        self._notify(username, previous_version, {recipe.recipe_id: (None, recipe)})
+        return True
     
-    def update_recipe(self, username: str, recipe_id: str, updated_recipe: Recipe) -> bool:
+    def update_recipe(self, username: str, recipe_id: str, updated_recipe: Recipe, durable: bool = False) -> bool:
         recipes = self.load_recipes(username)
+        version = self._stored_version(username)
+        previous_version = self.get_version(username)
         for i, recipe in enumerate(recipes):
             if recipe.recipe_id == recipe_id:
                 updated_recipe.updated_at = datetime.now().isoformat()
                 recipes[i] = updated_recipe
-                return self.save_recipes(username, recipes)
+                if not self._commit(username, version, recipes, lambda index: index.update(updated_recipe),
+                                    durable, stored=updated_recipe):
+                    return False
+                if recipe is not updated_recipe:
+                    self._notify(username, previous_version, {recipe_id: (recipe, updated_recipe)})
+                # A recipe edited in place is its own previous version; the
+                # history's latest revision stands in for it then
+                self.revisions.record(username, updated_recipe, recipe if recipe is not updated_recipe else None)
+                return True
         return False
     
-    def delete_recipe(self, username: str, recipe_id: str) -> bool:
+    def update_recipes(self, username: str, updated: List[Recipe]) -> bool:
+        """Replace several recipes with a single write.
+
+        Like update_recipe, every replaced recipe gets a new updated_at and a
+        revision; recipes not in the collection are ignored.
+        """
         recipes = self.load_recipes(username)
-        original_count = len(recipes)
+        previous_version = self.get_version(username)
+        previous = {recipe.recipe_id: recipe for recipe in recipes}
+        now = datetime.now().isoformat()
+        changes: Dict[str, Recipe] = {}
+        for recipe in updated:
+            if recipe.recipe_id in previous:
+                recipe.updated_at = now
+                changes[recipe.recipe_id] = recipe
+        if not changes:
+            return True
+        self._indexes.pop(username, None)
+        if not self._write_recipes(username, [changes.get(r.recipe_id, r) for r in recipes], changes):
+            return False
+        # Recipes edited in place have no old state left to report
+        if all(previous[recipe_id] is not recipe for recipe_id, recipe in changes.items()):
+            self._notify(username, previous_version,
+                         {recipe_id: (previous[recipe_id], recipe) for recipe_id, recipe in changes.items()})
+        for recipe_id, recipe in changes.items():
+            old = previous[recipe_id]
+            self.revisions.record(username, recipe, old if old is not recipe else None)
+        return True
+    
+    def replace_recipes(self, username: str, recipes: List[Recipe]) -> bool:
+        """Make the collection exactly `recipes` with a single write, e.g. to restore a backup.
+
+        Unlike save_recipes, every added, changed or removed recipe gets a
+        revision (and changed ones a new updated_at), so the replacement can
+        be reviewed and undone recipe by recipe.
+        """
+        current = {recipe.recipe_id: recipe for recipe in self.load_recipes(username)}
+        previous_version = self.get_version(username)
+        now = datetime.now().isoformat()
+        result = []
+        changes: Dict[str, Recipe] = {}
+        for recipe in recipes:
+            old = current.get(recipe.recipe_id)
+            if old is not None and not field_delta(old.to_dict(), recipe.to_dict()):
+                result.append(old)
+                continue
+            recipe.updated_at = now
+            changes[recipe.recipe_id] = recipe
+            result.append(recipe)
+        kept = {recipe.recipe_id for recipe in result}
+        removed = [recipe for recipe_id, recipe in current.items() if recipe_id not in kept]
+        if not changes and not removed:
+            return True
+        self._indexes.pop(username, None)
+        if not self._write_recipes(username, result, list(changes) + [recipe.recipe_id for recipe in removed]):
+            return False
+        notified = {recipe_id: (current.get(recipe_id), recipe) for recipe_id, recipe in changes.items()}
+        notified.update((recipe.recipe_id, (recipe, None)) for recipe in removed)
+        self._notify(username, previous_version, notified)
+        for recipe_id, recipe in changes.items():
+            self.revisions.record(username, recipe, current.get(recipe_id))
+        for recipe in removed:
+            self.revisions.record_deleted(username, recipe)
+        return True
+    
+    def delete_recipe(self, username: str, recipe_id: str, durable: bool = False) -> bool:
+        recipes = self.load_recipes(username)
+        version = self._stored_version(username)
+        previous_version = self.get_version(username)
+        deleted = next((r for r in recipes if r.recipe_id == recipe_id), None)
+        if deleted is None:
+            return False
         recipes = [r for r in recipes if r.recipe_id != recipe_id]
-        if len(recipes) < original_count:
-            return self.save_recipes(username, recipes)
-        return False
+        if not self._commit(username, version, recipes, lambda index: index.remove(recipe_id), durable,
+                            removed=recipe_id):
+            return False
+        self._notify(username, previous_version, {recipe_id: (deleted, None)})
+        self.revisions.record_deleted(username, deleted)
+        return True
+    
+    def list_revisions(self, username: str, recipe_id: str) -> List[Revision]:
+        return self.revisions.list_revisions(username, recipe_id)
+    
+    def diff_revisions(self, username: str, recipe_id: str, first: int,
+                       second: int) -> Optional[Dict[str, Tuple[Any, Any]]]:
+        return self.revisions.diff(username, recipe_id, first, second)
+    
+    def restore_revision(self, username: str, recipe_id: str, number: int) -> Optional[Recipe]:
+        """Make revision `number` current again (re-adding the recipe if it was deleted)"""
+        restored = self.revisions.get_revision(username, recipe_id, number)
+        if restored is None:
+            return None
+        if any(recipe.recipe_id == recipe_id for recipe in self.load_recipes(username)):
+            return restored if self.update_recipe(username, recipe_id, restored) else None
+        restored.updated_at = datetime.now().isoformat()
+        if not self.add_recipe(username, restored):
+            return None
+        self.revisions.record(username, restored)
+        return restored
     
     def search_recipes(self, username: str, query: str) -> List[Recipe]:
         recipes = self.load_recipes(username)
@@ -97,15 +683,19 @@ class RecipeService:
         return results
     
     def get_favorites(self, username: str) -> List[Recipe]:
-        recipes = self.load_recipes(username)
-        return [recipe for recipe in recipes if recipe.is_favorite]
+        index = self.get_index(username)
+        return index.recipes(index.match(RecipeQuery(favorite=True)))
     
     def get_by_category(self, username: str, category: RecipeCategory) -> List[Recipe]:
-        recipes = self.load_recipes(username)
-        return [recipe for recipe in recipes if recipe.category == category]
+        index = self.get_index(username)
+        return index.recipes(index.match(RecipeQuery(category=category)))
     
     def get_statistics(self, username: str) -> Dict[str, Any]:
-        recipes = self.load_recipes(username)
+        return self.summarize(self.load_recipes(username))
+    
+    @staticmethod
+    def summarize(recipes: List[Recipe]) -> Dict[str, Any]:
+        """Counts by category and difficulty, favorites and the average rating"""
         categories = {}
         total_favorites = 0
         difficulties = {}
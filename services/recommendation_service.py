@@ -0,0 +1,213 @@
+# services/recommendation_service.py
+import json
+import math
+import os
+import heapq
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+# Import models
+from models.recipe import Recipe
+from services.recipe_service import RecipeService
+from services.record_storage import atomic_write
+from utils.console_utils import ConsoleManager
+
+Vector = Dict[str, float]
+Neighbours = List[Tuple[str, float]]
+
+# Rebuild from scratch once this share of the collection has changed, since
+# document frequencies will have drifted too far for patch-ups to be accurate
+FULL_REBUILD_RATIO = 0.25
+
+def recipe_terms(recipe: Recipe) -> List[str]:
+    """Features used for similarity: canonical ingredients, tags and category"""
+    terms = {f"ing:{ing.canonical_name}" for ing in recipe.ingredients if ing.canonical_name}
+    terms.update(f"tag:{tag.strip().lower()}" for tag in recipe.tags if tag.strip())
+    terms.add(f"cat:{recipe.category.value}")
+    return sorted(terms)
+
+class SimilarityModel:
+    """TF-IDF vectors and an inverted index that can be patched recipe by recipe.
+
+    Document frequencies are kept as counts, so adding or removing a recipe
+    only touches its own terms. Vectors of untouched recipes keep the IDF
+    weights they were built with until the next full rebuild.
+    """
+
+    def __init__(self, recipes: List[Recipe]):
+        self.terms: Dict[str, List[str]] = {}
+        self.document_frequency: Dict[str, int] = defaultdict(int)
+        self.vectors: Dict[str, Vector] = {}
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        for recipe in recipes:
+            self._add_terms(recipe)
+        for rid in self.terms:
+            self._vectorize(rid)
+
+    def update(self, changed: List[Recipe], removed: Iterable[str]):
+        """Re-vectorize added or changed recipes and drop removed ones"""
+        for rid in list(removed) + [recipe.recipe_id for recipe in changed]:
+            self._remove(rid)
+        for recipe in changed:
+            self._add_terms(recipe)
+        for recipe in changed:
+            self._vectorize(recipe.recipe_id)
+
+    def _add_terms(self, recipe: Recipe):
+        terms = recipe_terms(recipe)
+        self.terms[recipe.recipe_id] = terms
+        for term in terms:
+            self.document_frequency[term] += 1
+
+    def _remove(self, rid: str):
+        for term in self.terms.pop(rid, ()):
+            self.document_frequency[term] -= 1
+            if not self.document_frequency[term]:
+                del self.document_frequency[term]
+            self.postings[term].discard(rid)
+            if not self.postings[term]:
+                del self.postings[term]
+        self.vectors.pop(rid, None)
+
+    def _vectorize(self, rid: str):
+        """TF-IDF weighted, L2-normalised sparse vector for one recipe"""
+        total = len(self.terms)
+        weights = {term: math.log((total + 1) / (self.document_frequency[term] + 1)) + 1
+                   for term in self.terms[rid]}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        self.vectors[rid] = {term: w / norm for term, w in weights.items()}
+        for term in weights:
+            self.postings[term].add(rid)
+
+class RecommendationService:
+    def __init__(self, recipe_service: RecipeService, k: int = 10):
+        self.recipe_service = recipe_service
+        self.k = k
+        # username -> {"k", "signatures", "neighbours"} as persisted, plus the
+        # collection "version" it was checked against and the live "model"
+        self._state: Dict[str, dict] = {}
+
+    def get_index_file(self, username: str) -> str:
+        return os.path.join(self.recipe_service.data_dir, f"similar_{username}.json")
+
+    def get_similar(self, username: str, recipe_id: str, limit: int = 5) -> List[Tuple[Recipe, float]]:
+        """Return the most similar recipes with their cosine similarity scores.
+
+        While the collection version is unchanged this is a dictionary lookup;
+        otherwise the neighbour lists are brought up to date first.
+        """
+        version = self.recipe_service.get_version(username)
+        state = self._state.get(username)
+        if state is None or state.get("version") != version or state["k"] != self.k:
+            state = self.refresh(username, self.recipe_service.load_recipes(username))
+            state["version"] = version
+        index = self.recipe_service.get_index(username)
+        similar = []
+        for other_id, score in state["neighbours"].get(recipe_id, [])[:limit]:
+            other = index.get(other_id)
+            if other is not None:
+                similar.append((other, score))
+        return similar
+
+    def refresh(self, username: str, recipes: List[Recipe]) -> dict:
+        """Bring the persisted neighbour lists up to date with the collection"""
+        state = self._state.get(username) or self._load_state(username)
+        signatures = {recipe.recipe_id: recipe.updated_at for recipe in recipes}
+        old_signatures = state["signatures"]
+
+        changed = {rid for rid, sig in signatures.items() if old_signatures.get(rid) != sig}
+        removed = set(old_signatures) - set(signatures)
+        if not changed and not removed and state["k"] == self.k:
+            self._state[username] = state
+            return state
+
+        dirty = len(changed) + len(removed)
+        full = state["k"] != self.k or not old_signatures or dirty > FULL_REBUILD_RATIO * max(len(recipes), 1)
+        model = state.get("model")
+        if full or model is None:
+            model = SimilarityModel(recipes)
+        else:
+            model.update([recipe for recipe in recipes if recipe.recipe_id in changed], removed)
+        if full:
+            neighbours = {rid: self._top_k(rid, model) for rid in model.vectors}
+        else:
+            neighbours = self._patch(state["neighbours"], model, changed, removed)
+
+        state = {"k": self.k, "signatures": signatures, "neighbours": neighbours, "model": model}
+        self._state[username] = state
+        self._save_state(username, state)
+        return state
+
+    def _patch(self, neighbours: Dict[str, Neighbours], model: SimilarityModel,
+               changed: set, removed: set) -> Dict[str, Neighbours]:
+        """Update only the neighbour lists affected by changed or removed recipes"""
+        vectors = model.vectors
+        stale = changed | removed
+        result = {}
+        for rid in vectors:
+            if rid in changed:
+                result[rid] = self._top_k(rid, model)
+                continue
+            kept = [(other, score) for other, score in neighbours.get(rid, []) if other not in stale]
+            if len(kept) < len(neighbours.get(rid, [])) and len(kept) < self.k:
+                # A neighbour dropped out, so the list may be missing candidates
+                result[rid] = self._top_k(rid, model)
+                continue
+            for other in changed:
+                if other != rid:
+                    score = self._cosine(vectors[rid], vectors[other])
+                    if score > 0:
+                        kept.append((other, round(score, 4)))
+            result[rid] = heapq.nlargest(self.k, kept, key=lambda item: item[1])
+        return result
+
+    @staticmethod
+    def _cosine(a: Vector, b: Vector) -> float:
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+    def _top_k(self, rid: str, model: SimilarityModel) -> Neighbours:
+        """Score only recipes sharing at least one term, via the inverted index"""
+        vectors = model.vectors
+        scores = defaultdict(float)
+        for term, weight in vectors[rid].items():
+            for other in model.postings[term]:
+                if other != rid:
+                    scores[other] += weight * vectors[other][term]
+        best = heapq.nlargest(self.k, scores.items(), key=lambda item: item[1])
+        return [(other, round(score, 4)) for other, score in best]
+
+    def _load_state(self, username: str) -> dict:
+        empty = {"k": self.k, "signatures": {}, "neighbours": {}}
+        filename = self.get_index_file(username)
+        if not os.path.exists(filename):
+            return empty
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            data["neighbours"] = {rid: [tuple(item) for item in items]
+                                  for rid, items in data["neighbours"].items()}
+            return data
+        except (OSError, ValueError, KeyError):
+            return empty
+
+    def _save_state(self, username: str, state: dict):
+        """Write through a temporary file so a crash never leaves half an index"""
+        path = self.get_index_file(username)
+        try:
+            with atomic_write(path, 'w', encoding='utf-8') as f:
+                json.dump({key: state[key] for key in ("k", "signatures", "neighbours")}, f)
+        except OSError as e:
+            ConsoleManager.print_error(f"Error saving similarity index: {e}")
+
+    def remove_user(self, username: str):
+        self._state.pop(username, None)
+        if os.path.exists(self.get_index_file(username)):
+            os.remove(self.get_index_file(username))
+
+    def rename_user(self, old: str, new: str):
+        self._state.pop(old, None)
+        self._state.pop(new, None)
+        if os.path.exists(self.get_index_file(old)):
+            os.replace(self.get_index_file(old), self.get_index_file(new))
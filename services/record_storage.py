@@ -0,0 +1,334 @@
+# services/record_storage.py
+import io
+import json
+import os
+import uuid
+from binascii import crc32
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from services.migrations import CURRENT_SCHEMA_VERSION
+
+FRAME_FORMAT = "recipe-frames"
+FRAME_VERSION = 1
+
+# One record per line:  <crc32 as 8 hex digits> <payload length> <JSON payload>\n
+# The first frame is a header naming the format and the document's schema
+# version; every following frame is one recipe.
+
+# Files may also be stored compressed; the codec is recognized from its
+# magic bytes, none of which can start a frame or a JSON document
+COMPRESSIONS = ("gzip", "lzma", "zlib")
+DEFAULT_LEVELS = {"gzip": 6, "lzma": 6, "zlib": 6}
+# Files are written plain unless a codec is chosen (RECIPE_COMPRESSION);
+# gzip at level 6 shrinks typical collections ~6x for a modest write cost,
+# see benchmarks/compression_benchmark.py for the other trade-offs
+DEFAULT_COMPRESSION = None
+
+@dataclass
+class ReadResult:
+    document: Any
+    framed: bool
+    # (byte offset, raw bytes) of every frame that failed verification
+    damaged: List[Tuple[int, bytes]] = field(default_factory=list)
+    compression: Optional[str] = None
+    # Set when a compressed stream broke off; frames before the break are kept
+    stream_error: Optional[str] = None
+
+def detect_compression(start: bytes) -> Optional[str]:
+    if start.startswith(b"\x1f\x8b"):
+        return "gzip"
+    if start.startswith(b"\xfd7zXZ\x00"):
+        return "lzma"
+    if len(start) >= 2 and start[0] == 0x78 and (start[0] << 8 | start[1]) % 31 == 0:
+        return "zlib"
+    return None
+
+class _ZlibReader(io.RawIOBase):
+    """Streaming inflate of a bare zlib file"""
+
+    def __init__(self, path: str):
+        import zlib
+        self._file = open(path, 'rb')
+        self._inflate = zlib.decompressobj()
+        self._error = zlib.error
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self._buffer:
+            chunk = self._file.read(1 << 16)
+            if chunk:
+                self._buffer = self._inflate.decompress(chunk)
+                continue
+            self._buffer = self._inflate.flush()
+            if not self._buffer:
+                if not self._inflate.eof:
+                    raise self._error("compressed stream is truncated")
+                return 0
+        count = min(len(target), len(self._buffer))
+        target[:count] = self._buffer[:count]
+        self._buffer = self._buffer[count:]
+        return count
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+class _ZlibWriter(io.RawIOBase):
+    """Streaming deflate into a bare zlib file"""
+
+    def __init__(self, path: str, level: int):
+        import zlib
+        self._file = open(path, 'wb')
+        self._deflate = zlib.compressobj(level)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._file.write(self._deflate.compress(bytes(data)))
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._file.write(self._deflate.flush())
+            self._file.close()
+        super().close()
+
+def open_stream(path: str, mode: str = 'rb', compression: Optional[str] = None, level: Optional[int] = None):
+    """Binary file object that (de)compresses on the fly; reading detects the codec"""
+    if mode == 'rb':
+        with open(path, 'rb') as f:
+            compression = detect_compression(f.read(6))
+    elif compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+    if compression is None:
+        return open(path, mode)
+    if level is None:
+        level = DEFAULT_LEVELS[compression]
+    if compression == "gzip":
+        import gzip
+        return gzip.open(path, mode, compresslevel=level) if mode == 'wb' else gzip.open(path, mode)
+    if compression == "lzma":
+        import lzma
+        return lzma.open(path, mode, preset=level) if mode == 'wb' else lzma.open(path, mode)
+    if mode == 'wb':
+        return io.BufferedWriter(_ZlibWriter(path, level))
+    return io.BufferedReader(_ZlibReader(path))
+
+def _stream_errors(compression: Optional[str]) -> tuple:
+    if compression == "lzma":
+        import lzma
+        return (OSError, EOFError, lzma.LZMAError)
+    if compression in ("gzip", "zlib"):
+        import zlib
+        return (OSError, EOFError, zlib.error)
+    return (OSError,)
+
+def encode_frame(record: Any) -> bytes:
+    payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return b"%08x %d " % (crc32(payload), len(payload)) + payload + b"\n"
+
+def temp_path_for(path: str) -> str:
+    """A temporary name next to `path` that no other writer (thread, session or process) uses"""
+    return f"{path}.{os.getpid()}-{uuid.uuid4().hex[:12]}.tmp"
+
+def _discard(temp_path: str) -> None:
+    try:
+        os.remove(temp_path)
+    except OSError:
+        pass
+
+def replace_file(temp_path: str, path: str) -> None:
+    """Flush a finished temporary file to disk, then move it over `path`"""
+    with open(temp_path, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'wb', encoding: Optional[str] = None):
+    """File object for replacing `path`: readers see the old file until the new one is complete and on disk"""
+    temp_path = temp_path_for(path)
+    try:
+        with open(temp_path, mode.replace('w', 'x'), encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        _discard(temp_path)
+        raise
+
+def write_document(path: str, document: Dict, compression: Optional[str] = None,
+                   level: Optional[int] = None) -> None:
+    """Write a {"schema_version", "recipes"} document as frames, replacing the file atomically"""
+    recipes = document["recipes"]
+    header = {"format": FRAME_FORMAT, "version": FRAME_VERSION,
+              "schema_version": document["schema_version"], "count": len(recipes)}
+    temp_path = temp_path_for(path)
+    try:
+        with open_stream(temp_path, 'wb', compression, level) as f:
+            f.write(encode_frame(header))
+            for record in recipes:
+                f.write(encode_frame(record))
+        replace_file(temp_path, path)
+    except BaseException:
+        _discard(temp_path)
+        raise
+
+def _split_frame(line: bytes) -> Tuple[Optional[bytes], bytes]:
+    """Return (verified payload or None, unconsumed bytes of the line).
+
+    A frame whose newline was damaged shares a line with the next frame; the
+    length field lets the first be verified and the rest scanned separately
+    (skipping the one separator byte, whatever it was damaged into).
+    """
+    if len(line) < 11 or line[8:9] != b" ":
+        return None, b""
+    space = line.find(b" ", 9)
+    try:
+        checksum = int(line[:8], 16)
+        length = int(line[9:space]) if space > 9 else -1
+    except ValueError:
+        return None, b""
+    start = space + 1
+    payload = line[start:start + length]
+    if length < 0 or len(payload) != length or crc32(payload) != checksum:
+        return None, b""
+    return payload, line[start + length + 1:]
+
+def iter_frames(f) -> Iterator[Tuple[int, Optional[bytes], bytes]]:
+    """Yield (offset, payload, raw) for each frame; payload is None when the checksum fails"""
+    offset = 0
+    for line in f:
+        position = offset
+        offset += len(line)
+        while line:
+            payload, rest = _split_frame(line)
+            if payload is None:
+                yield position, None, line.rstrip(b"\n")
+                break
+            consumed = len(line) - len(rest)
+            yield position, payload, line[:consumed]
+            position += consumed
+            line = rest
+
+def is_framed(path: str) -> bool:
+    with open_stream(path) as f:
+        start = f.read(64).lstrip()
+    return not start[:1] in (b"{", b"[")
+
+def read_document(path: str) -> ReadResult:
+    """Read a user file in either format.
+
+    Legacy JSON files are returned as parsed (and raise ValueError if they
+    do not parse). Framed files are scanned frame by frame: every frame that
+    verifies is kept and the rest are reported in `damaged`, so one bad byte
+    costs at most the record it landed in.
+    """
+    with open(path, 'rb') as f:
+        compression = detect_compression(f.read(6))
+    if not is_framed(path):
+        with open_stream(path) as f:
+            return ReadResult(json.load(io.TextIOWrapper(f, encoding='utf-8')), framed=False,
+                              compression=compression)
+
+    header: Optional[Dict] = None
+    recipes = []
+    damaged = []
+    stream_error = None
+    with open_stream(path) as f:
+        try:
+            for offset, payload, raw in iter_frames(f):
+                if payload is None:
+                    damaged.append((offset, raw))
+                    continue
+                try:
+                    record = json.loads(payload)
+                except ValueError:
+                    damaged.append((offset, raw))
+                    continue
+                if header is None and offset == 0 and isinstance(record, dict) and record.get("format") == FRAME_FORMAT:
+                    header = record
+                else:
+                    recipes.append(record)
+        except _stream_errors(compression) as e:
+            stream_error = str(e) or type(e).__name__
+
+    if header is not None and header.get("version", FRAME_VERSION) > FRAME_VERSION:
+        raise ValueError(f"Recipe file uses frame format {header['version']}, newer than supported {FRAME_VERSION}")
+    # Without a readable header the records are taken to be current; frames
+    # are always written at the schema that was current at the time
+    schema = header["schema_version"] if header is not None else CURRENT_SCHEMA_VERSION
+    return ReadResult({"schema_version": schema, "recipes": recipes}, framed=True, damaged=damaged,
+                      compression=compression, stream_error=stream_error)
+
+def find_records(path: str, key: str, values) -> Optional[Dict[str, Dict]]:
+    """Decode only the frames whose string field `key` is one of `values`.
+
+    Frames are matched on the raw `"key":"value"` bytes (a quote inside a
+    JSON string is always escaped, so only the field itself can match), so
+    every other frame is checksummed but never parsed. Returns None when the
+    file is not framed at the current schema or is damaged; read_document
+    handles those.
+    """
+    marker = b'"%s":"' % key.encode('utf-8')
+    wanted = {value.encode('utf-8') for value in values}
+    found: Dict[str, Dict] = {}
+    with open(path, 'rb') as f:
+        compression = detect_compression(f.read(6))
+    if not is_framed(path):
+        return None
+    with open_stream(path) as f:
+        try:
+            for offset, payload, _ in iter_frames(f):
+                if payload is None:
+                    return None
+                if offset == 0:
+                    header = json.loads(payload)
+                    if header.get("format") != FRAME_FORMAT or header.get("version", FRAME_VERSION) > FRAME_VERSION \
+                            or header.get("schema_version") != CURRENT_SCHEMA_VERSION:
+                        return None
+                    continue
+                start = payload.find(marker)
+                if start < 0:
+                    continue
+                start += len(marker)
+                value = payload[start:payload.find(b'"', start)]
+                if value in wanted:
+                    record = json.loads(payload)
+                    found[record[key]] = record
+        except _stream_errors(compression):
+            return None
+    return found
+
+def verify(path: str) -> Dict[str, int]:
+    """Checksum every frame without decoding JSON; runs at roughly disk read speed"""
+    frames = bad = size = 0
+    with open(path, 'rb') as f:
+        compression = detect_compression(f.read(6))
+    with open_stream(path) as f:
+        try:
+            for _, payload, raw in iter_frames(f):
+                frames += 1
+                size += len(raw)
+                if payload is None:
+                    bad += 1
+        except _stream_errors(compression):
+            # Everything after a broken compressed stream is lost
+            bad += 1
+    return {"frames": frames, "damaged": bad, "bytes": size}
+
+def quarantine(directory: str, name: str, damaged: List[Tuple[int, bytes]]) -> str:
+    """Save damaged frames (with their offsets) for manual inspection; returns the file path"""
+    from datetime import datetime
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.bad")
+    with open(path, 'wb') as f:
+        for offset, raw in damaged:
+            f.write(b"@%d " % offset + raw + b"\n")
+    return path
@@ -0,0 +1,242 @@
+# services/revision_history.py
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Import models
+from models.recipe import Recipe
+from services.migrations import CURRENT_SCHEMA_VERSION, upgrade
+from services.record_storage import encode_frame, iter_frames
+
+# A full copy is stored at least every this many revisions of a recipe, so
+# rebuilding any revision replays no more than this many deltas
+CHECKPOINT_INTERVAL = 10
+
+# Fields that change on every save and would make every revision differ
+_IGNORED_FIELDS = ("updated_at",)
+
+@dataclass
+class Revision:
+    """One entry of a recipe's history; `fields` lists what changed from the previous revision"""
+    number: int
+    timestamp: str
+    kind: str  # "full", "delta" or "deleted"
+    fields: List[str] = field(default_factory=list)
+    offset: int = field(default=0, repr=False)
+
+def _complete_lines(f, consumed: List[int]) -> Iterator[bytes]:
+    """Lines of `f` up to the first without a newline, counting their bytes in consumed[0]
+
+    A frame another session is still appending has no newline yet; it is
+    left for the next scan rather than taken for a damaged record.
+    """
+    for line in f:
+        if not line.endswith(b"\n"):
+            return
+        consumed[0] += len(line)
+        yield line
+
+def field_delta(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level fields of `new` that differ from `old`, with their new values"""
+    return {name: value for name, value in new.items()
+            if name not in _IGNORED_FIELDS and old.get(name) != value}
+
+class RevisionHistory:
+    """Per-user, append-only log of recipe revisions.
+
+    Each record is one checksummed frame in data/history/<username>.log
+    holding either a full copy of a recipe or only the fields that changed
+    since its previous revision. Only revision metadata and file offsets are
+    kept in memory; rebuilding a revision seeks to the nearest checkpoint at
+    or before it and replays the deltas after it. The log is read
+    incrementally, so appends made by another session are picked up by
+    scanning only the new tail.
+
+    The log is never compacted: every revision of every recipe, deleted ones
+    included, is kept until the user is removed. Deleting the file discards
+    the history without affecting the recipes. Without a data directory the
+    logs are kept in memory for the life of this object.
+    """
+
+    def __init__(self, data_dir: Optional[str] = "data"):
+        self.directory = os.path.join(data_dir, "history") if data_dir is not None else None
+        # username -> log contents, when there is no directory
+        self._buffers: Dict[str, bytearray] = {}
+        # username -> (bytes scanned, {recipe_id: [Revision, ...]})
+        self._logs: Dict[str, Tuple[int, Dict[str, List[Revision]]]] = {}
+
+    def get_log_file(self, username: str) -> str:
+        return os.path.join(self.directory, f"{username}.log")
+
+    def _size(self, username: str) -> Optional[int]:
+        if self.directory is None:
+            buffer = self._buffers.get(username)
+            return len(buffer) if buffer is not None else None
+        try:
+            return os.path.getsize(self.get_log_file(username))
+        except OSError:
+            return None
+
+    def _lines(self, username: str, start: int) -> Iterator[bytes]:
+        """Lines of the log from byte `start` on"""
+        if self.directory is None:
+            buffer = self._buffers.get(username, b"")
+            while start < len(buffer):
+                end = buffer.find(b"\n", start) + 1 or len(buffer)
+                yield bytes(buffer[start:end])
+                start = end
+            return
+        with open(self.get_log_file(username), 'rb') as f:
+            f.seek(start)
+            yield from f
+
+    def _entries(self, username: str) -> Dict[str, List[Revision]]:
+        size = self._size(username)
+        if size is None:
+            self._logs.pop(username, None)
+            return {}
+        scanned, entries = self._logs.get(username, (0, None))
+        if entries is None or size < scanned:
+            scanned, entries = 0, {}
+        if size > scanned:
+            consumed = [0]
+            for offset, payload, _ in iter_frames(_complete_lines(self._lines(username, scanned), consumed)):
+                if payload is None:
+                    continue
+                try:
+                    record = json.loads(payload)
+                except ValueError:
+                    continue
+                changed = record.get("changed", sorted(record.get("data") or ()))
+                entries.setdefault(record["id"], []).append(Revision(
+                    record["rev"], record["at"], record["kind"], changed, scanned + offset))
+            scanned += consumed[0]
+        self._logs[username] = (scanned, entries)
+        return entries
+
+    def _append(self, username: str, recipe_id: str, kind: str, data: Optional[Dict] = None,
+                changed: Optional[List[str]] = None) -> Revision:
+        history = self._entries(username).get(recipe_id)
+        record = {"id": recipe_id, "rev": history[-1].number + 1 if history else 1,
+                  "at": datetime.now().isoformat(), "kind": kind}
+        if data is not None:
+            record["data"] = data
+        if kind == "full":
+            record["schema_version"] = CURRENT_SCHEMA_VERSION
+            record["changed"] = changed or []
+        if self.directory is None:
+            self._buffers.setdefault(username, bytearray()).extend(encode_frame(record))
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            # One unbuffered write, so appends from several sessions never interleave
+            with open(self.get_log_file(username), 'ab', buffering=0) as f:
+                f.write(encode_frame(record))
+        # Rescanning the tail picks up this record along with anything
+        # another session appended in the meantime
+        return self._entries(username)[recipe_id][-1]
+
+    def _read(self, username: str, revision: Revision) -> Optional[Dict]:
+        lines = self._lines(username, revision.offset)
+        try:
+            for _, payload, _ in iter_frames(lines):
+                return json.loads(payload) if payload is not None else None
+        finally:
+            lines.close()
+        return None
+
+    def list_revisions(self, username: str, recipe_id: str) -> List[Revision]:
+        return list(self._entries(username).get(recipe_id, ()))
+
+    def get_state(self, username: str, recipe_id: str, number: Optional[int] = None) -> Optional[Dict]:
+        """The recipe as a dict at revision `number` (latest by default).
+
+        A deleted revision returns the state the recipe was deleted in. Returns
+        None if the revision does not exist or a record it depends on was lost.
+        """
+        history = self._entries(username).get(recipe_id)
+        if not history:
+            return None
+        if number is None:
+            number = history[-1].number
+        position = next((i for i in range(len(history) - 1, -1, -1) if history[i].number == number), None)
+        if position is None:
+            return None
+        start = next((i for i in range(position, -1, -1) if history[i].kind == "full"), None)
+        if start is None:
+            return None
+        # A gap in the numbering means a damaged record; replaying past it would be wrong
+        if history[position].number - history[start].number != position - start:
+            return None
+        state = None
+        for revision in history[start:position + 1]:
+            if revision.kind == "deleted":
+                continue
+            record = self._read(username, revision)
+            if record is None:
+                return None
+            if revision.kind == "full":
+                document, _ = upgrade({"schema_version": record.get("schema_version", CURRENT_SCHEMA_VERSION),
+                                       "recipes": [record["data"]]})
+                state = document["recipes"][0]
+            else:
+                state.update(record["data"])
+        return state
+
+    def get_revision(self, username: str, recipe_id: str, number: int) -> Optional[Recipe]:
+        state = self.get_state(username, recipe_id, number)
+        return Recipe.from_storage(state) if state is not None else None
+
+    def diff(self, username: str, recipe_id: str, first: int, second: int) -> Optional[Dict[str, Tuple[Any, Any]]]:
+        """{field: (value at `first`, value at `second`)} for every field that differs"""
+        old = self.get_state(username, recipe_id, first)
+        new = self.get_state(username, recipe_id, second)
+        if old is None or new is None:
+            return None
+        return {name: (old.get(name), new[name]) for name in field_delta(old, new)}
+
+    def record(self, username: str, recipe: Recipe, previous: Optional[Recipe] = None) -> Optional[Revision]:
+        """Append `recipe` as a new revision; returns None if nothing changed.
+
+        `previous` seeds the history with the version being replaced when the
+        recipe has none yet; after that the log itself is the baseline.
+        """
+        history = self._entries(username).get(recipe.recipe_id)
+        state = recipe.to_dict()
+        if not history:
+            if previous is None or not field_delta(previous.to_dict(), state):
+                return self._append(username, recipe.recipe_id, "full", state)
+            self._append(username, recipe.recipe_id, "full", previous.to_dict())
+            history = self._entries(username)[recipe.recipe_id]
+
+        baseline = self.get_state(username, recipe.recipe_id)
+        if baseline is None:
+            return self._append(username, recipe.recipe_id, "full", state)
+        delta = field_delta(baseline, state)
+        if not delta and history[-1].kind != "deleted":
+            return None
+        since_checkpoint = next(i for i, revision in enumerate(reversed(history)) if revision.kind == "full")
+        if since_checkpoint + 1 >= CHECKPOINT_INTERVAL:
+            return self._append(username, recipe.recipe_id, "full", state, sorted(delta))
+        return self._append(username, recipe.recipe_id, "delta", delta)
+
+    def record_deleted(self, username: str, recipe: Recipe) -> Revision:
+        """Mark the recipe deleted, keeping what is needed to restore it"""
+        self.record(username, recipe)
+        return self._append(username, recipe.recipe_id, "deleted")
+
+    def remove_user(self, username: str):
+        self._logs.pop(username, None)
+        self._buffers.pop(username, None)
+        if self.directory is not None and os.path.exists(self.get_log_file(username)):
+            os.remove(self.get_log_file(username))
+
+    def rename_user(self, old: str, new: str):
+        self._logs.pop(old, None)
+        self._logs.pop(new, None)
+        if self.directory is None:
+            if old in self._buffers:
+                self._buffers[new] = self._buffers.pop(old)
+        elif os.path.exists(self.get_log_file(old)):
+            os.replace(self.get_log_file(old), self.get_log_file(new))
@@ -0,0 +1,139 @@
+# services/shopping_list_service.py
+import csv
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Import models
+from models.quantity import Dimension, parse_quantity, parse_unit, format_amount, singular_unit
+from models.recipe import Recipe
+from services.recipe_service import RecipeService
+from utils.console_utils import ConsoleManager
+
+@dataclass
+class ShoppingListItem:
+    name: str
+    dimension: Dimension
+    unit: str                        # canonical unit: 'g', 'ml' or the singular counted noun
+    amount: float = 0.0              # total in the canonical unit (lower bound)
+    high: Optional[float] = None     # upper bound when any entry was a range
+    unparsed: List[str] = field(default_factory=list)  # e.g. "a pinch", "to taste"
+    source_units: List[str] = field(default_factory=list)
+    recipes: List[str] = field(default_factory=list)
+
+    @property
+    def display_unit(self) -> str:
+        """Keep the cook's own unit when every entry used the same one"""
+        if len(self.source_units) == 1:
+            return self.source_units[0]
+        if self.dimension == Dimension.MASS and self.amount >= 1000:
+            return "kg"
+        if self.dimension == Dimension.VOLUME and self.amount >= 1000:
+            return "l"
+        return self.unit
+
+    def display_amount(self) -> str:
+        if not self.amount and not self.high:
+            return ""
+        _, _, factor = parse_unit(self.display_unit)
+        high = self.high / factor if self.high is not None else None
+        return format_amount(self.amount / factor, high)
+
+    def __str__(self) -> str:
+        text = f"{self.display_amount()} {self.display_unit} {self.name}".strip()
+        text = " ".join(text.split())
+        if self.unparsed:
+            text += f" (+ {', '.join(self.unparsed)})"
+        return text
+
+class ShoppingListService:
+    def __init__(self, recipe_service: RecipeService):
+        self.recipe_service = recipe_service
+
+    def build(self, username: str, selections: Dict[str, Optional[int]]) -> List[ShoppingListItem]:
+        """Aggregate ingredients for {recipe_id: target servings} into a shopping list.
+
+        A target of None keeps the recipe's own servings. The collection is loaded
+        once and quantities come from the shared parse cache, so hundreds of
+        recipes aggregate in a single pass.
+        """
+        recipes = {r.recipe_id: r for r in self.recipe_service.load_recipes(username)}
+        items: Dict[Tuple[str, Dimension, str], ShoppingListItem] = {}
+
+        for recipe_id, servings in selections.items():
+            recipe = recipes.get(recipe_id)
+            if recipe is None:
+                continue
+            factor = servings / (recipe.servings or 1) if servings else 1.0
+            self._add_recipe(items, recipe, factor)
+
+        return sorted(items.values(), key=lambda item: (item.name, item.dimension.value, item.unit))
+
+    def _add_recipe(self, items: Dict[Tuple[str, Dimension, str], ShoppingListItem],
+                    recipe: Recipe, factor: float):
+        for ingredient in recipe.ingredients:
+            name = ingredient.canonical_name
+            if not name:
+                continue
+            quantity = parse_quantity(ingredient.amount, ingredient.unit)
+            # "1 clove" and "4 cloves" of garlic belong on one line
+            unit = singular_unit(quantity.unit) if quantity.dimension == Dimension.COUNT else quantity.unit
+            key = (name, quantity.dimension, unit)
+            item = items.get(key)
+            if item is None:
+                item = items[key] = ShoppingListItem(name, quantity.dimension, unit)
+
+            if recipe.name not in item.recipes:
+                item.recipes.append(recipe.name)
+
+            if not quantity.is_known:
+                if ingredient.amount and ingredient.amount not in item.unparsed:
+                    item.unparsed.append(ingredient.amount)
+                continue
+
+            scaled = quantity.scaled(factor)
+            if scaled.high is not None or item.high is not None:
+                item.high = (item.high if item.high is not None else item.amount) + \
+                    (scaled.high if scaled.high is not None else scaled.value)
+            item.amount += scaled.value
+
+            # "cup" and "cups" are the same unit for display purposes; of two
+            # spellings of a counted unit the longer (plural) one is kept
+            source_unit = " ".join(ingredient.unit.lower().split())
+            for i, unit in enumerate(item.source_units):
+                if parse_unit(unit) == parse_unit(source_unit):
+                    break
+                if item.dimension == Dimension.COUNT and singular_unit(unit) == singular_unit(source_unit):
+                    item.source_units[i] = max(unit, source_unit, key=len)
+                    break
+            else:
+                item.source_units.append(source_unit)
+
+    def format_text(self, items: List[ShoppingListItem]) -> str:
+        """Render the shopping list as plain text"""
+        lines = ["Shopping List", "=" * 50]
+        for item in items:
+            lines.append(f"[ ] {item}")
+            lines.append(f"      for: {', '.join(item.recipes)}")
+        return "\n".join(lines) + "\n"
+
+    def export_text(self, items: List[ShoppingListItem], filename: str) -> bool:
+        try:
+            with open(f"{filename}.txt", 'w', encoding='utf-8') as f:
+                f.write(self.format_text(items))
+            return True
+        except Exception as e:
+            ConsoleManager.print_error(f"Export error: {e}")
+            return False
+
+    def export_csv(self, items: List[ShoppingListItem], filename: str) -> bool:
+        try:
+            with open(f"{filename}.csv", 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['Ingredient', 'Amount', 'Unit', 'Other Amounts', 'Recipes'])
+                for item in items:
+                    writer.writerow([item.name, item.display_amount(), item.display_unit,
+                                     '; '.join(item.unparsed), '; '.join(item.recipes)])
+            return True
+        except Exception as e:
+            ConsoleManager.print_error(f"Export error: {e}")
+            return False
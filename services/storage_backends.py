@@ -0,0 +1,502 @@
+# services/storage_backends.py
+import copy
+import importlib
+import json
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Import models
+from models.recipe import Recipe
+from services.migrations import CURRENT_SCHEMA_VERSION, upgrade, encode, decode
+from services.record_storage import (COMPRESSIONS, DEFAULT_COMPRESSION, atomic_write, find_records, read_document,
+                                     write_document, quarantine)
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: only dbm.dumb is available there, and it takes no locks of its own
+    fcntl = None
+
+class StorageError(Exception):
+    """A user's collection exists but cannot be read; the message is meant for the user"""
+
+@dataclass
+class LoadResult:
+    recipes: List[Recipe]
+    # Backend version the recipes were read at (see StorageBackend.version)
+    version: Optional[tuple]
+    warnings: List[str] = field(default_factory=list)
+    # The stored copy is outdated or damaged and should be written back
+    needs_rewrite: bool = False
+
+class StorageBackend:
+    """Where user collections live; recipes are addressed by recipe_id.
+
+    Subclasses implement load/save_all plus the user-level calls. The
+    per-recipe get/put/delete defaults below rewrite the whole collection;
+    backends that can store one recipe on its own override them and set
+    `incremental`, which lets RecipeService write single-recipe changes
+    through directly instead of batching whole-collection rewrites.
+    Backends that keep nothing on disk clear `persistent`, and RecipeService
+    then keeps revision history in memory too.
+    """
+
+    name = ""
+    incremental = False
+    persistent = True
+
+    def users(self) -> List[str]:
+        raise NotImplementedError
+
+    def exists(self, username: str) -> bool:
+        raise NotImplementedError
+
+    def create(self, username: str) -> None:
+        raise NotImplementedError
+
+    def remove_user(self, username: str) -> None:
+        raise NotImplementedError
+
+    def version(self, username: str) -> Optional[tuple]:
+        """Cheap change marker for a user's collection, or None if it does not exist"""
+        raise NotImplementedError
+
+    def load(self, username: str, repair: bool = True) -> LoadResult:
+        """Read a whole collection in stored order.
+
+        With `repair` False the backend must not write anything (it may run on
+        a worker thread); it only reports what a repairing load would fix.
+        """
+        raise NotImplementedError
+
+    def save_all(self, username: str, recipes: List[Recipe]) -> Optional[tuple]:
+        """Replace the whole collection; returns the new version"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release open handles; the backend stays usable and reopens them on demand"""
+
+    def scan(self, username: str) -> List[Recipe]:
+        return self.load(username).recipes
+
+    def get(self, username: str, recipe_id: str) -> Optional[Recipe]:
+        return next((recipe for recipe in self.scan(username) if recipe.recipe_id == recipe_id), None)
+
+    def get_many(self, username: str, recipe_ids: Iterable[str]) -> Optional[Dict[str, Recipe]]:
+        """The stored recipes among `recipe_ids` (absent ones are left out).
+
+        None means the backend could not answer without a full load.
+        """
+        wanted = set(recipe_ids)
+        return {recipe.recipe_id: recipe for recipe in self.scan(username) if recipe.recipe_id in wanted}
+
+    def put(self, username: str, recipe: Recipe) -> Optional[tuple]:
+        """Insert or replace one recipe; returns the new version"""
+        recipes = self.scan(username)
+        for i, existing in enumerate(recipes):
+            if existing.recipe_id == recipe.recipe_id:
+                recipes[i] = recipe
+                break
+        else:
+            recipes.append(recipe)
+        return self.save_all(username, recipes)
+
+    def delete(self, username: str, recipe_id: str) -> Optional[tuple]:
+        """Remove one recipe; returns the new version (unchanged if it was not stored)"""
+        recipes = self.scan(username)
+        kept = [recipe for recipe in recipes if recipe.recipe_id != recipe_id]
+        if len(kept) == len(recipes):
+            return self.version(username)
+        return self.save_all(username, kept)
+
+class FileBackend(StorageBackend):
+    """One framed, optionally compressed file per user: data/recipes_<username>.json"""
+
+    name = "file"
+
+    def __init__(self, data_dir: str = "data", compression: Optional[str] = DEFAULT_COMPRESSION,
+                 compression_level: Optional[int] = None):
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression} (choose from {', '.join(COMPRESSIONS)})")
+        self.data_dir = data_dir
+        # Codec used when writing ("gzip", "lzma", "zlib" or None); reading
+        # detects whatever a file was written with
+        self.compression = compression
+        self.compression_level = compression_level
+        os.makedirs(data_dir, exist_ok=True)
+
+    def get_user_file(self, username: str) -> str:
+        return os.path.join(self.data_dir, f"recipes_{username}.json")
+
+    def get_quarantine_dir(self) -> str:
+        return os.path.join(self.data_dir, "quarantine")
+
+    def users(self) -> List[str]:
+        with os.scandir(self.data_dir) as scan:
+            return sorted(entry.name[len("recipes_"):-len(".json")] for entry in scan
+                          if entry.name.startswith("recipes_") and entry.name.endswith(".json"))
+
+    def exists(self, username: str) -> bool:
+        return os.path.exists(self.get_user_file(username))
+
+    def create(self, username: str) -> None:
+        write_document(self.get_user_file(username), encode([]), self.compression, self.compression_level)
+
+    def remove_user(self, username: str) -> None:
+        os.remove(self.get_user_file(username))
+
+    def version(self, username: str) -> Optional[Tuple[int, int, int]]:
+        """(mtime_ns, size, inode); every save replaces the file, so the inode always changes"""
+        try:
+            stat = os.stat(self.get_user_file(username))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def save_all(self, username: str, recipes: List[Recipe]) -> Optional[Tuple[int, int, int]]:
+        write_document(self.get_user_file(username), encode(recipes), self.compression, self.compression_level)
+        return self.version(username)
+
+    def get_many(self, username: str, recipe_ids: Iterable[str]) -> Optional[Dict[str, Recipe]]:
+        if not self.exists(username):
+            return {}
+        records = find_records(self.get_user_file(username), "recipe_id", recipe_ids)
+        if records is None:
+            return None
+        return {recipe_id: Recipe.from_storage(record) for recipe_id, record in records.items()}
+
+    def load(self, username: str, repair: bool = True) -> LoadResult:
+        filename = self.get_user_file(username)
+        version = self.version(username)
+        if version is None:
+            return LoadResult([], None)
+        try:
+            result = read_document(filename)
+        except json.JSONDecodeError:
+            if not repair:
+                raise
+            # A legacy (unframed) file cannot be salvaged record by record;
+            # keep a copy so the next save does not destroy the only one
+            with open(filename, 'rb') as file:
+                saved_to = quarantine(self.get_quarantine_dir(), f"recipes_{username}", [(0, file.read())])
+            raise StorageError(f"Recipe file is corrupted! A copy was saved to {saved_to}")
+        document, original_version = upgrade(result.document)
+        recipes = decode(document)
+        loaded = LoadResult(recipes, version, needs_rewrite=bool(
+            result.damaged or result.stream_error or not result.framed
+            or original_version < CURRENT_SCHEMA_VERSION))
+        if not repair:
+            if result.stream_error:
+                loaded.warnings.append(f"Compressed recipe file is damaged ({result.stream_error})")
+            elif result.damaged:
+                loaded.warnings.append(f"Recipe file is damaged: {len(result.damaged)} unreadable record(s)")
+            return loaded
+        if result.stream_error:
+            # Compressed data past the break cannot be split into frames,
+            # so keep the whole original file
+            with open(filename, 'rb') as file:
+                saved_to = quarantine(self.get_quarantine_dir(), f"recipes_{username}", [(0, file.read())])
+            loaded.warnings.append(f"Compressed recipe file is damaged ({result.stream_error}): "
+                                   f"recovered {len(recipes)} recipe(s), original saved to {saved_to}")
+        elif result.damaged:
+            saved_to = quarantine(self.get_quarantine_dir(), f"recipes_{username}", result.damaged)
+            loaded.warnings.append(f"Recipe file was damaged: recovered {len(recipes)} recipe(s), "
+                                   f"{len(result.damaged)} unreadable record(s) saved to {saved_to}")
+        return loaded
+
+class DbmBackend(StorageBackend):
+    """One dbm database per user (data/recipes_<username>.db), keyed by recipe_id.
+
+    Values are [sequence, record] so scans keep insertion order; a metadata
+    key holds the schema version and the next sequence number. Read-only
+    handles stay open between calls, since opening one may read its whole
+    key directory (dbm.dumb does), and are reopened only once the version
+    moves on; each write opens its own handle and closes it to commit. Every
+    write replaces a small .version file with a fresh token,
+    which is the version: file times can miss two quick writes of the same
+    size, a token cannot.
+
+    Sessions coordinate through a .lock file next to the database, held
+    shared while reading and exclusively while writing. Cached gdbm handles
+    are opened without gdbm's own lock, which would otherwise stay held as
+    long as the handle and make every other session's writes fail. `module`
+    picks the implementation ("dbm.gnu", "dbm.ndbm" or "dbm.dumb"); by
+    default new databases use whichever the platform provides first and
+    existing ones are opened with the one that wrote them.
+    """
+
+    name = "dbm"
+    incremental = True
+
+    _META = b"\x00meta"
+    _SUFFIXES = ("", ".db", ".dat", ".dir", ".pag", ".bak", ".version", ".lock")
+
+    def __init__(self, data_dir: str = "data", module: Optional[str] = None):
+        if module is not None:
+            importlib.import_module(module)
+        self.data_dir = data_dir
+        self.module = module
+        os.makedirs(data_dir, exist_ok=True)
+        # username -> (version the handle is current for, open database)
+        self._handles: Dict[str, Tuple[tuple, object]] = {}
+
+    def get_user_file(self, username: str) -> str:
+        return os.path.join(self.data_dir, f"recipes_{username}.db")
+
+    def version(self, username: str) -> Optional[Tuple[str]]:
+        try:
+            with open(self.get_user_file(username) + ".version", encoding='utf-8') as f:
+                return (f.read(),)
+        except OSError:
+            return None
+
+    @contextmanager
+    def _locked(self, username: str, exclusive: bool = False):
+        """Hold the collection's lock file: shared for reads, exclusive for writes"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.get_user_file(username) + ".lock", 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _db(self, username: str):
+        """Read-only handle, kept open until the collection's version moves on; call with the lock held"""
+        version = self.version(username)
+        cached = self._handles.get(username)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        if cached is not None:
+            cached[1].close()
+        import dbm
+        path = self.get_user_file(username)
+        module = self.module or dbm.whichdb(path) or "dbm"
+        db = importlib.import_module(module).open(path, 'ru' if module == "dbm.gnu" else 'r')
+        self._handles[username] = (version, db)
+        return db
+
+    def _writer(self, username: str):
+        """Handle for one write; _written closes it, so no handle that wrote outlives its write"""
+        cached = self._handles.pop(username, None)
+        if cached is not None:
+            cached[1].close()
+        return importlib.import_module(self.module or "dbm").open(self.get_user_file(username), 'c')
+
+    def _written(self, username: str, db) -> Tuple[str]:
+        """Commit a write and make it visible to other processes; returns the new version
+
+        The handle is closed rather than kept: dbm.dumb rewrites its whole key
+        index on close, so a writer kept open past another process's write
+        would put back an outdated index. Reopening costs a directory parse
+        on dbm.dumb and next to nothing on gdbm/ndbm.
+        """
+        import uuid
+        db.close()
+        path = self.get_user_file(username) + ".version"
+        version = (uuid.uuid4().hex,)
+        with atomic_write(path, 'w', encoding='utf-8') as f:
+            f.write(version[0])
+        return version
+
+    def _meta(self, db) -> Dict:
+        raw = db.get(self._META)
+        return json.loads(raw) if raw is not None else {"schema_version": CURRENT_SCHEMA_VERSION, "next": 0}
+
+    def _encode(self, sequence: int, recipe: Recipe) -> bytes:
+        return json.dumps([sequence, recipe.to_dict()], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def _decode(self, meta: Dict, records: List[Dict]) -> Tuple[List[Recipe], int]:
+        document, original_version = upgrade({"schema_version": meta["schema_version"], "recipes": records})
+        return decode(document), original_version
+
+    def users(self) -> List[str]:
+        with os.scandir(self.data_dir) as scan:
+            names = {entry.name[len("recipes_"):].split(".db")[0] for entry in scan
+                     if entry.name.startswith("recipes_") and ".db" in entry.name
+                     and not entry.name.endswith(".lock")}
+        return sorted(names)
+
+    def exists(self, username: str) -> bool:
+        return self.version(username) is not None
+
+    def create(self, username: str) -> None:
+        with self._locked(username, exclusive=True):
+            db = self._writer(username)
+            try:
+                if self._META not in db:
+                    db[self._META] = json.dumps(self._meta(db))
+            finally:
+                self._written(username, db)
+
+    def remove_user(self, username: str) -> None:
+        cached = self._handles.pop(username, None)
+        if cached is not None:
+            cached[1].close()
+        path = self.get_user_file(username)
+        with self._locked(username, exclusive=True):
+            for suffix in self._SUFFIXES:
+                if suffix != ".lock" and os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        if os.path.exists(path + ".lock"):
+            os.remove(path + ".lock")
+
+    def close(self) -> None:
+        for _, db in self._handles.values():
+            db.close()
+        self._handles.clear()
+
+    def load(self, username: str, repair: bool = True) -> LoadResult:
+        if not self.exists(username):
+            return LoadResult([], None)
+        with self._locked(username):
+            db = self._db(username)
+            version = self._handles[username][0]
+            meta = self._meta(db)
+            entries = [json.loads(db[key]) for key in db.keys() if key != self._META]
+        entries.sort(key=lambda entry: entry[0])
+        recipes, original_version = self._decode(meta, [record for _, record in entries])
+        return LoadResult(recipes, version, needs_rewrite=original_version < CURRENT_SCHEMA_VERSION)
+
+    def save_all(self, username: str, recipes: List[Recipe]) -> tuple:
+        with self._locked(username, exclusive=True):
+            db = self._writer(username)
+            try:
+                stale = {key for key in db.keys() if key != self._META}
+                for sequence, recipe in enumerate(recipes):
+                    key = recipe.recipe_id.encode('utf-8')
+                    db[key] = self._encode(sequence, recipe)
+                    stale.discard(key)
+                for key in stale:
+                    del db[key]
+                db[self._META] = json.dumps({"schema_version": CURRENT_SCHEMA_VERSION, "next": len(recipes)})
+            finally:
+                version = self._written(username, db)
+        return version
+
+    def get(self, username: str, recipe_id: str) -> Optional[Recipe]:
+        if not self.exists(username):
+            return None
+        with self._locked(username):
+            db = self._db(username)
+            raw = db.get(recipe_id.encode('utf-8'))
+            meta = self._meta(db)
+        return self._decode(meta, [json.loads(raw)[1]])[0][0] if raw is not None else None
+
+    def get_many(self, username: str, recipe_ids: Iterable[str]) -> Dict[str, Recipe]:
+        found = {}
+        for recipe_id in recipe_ids:
+            recipe = self.get(username, recipe_id)
+            if recipe is not None:
+                found[recipe_id] = recipe
+        return found
+
+    def put(self, username: str, recipe: Recipe) -> tuple:
+        key = recipe.recipe_id.encode('utf-8')
+        with self._locked(username, exclusive=True):
+            db = self._writer(username)
+            try:
+                raw = db.get(key)
+                if raw is not None:
+                    sequence = json.loads(raw)[0]
+                else:
+                    meta = self._meta(db)
+                    sequence = meta["next"]
+                    meta["next"] += 1
+                    db[self._META] = json.dumps(meta)
+                db[key] = self._encode(sequence, recipe)
+            finally:
+                version = self._written(username, db)
+        return version
+
+    def delete(self, username: str, recipe_id: str) -> Optional[tuple]:
+        key = recipe_id.encode('utf-8')
+        if not self.exists(username):
+            return None
+        with self._locked(username, exclusive=True):
+            if key not in self._db(username):
+                return self.version(username)
+            db = self._writer(username)
+            try:
+                if key in db:
+                    del db[key]
+            finally:
+                version = self._written(username, db)
+        return version
+
+class MemoryBackend(StorageBackend):
+    """Collections held in this process only, for tests and benchmarks"""
+
+    name = "memory"
+    incremental = True
+    persistent = False
+
+    def __init__(self):
+        # username -> {recipe_id: record dict}, in insertion order
+        self._users: Dict[str, Dict[str, Dict]] = {}
+        self._changes: Dict[str, int] = {}
+
+    def _touch(self, username: str) -> Tuple[int]:
+        self._changes[username] = self._changes.get(username, 0) + 1
+        return (self._changes[username],)
+
+    def users(self) -> List[str]:
+        return sorted(self._users)
+
+    def exists(self, username: str) -> bool:
+        return username in self._users
+
+    def create(self, username: str) -> None:
+        self._users.setdefault(username, {})
+        self._touch(username)
+
+    def remove_user(self, username: str) -> None:
+        self._users.pop(username, None)
+        self._changes.pop(username, None)
+
+    def version(self, username: str) -> Optional[Tuple[int]]:
+        return (self._changes[username],) if username in self._users else None
+
+    def load(self, username: str, repair: bool = True) -> LoadResult:
+        records = self._users.get(username)
+        if records is None:
+            return LoadResult([], None)
+        # Records are copied out so callers can never mutate the stored state
+        return LoadResult([Recipe.from_storage(copy.deepcopy(record)) for record in records.values()],
+                          self.version(username))
+
+    def save_all(self, username: str, recipes: List[Recipe]) -> Tuple[int]:
+        self._users[username] = {recipe.recipe_id: recipe.to_dict() for recipe in recipes}
+        return self._touch(username)
+
+    def get(self, username: str, recipe_id: str) -> Optional[Recipe]:
+        record = self._users.get(username, {}).get(recipe_id)
+        return Recipe.from_storage(copy.deepcopy(record)) if record is not None else None
+
+    def get_many(self, username: str, recipe_ids: Iterable[str]) -> Dict[str, Recipe]:
+        records = self._users.get(username, {})
+        return {recipe_id: Recipe.from_storage(copy.deepcopy(records[recipe_id]))
+                for recipe_id in recipe_ids if recipe_id in records}
+
+    def put(self, username: str, recipe: Recipe) -> Tuple[int]:
+        self._users.setdefault(username, {})[recipe.recipe_id] = recipe.to_dict()
+        return self._touch(username)
+
+    def delete(self, username: str, recipe_id: str) -> Tuple[int]:
+        if self._users.get(username, {}).pop(recipe_id, None) is not None:
+            return self._touch(username)
+        return self.version(username)
+
+# Backends selectable by name, e.g. RecipeService(backend="dbm")
+BACKENDS: Dict[str, Callable[..., StorageBackend]] = {
+    "file": FileBackend,
+    "dbm": lambda data_dir="data", **options: DbmBackend(data_dir),
+    "memory": lambda data_dir="data", **options: MemoryBackend(),
+}
+
+def create_backend(name: str, data_dir: str = "data", **options) -> StorageBackend:
+    """Build the backend registered as `name`; options such as compression go to the file backend"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {name} (choose from {', '.join(sorted(BACKENDS))})")
+    return BACKENDS[name](data_dir, **options)
@@ -0,0 +1,147 @@
+# services/timeline_index.py
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+SECONDS_PER_DAY = 86400
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def datetime_to_epoch(moment: datetime) -> int:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return int((moment - _EPOCH).total_seconds())
+
+@lru_cache(maxsize=65536)
+def to_epoch(timestamp: str) -> Optional[int]:
+    """Wall-clock seconds since 1970-01-01 for an ISO timestamp.
+
+    Naive timestamps are taken as written (that is how recipes store them), so
+    `epoch // 86400` is the calendar day shown in the ISO string.
+    """
+    if not timestamp:
+        return None
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return None
+    return datetime_to_epoch(moment)
+
+def epoch_to_date(epoch: int) -> date:
+    return date.fromordinal(_EPOCH_ORDINAL + epoch // SECONDS_PER_DAY)
+
+def date_to_epoch(day: date) -> int:
+    return (day.toordinal() - _EPOCH_ORDINAL) * SECONDS_PER_DAY
+
+class TimelineIndex:
+    """Sorted arrays of creation/update epochs with the slot each belongs to.
+
+    Timestamps are parsed once when a recipe is indexed; range queries,
+    histograms and streaks then work on machine integers only.
+    """
+
+    KINDS = ("created", "updated")
+
+    def __init__(self):
+        self.epochs: Dict[str, array] = {kind: array('q') for kind in self.KINDS}
+        self.slots: Dict[str, array] = {kind: array('l') for kind in self.KINDS}
+
+    def __len__(self) -> int:
+        return len(self.epochs["created"])
+
+    def add(self, slot: int, created_at: str, updated_at: str):
+        for kind, timestamp in (("created", created_at), ("updated", updated_at)):
+            epoch = to_epoch(timestamp)
+            if epoch is None:
+                continue
+            position = bisect_right(self.epochs[kind], epoch)
+            self.epochs[kind].insert(position, epoch)
+            self.slots[kind].insert(position, slot)
+
+    def remove(self, slot: int, created_at: str, updated_at: str):
+        for kind, timestamp in (("created", created_at), ("updated", updated_at)):
+            epoch = to_epoch(timestamp)
+            if epoch is None:
+                continue
+            epochs, slots = self.epochs[kind], self.slots[kind]
+            position = bisect_left(epochs, epoch)
+            while position < len(epochs) and epochs[position] == epoch:
+                if slots[position] == slot:
+                    del epochs[position]
+                    del slots[position]
+                    break
+                position += 1
+
+    def range(self, kind: str, start: Optional[int] = None, end: Optional[int] = None) -> List[int]:
+        """Slots whose timestamp falls in [start, end), oldest first"""
+        epochs = self.epochs[kind]
+        low = bisect_left(epochs, start) if start is not None else 0
+        high = bisect_left(epochs, end) if end is not None else len(epochs)
+        return list(self.slots[kind][low:high])
+
+    def since(self, kind: str, moment: datetime) -> List[int]:
+        return self.range(kind, datetime_to_epoch(moment))
+
+    def histogram(self, kind: str = "created", bucket: str = "day") -> List[Tuple[str, int]]:
+        """Counts per day, week (ISO, starting Monday) or month, in chronological order"""
+        counts: List[Tuple[str, int]] = []
+        last_day = None
+        last_label = None
+        for epoch in self.epochs[kind]:
+            day = epoch // SECONDS_PER_DAY
+            if day != last_day:
+                last_day = day
+                label = self._bucket_label(day, bucket)
+                if label != last_label:
+                    counts.append((label, 0))
+                    last_label = label
+            counts[-1] = (counts[-1][0], counts[-1][1] + 1)
+        return counts
+
+    @staticmethod
+    def _bucket_label(day: int, bucket: str) -> str:
+        current = date.fromordinal(_EPOCH_ORDINAL + day)
+        if bucket == "month":
+            return current.strftime("%Y-%m")
+        if bucket == "week":
+            year, week, _ = current.isocalendar()
+            return f"{year}-W{week:02d}"
+        return current.isoformat()
+
+    def active_days(self, kind: str = "created") -> List[int]:
+        days = []
+        for epoch in self.epochs[kind]:
+            day = epoch // SECONDS_PER_DAY
+            if not days or days[-1] != day:
+                days.append(day)
+        return days
+
+    def streaks(self, kind: str = "created", today: Optional[date] = None) -> Dict[str, int]:
+        """Longest run of consecutive active days, and the run ending today or yesterday"""
+        days = self.active_days(kind)
+        longest = current = 0
+        run = 0
+        previous = None
+        for day in days:
+            run = run + 1 if previous is not None and day == previous + 1 else 1
+            longest = max(longest, run)
+            previous = day
+        if days:
+            today_number = (today or date.today()).toordinal() - _EPOCH_ORDINAL
+            if today_number - days[-1] <= 1:
+                current = run
+        return {"longest": longest, "current": current, "active_days": len(days)}
+
+    def busiest_day(self, kind: str = "created") -> Optional[Tuple[str, int]]:
+        daily = self.histogram(kind, "day")
+        if not daily:
+            return None
+        return max(daily, key=lambda item: item[1])
+
+    def span(self, kind: str = "created") -> Optional[Tuple[date, date]]:
+        epochs = self.epochs[kind]
+        if not epochs:
+            return None
+        return epoch_to_date(epochs[0]), epoch_to_date(epochs[-1])
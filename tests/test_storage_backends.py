@@ -0,0 +1,209 @@
+# tests/test_storage_backends.py
+import importlib
+import shutil
+import tempfile
+import unittest
+
+# Import models
+from models.recipe import Ingredient, NutritionalInfo, Recipe, RecipeCategory
+from services.storage_backends import DbmBackend, FileBackend, MemoryBackend, StorageBackend
+
+def make_recipe(name: str, **fields) -> Recipe:
+    return Recipe(name=name, ingredients=[Ingredient("flour", "2", "cups"), Ingredient("crème fraîche", "1")],
+                  instructions=["Mix", "Bake"], category=RecipeCategory.DESSERT, tags=["sweet"],
+                  nutritional_info=NutritionalInfo(calories=350), **fields)
+
+def available(module: str) -> bool:
+    try:
+        importlib.import_module(module)
+    except ImportError:
+        return False
+    return True
+
+class BackendContract:
+    """Behaviour every StorageBackend must share; subclasses say how to build one"""
+
+    def make_backend(self) -> StorageBackend:
+        raise NotImplementedError
+
+    def reopen(self) -> StorageBackend:
+        """A second view of the same collections, as another process would have"""
+        raise NotImplementedError
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.backend = self.make_backend()
+        self.opened = [self.backend]
+
+    def tearDown(self):
+        for backend in self.opened:
+            backend.close()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def other(self) -> StorageBackend:
+        backend = self.reopen()
+        self.opened.append(backend)
+        return backend
+
+    # Users
+
+    def test_create_lists_and_removes_users(self):
+        self.assertEqual(self.backend.users(), [])
+        self.assertFalse(self.backend.exists("bob"))
+        self.backend.create("bob")
+        self.backend.create("alice")
+        self.assertEqual(self.backend.users(), ["alice", "bob"])
+        self.assertTrue(self.backend.exists("bob"))
+        self.assertEqual(self.backend.load("bob").recipes, [])
+        self.backend.remove_user("bob")
+        self.assertEqual(self.backend.users(), ["alice"])
+        self.assertFalse(self.backend.exists("bob"))
+        self.assertIsNone(self.backend.version("bob"))
+
+    def test_missing_user(self):
+        result = self.backend.load("ghost")
+        self.assertEqual(result.recipes, [])
+        self.assertIsNone(result.version)
+        self.assertIsNone(self.backend.version("ghost"))
+        self.assertIsNone(self.backend.get("ghost", "nope"))
+        self.assertEqual(self.backend.get_many("ghost", ["nope"]), {})
+
+    # Round trips
+
+    def test_save_all_and_load_keep_order_and_fields(self):
+        recipes = [make_recipe(f"Cake {i}", rating=4.5, prep_time=i) for i in range(5)]
+        self.backend.create("alice")
+        self.backend.save_all("alice", recipes)
+        self.assertEqual(self.backend.load("alice").recipes, recipes)
+        # Saving a subset drops the rest
+        self.backend.save_all("alice", recipes[3:] + recipes[:1])
+        self.assertEqual(self.backend.load("alice").recipes, recipes[3:] + recipes[:1])
+
+    def test_put_get_delete(self):
+        self.backend.create("alice")
+        first, second = make_recipe("Scones"), make_recipe("Tart")
+        self.backend.put("alice", first)
+        self.backend.put("alice", second)
+        self.assertEqual(self.backend.get("alice", first.recipe_id), first)
+
+        edited = make_recipe("Better scones", recipe_id=first.recipe_id)
+        self.backend.put("alice", edited)
+        # Replacing a recipe keeps its place
+        self.assertEqual(self.backend.load("alice").recipes, [edited, second])
+
+        self.backend.delete("alice", first.recipe_id)
+        self.assertIsNone(self.backend.get("alice", first.recipe_id))
+        self.assertEqual(self.backend.load("alice").recipes, [second])
+
+    def test_missing_keys(self):
+        self.backend.create("alice")
+        kept = make_recipe("Scones")
+        self.backend.put("alice", kept)
+        self.assertIsNone(self.backend.get("alice", "nope"))
+        found = self.backend.get_many("alice", [kept.recipe_id, "nope"])
+        # None is allowed: the backend could not answer without a full load
+        if found is not None:
+            self.assertEqual(found, {kept.recipe_id: kept})
+        version = self.backend.version("alice")
+        self.assertEqual(self.backend.delete("alice", "nope"), version)
+        self.assertEqual(self.backend.version("alice"), version)
+        self.assertEqual(self.backend.load("alice").recipes, [kept])
+
+    # Versions
+
+    def test_version_changes_on_every_write_only(self):
+        self.backend.create("alice")
+        seen = [self.backend.version("alice")]
+        self.assertIsNotNone(seen[0])
+        recipe = make_recipe("Scones")
+        for write in (lambda: self.backend.put("alice", recipe),
+                      lambda: self.backend.put("alice", recipe),
+                      lambda: self.backend.save_all("alice", [recipe]),
+                      lambda: self.backend.delete("alice", recipe.recipe_id)):
+            returned = write()
+            self.assertEqual(returned, self.backend.version("alice"))
+            self.assertNotIn(returned, seen)
+            seen.append(returned)
+        # Reads leave the version alone
+        self.backend.load("alice")
+        self.backend.get("alice", recipe.recipe_id)
+        self.assertEqual(self.backend.version("alice"), seen[-1])
+
+    def test_load_reports_current_version(self):
+        self.backend.create("alice")
+        version = self.backend.put("alice", make_recipe("Scones"))
+        self.assertEqual(self.backend.load("alice").version, version)
+
+    def test_second_view_sees_writes(self):
+        self.backend.create("alice")
+        other = self.other()
+        self.assertEqual(other.load("alice").recipes, [])
+        recipe = make_recipe("Scones")
+        version = self.backend.put("alice", recipe)
+        self.assertEqual(other.version("alice"), version)
+        self.assertEqual(other.get("alice", recipe.recipe_id), recipe)
+        self.assertEqual(other.load("alice").recipes, [recipe])
+
+    def test_interleaved_writers_lose_nothing(self):
+        self.backend.create("alice")
+        other = self.other()
+        first, second, third = make_recipe("Scones"), make_recipe("Tart"), make_recipe("Pie")
+        self.backend.put("alice", first)
+        other.load("alice")
+        other.put("alice", second)
+        self.backend.load("alice")
+        self.backend.put("alice", third)
+        # Closing views that read or wrote earlier must not undo later writes
+        other.close()
+        self.backend.close()
+        self.assertEqual(self.other().load("alice").recipes, [first, second, third])
+
+    def test_close_keeps_backend_usable(self):
+        self.backend.create("alice")
+        recipe = make_recipe("Scones")
+        self.backend.put("alice", recipe)
+        self.backend.close()
+        self.assertEqual(self.backend.load("alice").recipes, [recipe])
+
+class FileBackendTest(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        return FileBackend(self.data_dir)
+
+    def reopen(self):
+        return FileBackend(self.data_dir)
+
+class CompressedFileBackendTest(FileBackendTest):
+    def make_backend(self):
+        return FileBackend(self.data_dir, compression="gzip")
+
+class DbmBackendTest(BackendContract, unittest.TestCase):
+    # dbm implementation under test; None is the platform default
+    module = None
+
+    def make_backend(self):
+        return DbmBackend(self.data_dir, self.module)
+
+    def reopen(self):
+        return DbmBackend(self.data_dir, self.module)
+
+@unittest.skipUnless(available("dbm.gnu"), "dbm.gnu is not installed")
+class GnuDbmBackendTest(DbmBackendTest):
+    module = "dbm.gnu"
+
+@unittest.skipUnless(available("dbm.ndbm"), "dbm.ndbm is not installed")
+class NdbmBackendTest(DbmBackendTest):
+    module = "dbm.ndbm"
+
+class DumbDbmBackendTest(DbmBackendTest):
+    module = "dbm.dumb"
+
+class MemoryBackendTest(BackendContract, unittest.TestCase):
+    def make_backend(self):
+        return MemoryBackend()
+
+    def reopen(self):
+        # Collections live in this one instance; every view shares it
+        return self.backend
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,15 @@
+# utils/bit_utils.py
+from typing import Iterator
+
+try:
+    popcount = int.bit_count  # Python 3.10+
+except AttributeError:
+    def popcount(mask: int) -> int:
+        return bin(mask).count("1")
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """Yield the positions of set bits, lowest first"""
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
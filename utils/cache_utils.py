@@ -0,0 +1,32 @@
+# utils/cache_utils.py
+from typing import Any, Callable, Optional
+
+class VersionedCache(dict):
+    """username -> (collection version, derived object such as an index).
+
+    An entry is reused only while the collection is still at the version it
+    was built from; a None version (no stored collection) never matches.
+    """
+
+    def fetch(self, username: str, version: Optional[tuple], build: Callable[[], Any]) -> Any:
+        """The cached object for `version`, building and caching it if the collection changed"""
+        cached = self.get(username)
+        if cached is None or cached[0] != version or version is None:
+            cached = (version, build())
+            self[username] = cached
+        return cached[1]
+
+    def patch(self, username: str, previous_version: Optional[tuple], version: Optional[tuple],
+              change: Callable[[Any], None]) -> bool:
+        """Apply one change to an object built at `previous_version` and tag it with `version`.
+
+        An object built from any other version is dropped instead, so the next
+        fetch rebuilds it; returns whether the change was applied.
+        """
+        cached = self.get(username)
+        if cached is None or cached[0] != previous_version:
+            self.pop(username, None)
+            return False
+        change(cached[1])
+        self[username] = (version, cached[1])
+        return True
@@ -1,8 +1,10 @@
 # utils/console_utils.py
+import codecs
 import sys
 import os
-from typing import List, Callable, Any
+from typing import List, Callable, Any, Optional
 from enum import Enum
+from functools import lru_cache
 
 # Import optional modules with fallbacks
 try:
@@ -69,21 +71,38 @@ class ConsoleManager:
 
 class KeyboardInput:
     @staticmethod
-    def get_key():
-        """Get a single keypress from stdin with cross-platform compatibility"""
+    def get_key(timeout: Optional[float] = None):
+        """Get a single keypress from stdin with cross-platform compatibility.
+
+        With a timeout, returns None if no key was pressed within that many seconds
+        """
         if os.name == 'nt':  # Windows
             try:
                 import msvcrt
-                key = msvcrt.getch()
-                if key in (b'\xe0', b'\x00'):  # Arrow key prefix
-                    key = msvcrt.getch()
-                    arrow_keys = {b'H': 'UP', b'P': 'DOWN', b'K': 'LEFT', b'M': 'RIGHT'}
+                if timeout is not None:
+                    import time
+                    deadline = time.monotonic() + timeout
+                    while not msvcrt.kbhit():
+                        if time.monotonic() >= deadline:
+                            return None
+                        time.sleep(0.05)
+                # getwch returns whole characters, so "ñ" or "é" arrive intact
+                key = msvcrt.getwch()
+                # Special keys send a prefix plus a code; a typed "à" is the
+                # same '\xe0' on its own
+                if key == '\x00' or (key == '\xe0' and msvcrt.kbhit()):
+                    key = msvcrt.getwch()
+                    arrow_keys = {'H': 'UP', 'P': 'DOWN', 'K': 'LEFT', 'M': 'RIGHT'}
                     return arrow_keys.get(key, None)
-                elif key == b'\r':
+                elif key == '\r':
                     return 'ENTER'
-                elif key == b'\x1b':
+                elif key == '\x08':
+                    return 'BACKSPACE'
+                elif key == '\t':
+                    return 'TAB'
+                elif key == '\x1b':
                     return 'ESC'
-                return key.decode('utf-8', errors='ignore')
+                return key if key.isprintable() else None
             except ImportError:
                 # Fallback
                 return input().strip()[:1] if input().strip() else 'ENTER'
@@ -99,25 +118,47 @@ class KeyboardInput:
 
                 old_settings = termios.tcgetattr(fd)
                 try:
-                    tty.setraw(fd)
-                    ch1 = sys.stdin.read(1)
+                    # TCSANOW: the default TCSAFLUSH would drop keys typed ahead
+                    tty.setraw(fd, termios.TCSANOW)
+                    if timeout is not None:
+                        import select
+                        if not select.select([fd], [], [], timeout)[0]:
+                            return None
+                    # Read the descriptor directly: sys.stdin would buffer those
+                    # keys where select() cannot see them. Multibyte UTF-8
+                    # characters are assembled byte by byte; invalid input
+                    # raises UnicodeDecodeError and falls back to input()
+                    decoder = codecs.getincrementaldecoder('utf-8')()
+
+                    def read() -> str:
+                        while True:
+                            byte = os.read(fd, 1)
+                            if not byte:
+                                return ''
+                            char = decoder.decode(byte)
+                            if char:
+                                return char
+
+                    ch1 = read()
 
                     if ch1 == '\x1b':  # Escape sequence
-                        ch2 = sys.stdin.read(1)
-                        ch3 = sys.stdin.read(1)
+                        ch2 = read()
+                        ch3 = read()
                         arrow_keys = {'A': 'UP', 'B': 'DOWN', 'C': 'RIGHT', 'D': 'LEFT'}
                         return arrow_keys.get(ch3, 'ESC')
                     elif ch1 in ('\n', '\r'):
                         return 'ENTER'
                     elif ch1 == '\x03':  # Ctrl+C
                         raise KeyboardInterrupt
-                    elif ch1 == '\x04':  # Ctrl+D
+                    elif ch1 in ('\x04', ''):  # Ctrl+D or end of input
                         return 'ESC'
                     elif ch1 == ' ':
                         return 'SPACE'
                     elif ch1 == '\t':
                         return 'TAB'
-                    elif 32 <= ord(ch1) <= 126:
+                    elif ch1 in ('\x7f', '\x08'):
+                        return 'BACKSPACE'
+                    elif ch1.isprintable():
                         return ch1
                     else:
                         return None
@@ -128,16 +169,26 @@ class KeyboardInput:
                 return 'FALLBACK'
 
 class InteractiveMenu:
-    def __init__(self, title: str, options: List[str], show_back: bool = True):
+    # Returned by run() when `watch` reported a change; the caller rebuilds the menu
+    REFRESH = -2
+    # Seconds between `watch` calls while waiting for a key
+    WATCH_INTERVAL = 1.0
+    
+    def __init__(self, title: str, options: List[str], show_back: bool = True,
+                 watch: Optional[Callable[[], bool]] = None):
         self.title = title
         self.options = options.copy()
         if show_back:
             self.options.append("← Back")
         self.selected_index = 0
-        self.use_arrows = self._test_arrow_support()
+        self.use_arrows = self.arrow_keys_supported()
+        # Polled while idle in arrow mode; number mode blocks in input() and never polls
+        self.watch = watch
     
-    def _test_arrow_support(self) -> bool:
-        """Test if arrow key navigation is supported"""
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def arrow_keys_supported() -> bool:
+        """Test if arrow key navigation is supported (probed once per process)"""
         # More comprehensive testing for arrow key support
         try:
             if os.name == 'nt':
@@ -191,13 +242,19 @@ class InteractiveMenu:
     
     def _run_arrow_mode(self) -> int:
         """Arrow key navigation mode"""
+        redraw = True
         while True:
             try:
-                self.display()
-                key = KeyboardInput.get_key()
+                if redraw:
+                    self.display()
+                redraw = True
+                key = KeyboardInput.get_key(self.WATCH_INTERVAL if self.watch is not None else None)
                 
                 # Handle the case where get_key returns None (timeout) or FALLBACK
                 if key is None:
+                    if self.watch is not None and self.watch():
+                        return self.REFRESH
+                    redraw = False
                     continue  # No key pressed, keep waiting
                 elif key == 'FALLBACK':
                     # Arrow key detection failed, switch to number mode
@@ -252,6 +309,69 @@ class InteractiveMenu:
             except (EOFError, KeyboardInterrupt):
                 return -1
 
+class AutocompletePrompt:
+    """Single-line input that suggests completions while typing.
+    
+    Tab accepts the highlighted (or first) suggestion, ↑↓ move the highlight
+    and Enter confirms. Without raw terminal support it falls back to input().
+    """
+    
+    def __init__(self, label: str, complete: Callable[[str], List[str]], limit: int = 5):
+        self.label = label
+        self.complete = complete
+        self.limit = limit
+    
+    def run(self) -> str:
+        if not InteractiveMenu.arrow_keys_supported():
+            return input(self.label).strip()
+        
+        text = ""
+        selected = -1
+        while True:
+            suggestions = self.complete(text)[:self.limit] if text.strip() else []
+            self._render(text, suggestions, selected)
+            key = KeyboardInput.get_key()
+            
+            if key == 'FALLBACK':
+                print()
+                return input(self.label).strip()
+            elif key == 'ENTER':
+                if 0 <= selected < len(suggestions):
+                    text = suggestions[selected]
+                    self._render(text, [], -1)
+                print()
+                return text.strip()
+            elif key == 'ESC':
+                print()
+                return ""
+            elif key == 'TAB':
+                if suggestions:
+                    text = suggestions[max(selected, 0)]
+                selected = -1
+            elif key in ('UP', 'DOWN'):
+                if suggestions:
+                    step = -1 if key == 'UP' else 1
+                    selected = (selected + 1 + step) % (len(suggestions) + 1) - 1
+            elif key == 'BACKSPACE':
+                text = text[:-1]
+                selected = -1
+            elif key == 'SPACE':
+                text += " "
+                selected = -1
+            elif key and len(key) == 1:
+                text += key
+                selected = -1
+    
+    def _render(self, text: str, suggestions: List[str], selected: int):
+        line = f"\r\033[K{self.label}{text}"
+        if suggestions:
+            hints = " | ".join(f"{Color.BOLD}{hint}{Color.RESET}{Color.CYAN}" if i == selected else hint
+                               for i, hint in enumerate(suggestions))
+            # Save the cursor, show the hints after it, then jump back
+            line += f"\0337  {Color.CYAN}[{hints}]{Color.RESET}\0338"
+        sys.stdout.write(line)
+        sys.stdout.flush()
+
 class FormField:
     def __init__(self, name: str, label: str, field_type: str = "text", 
                  required: bool = True, options: List[str] = None, 